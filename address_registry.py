@@ -0,0 +1,123 @@
+class AddressRegistry:
+    """
+    This class interns address strings as dense integer ids.
+
+    When the registry is created from the places of a graph, each place's id is
+    the same as its row/column in the graph's adjacency matrix.
+
+    Attributes
+    ----------
+    addresses : list[str]
+        The address of each id
+    ids : dict[str, int]
+        Maps each address to its id
+
+    Methods
+    -------
+    intern(address)
+        Finds the id of an address, giving new addresses the next free id
+
+    intern_many(addresses)
+        Finds the ids of many addresses
+
+    id_of(address)
+        Finds the id of an address that has already been interned
+
+    address_of(id)
+        Finds the address of an id
+    """
+
+    #O(n)
+    #Where n = the number of addresses
+    def __init__(self, addresses=()):
+        """
+        Parameters
+        ----------
+        addresses : list[str]
+            The addresses to intern first, in order (default = ())
+        """
+        self.addresses = []
+        self.ids = {}
+        self.intern_many(addresses)
+
+    #O(1)
+    def __len__(self):
+        return len(self.addresses)
+
+    #O(1)
+    def __contains__(self, address):
+        return address in self.ids
+
+    #O(1)
+    def intern(self, address):
+        """
+        Finds the id of an address, giving new addresses the next free id.
+
+        Parameters
+        ----------
+        address : str
+            The address to intern
+
+        Returns
+        ----------
+        int
+            The id of the address
+        """
+        id = self.ids.get(address)
+        if id is None:
+            id = len(self.addresses)
+            self.ids[address] = id
+            self.addresses.append(address)
+        return id
+
+    #O(n)
+    #Where n = the number of addresses
+    def intern_many(self, addresses):
+        """
+        Finds the ids of many addresses, giving new addresses the next free ids.
+
+        Parameters
+        ----------
+        addresses : list[str]
+            The addresses to intern
+
+        Returns
+        ----------
+        list[int]
+            The id of each address
+        """
+        return [self.intern(address) for address in addresses]
+
+    #O(1)
+    def id_of(self, address):
+        """
+        Finds the id of an address that has already been interned.
+
+        Parameters
+        ----------
+        address : str
+            The address to look up
+
+        Returns
+        ----------
+        int
+            The id of the address (raises KeyError if it has not been interned)
+        """
+        return self.ids[address]
+
+    #O(1)
+    def address_of(self, id):
+        """
+        Finds the address of an id.
+
+        Parameters
+        ----------
+        id : int
+            The id to look up
+
+        Returns
+        ----------
+        str
+            The address with the given id
+        """
+        return self.addresses[id]
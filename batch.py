@@ -0,0 +1,396 @@
+"""
+batch
+
+This python file contains functions to run many delivery scenarios without the CLI.
+Scenarios are read as JSON lines and each result is written as one JSON line:
+
+        python batch.py scenarios.jsonl -o results.jsonl --workers 4
+
+Each scenario is a JSON object. Every key is optional and defaults to the WGU day run by main.py:
+
+        * id - a name echoed in the result (default = the line number)
+        * packages - the package csv file (default = 'clean_packages.csv')
+        * trucks - a list of {"number": 1, "start": "8:00"}
+        * num_loads - the number of loads to group the packages into (default = the number of
+          trips, or enough loads of MAX_LOAD_SIZE for every package if that is more)
+        * packages_needed - lists of package ids that must be in the same load
+          (null compiles them from the Special Notes column instead, and a trip that leaves
+          with a package breaking them is reported as an error)
+        * trips - a list of {"truck": 1, "load": 0, "not_before": "10:20"}, in the order each truck
+          leaves. Loads without a trip leave after the listed trips, taking turns between the trucks
+        * updates - a list of {"at": "10:20", "package": 9, "address": "410 S State St"}
+        * query_times - the times to report the status of packages and trucks at
+        * query_packages - the package ids to report (default = every package)
+        * solver - 'nearest_neighbor', 'clarke_wright', 'deadline' or 'exact' (default = 'nearest_neighbor')
+        * improve_time - the local search time budget in seconds per route (default = None)
+        * speed - the speed of every truck in miles per hour (default = 18)
+        * cache_routes - reuse routes of the same stops planned by earlier scenarios (default = true).
+          Deadline routes depend on the departure time and are never cached
+
+The distance matrix and graph are parsed once per worker process and reused for every
+scenario the worker runs, together with a RouteCache of the routes it has planned; each
+scenario gets its own hash table of packages. The day is
+simulated once per scenario and every query time is answered from the simulation's log.
+
+        * parse_clock - converts a time such as '9:05' into seconds after midnight
+        * simulate_scenario - builds the loads and trips of one scenario and simulates its day
+        * summarize - builds the miles, return times and late packages of a simulated day
+        * run_scenario - simulates one scenario and builds its result
+        * run_batch - runs every scenario of a JSON lines file on a pool of worker processes
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from constraints import compile_constraints
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from main import insert_all_packages, create_all_loads
+from package import seconds_to_time, time_to_seconds
+from read_data import create_graph_and_places, read_package_data, create_address_registry
+from route_cache import RouteCache, CachedSolver
+from route_solvers import NearestNeighborSolver, ClarkeWrightSolver, DeadlineSolver, ExactSolver
+from simulation import Simulation
+from truck import MAX_LOAD_SIZE
+
+DEFAULT_SCENARIO = {
+    'packages': 'clean_packages.csv',
+    'trucks': [{'number': 1, 'start': '8:00'}, {'number': 2, 'start': '9:05'}],
+    'packages_needed': [
+        [13, 14, 15, 16, 19, 20, 29, 30, 31, 37, 40],
+        [25, 3, 6, 18, 28, 32, 36, 38],
+        [9],
+    ],
+    'trips': [
+        {'truck': 1, 'load': 0},
+        {'truck': 2, 'load': 1},
+        {'truck': 1, 'load': 2, 'not_before': '10:20'},
+    ],
+    'updates': [{'at': '10:20', 'package': 9, 'address': '410 S State St'}],
+    'query_times': [],
+    'solver': 'nearest_neighbor',
+    'improve_time': None,
+    'speed': 18,
+    'cache_routes': True,
+}
+
+SOLVERS = {
+    'nearest_neighbor': lambda scenario: NearestNeighborSolver(scenario['improve_time']),
+    'clarke_wright': lambda scenario: ClarkeWrightSolver(),
+    'deadline': lambda scenario: DeadlineSolver(scenario['speed']),
+    'exact': lambda scenario: ExactSolver(fallback=NearestNeighborSolver(scenario['improve_time'])),
+}
+
+_worker_context = None
+
+
+#O(1)
+def parse_clock(clock_time):
+    """
+    Converts a time such as '9:05' or '13:30:15' into seconds after midnight.
+
+    Parameters
+    ----------
+    clock_time : str or int
+        A 24 hour time of day, or a number of seconds after midnight
+
+    Returns
+    ----------
+    int
+        The number of seconds after midnight
+
+    Raises
+    ----------
+    ValueError
+        If the time is not a time of day from 0:00 to 23:59:59
+    """
+    if clock_time is None or isinstance(clock_time, int):
+        return clock_time
+    parts = [int(part) for part in clock_time.split(':')]
+    if not 2 <= len(parts) <= 3:
+        raise ValueError('invalid time: ' + repr(clock_time))
+    parts += [0] * (3 - len(parts))
+    hour, minute, second = parts
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        raise ValueError('invalid time: ' + repr(clock_time))
+    return hour * 3600 + minute * 60 + second
+
+
+#O(n^2)
+#Where n = the number of nodes in the graph
+def _load_context(csv_file):
+    """
+    Parses the distance matrix and creates the graph and route cache shared by every scenario.
+    The matrix is only read, so its rows are views of the memory-mapped cache.
+    """
+    places, matrix = create_graph_and_places(csv_file, zero_copy=True)
+    return {'places': places, 'graph': Graph(places, matrix), 'packages': {}, 'routes': RouteCache()}
+
+
+#O(n^2)
+def _init_worker(csv_file):
+    """
+    Parses the distance matrix once when a worker process starts.
+    """
+    global _worker_context
+    _worker_context = _load_context(csv_file)
+
+
+#O(m + k^2)
+#Where m = the number of packages and k = the number of stops per trip
+def simulate_scenario(scenario, context, rows=None):
+    """
+    Builds the packages, loads and trips of one scenario and simulates its day.
+
+    Parameters
+    ----------
+    scenario : dict
+        The scenario, with any missing keys taken from DEFAULT_SCENARIO
+    context : dict
+        The places, graph, parsed package files and route cache shared between scenarios
+    rows : list[list[str]]
+        The package rows to deliver (default = None, the rows of the scenario's package file)
+
+    Returns
+    ----------
+    Simulation
+        The simulation after the whole day has run
+    ChainHashTable
+        The packages of the scenario
+    list[list[int]]
+        The package ids of each load
+
+    Raises
+    ----------
+    ValueError
+        If some packages are not in a load that has a trip, e.g. because num_loads is too small,
+        or if packages_needed is null and a trip leaves with a package that breaks a constraint
+        compiled from the Special Notes column
+    """
+    scenario = dict(DEFAULT_SCENARIO, **scenario)
+    if rows is None:
+        package_file = scenario['packages']
+        if package_file not in context['packages']:
+            context['packages'][package_file] = read_package_data(package_file)
+        rows = context['packages'][package_file]
+    registry = create_address_registry(context['places'], rows)
+    hash_table = ChainHashTable()
+    insert_all_packages(rows, hash_table, registry)
+    all_ids = [int(row[0]) for row in rows]
+
+    trips = list(scenario['trips'])
+    num_loads = scenario.get('num_loads') or max(len(trips), len(scenario['packages_needed'] or ()),
+                                                 -(-len(all_ids) // MAX_LOAD_SIZE))
+    constraints = None
+    if scenario['packages_needed'] is None:
+        constraints = compile_constraints(rows)
+        loads = create_all_loads(num_loads, all_ids, [], hash_table, constraints=constraints)
+    else:
+        loads = create_all_loads(num_loads, all_ids, scenario['packages_needed'], hash_table)
+
+    solver = SOLVERS[scenario['solver']](scenario)
+    if scenario['cache_routes'] and not hasattr(solver, 'solve_timed'):
+        solver = CachedSolver(solver, context['routes'])
+    simulation = Simulation(context['graph'], hash_table, solver, speed=scenario['speed'])
+    for truck in scenario['trucks']:
+        simulation.add_truck(truck['number'], parse_clock(truck['start']))
+    #loads without a trip are delivered after the listed trips, taking turns between the trucks
+    numbers = [truck['number'] for truck in scenario['trucks']]
+    planned = {trip['load'] for trip in trips}
+    for ix in [ix for ix, load in enumerate(loads) if load and ix not in planned]:
+        trips.append({'truck': numbers[len(trips) % len(numbers)], 'load': ix})
+    loaded = {package_id for trip in trips for package_id in loads[trip['load']]}
+    missing = [package_id for package_id in all_ids if package_id not in loaded]
+    if missing:
+        raise ValueError(str(len(missing)) + ' packages do not fit in ' + str(len(loads))
+                         + ' loads, e.g. package ' + str(missing[0]))
+    for trip in trips:
+        simulation.add_trip(trip['truck'], loads[trip['load']], parse_clock(trip.get('not_before')))
+    for update in scenario['updates']:
+        changes = {name: value for name, value in update.items() if name not in ('at', 'package')}
+        simulation.add_update(parse_clock(update['at']), update['package'], **changes)
+        if constraints is not None and 'address' in changes:
+            constraints.release_hold(update['package'], parse_clock(update['at']))
+    simulation.run()
+    if constraints is not None:
+        _check_trips(constraints, trips, loads, hash_table)
+    return simulation, hash_table, loads
+
+
+#O(m)
+def _check_trips(constraints, trips, loads, hash_table):
+    """
+    Raises a ValueError if a simulated trip left with a package that breaks a constraint.
+    """
+    for trip in trips:
+        load = loads[trip['load']]
+        left = [package.time_left for package in hash_table.search_many(load)
+                if package is not None and package.time_left is not None]
+        depart = time_to_seconds(min(left)) if left else None
+        violations = constraints.check_load(load, trip['truck'], depart)
+        if violations:
+            raise ValueError('load ' + str(trip['load']) + ' on truck ' + str(trip['truck'])
+                             + ' breaks the constraints of packages ' + str(violations))
+
+
+#O(m + t)
+#Where t = the number of trucks
+def summarize(simulation, hash_table, package_ids):
+    """
+    Builds the miles, return times and late packages of a simulated day.
+
+    Parameters
+    ----------
+    simulation : Simulation
+        The simulation after the whole day has run
+    hash_table : ChainHashTable
+        The packages of the simulation
+    package_ids : list[int]
+        The package ids to check for lateness
+
+    Returns
+    ----------
+    dict
+        The total miles, the return time and miles of each truck and the seconds each
+        package was delivered after its deadline (None if it was not delivered)
+    """
+    late = {}
+    for package in hash_table.search_many(package_ids):
+        lateness = package.lateness()
+        if lateness is None or lateness > 0:
+            late[str(package.id)] = lateness
+
+    trucks = simulation.trucks.values()
+    return {
+        'total_miles': round(sum(truck.mi_traveled for truck in trucks), 2),
+        'trucks': [{'number': truck.number, 'miles': round(truck.mi_traveled, 2),
+                    'returned': str(seconds_to_time(truck.time))} for truck in trucks],
+        'late': late,
+    }
+
+
+#O(m + k^2 + q * p log c)
+#Where q = the number of query times, p = the number of queried packages and c = the status changes per package
+def run_scenario(scenario, context):
+    """
+    Simulates one scenario and builds its result.
+
+    Parameters
+    ----------
+    scenario : dict
+        The scenario, with any missing keys taken from DEFAULT_SCENARIO
+    context : dict
+        The places, graph, parsed package files and route cache shared between scenarios
+
+    Returns
+    ----------
+    dict
+        The total miles, the return time and miles of each truck, the seconds each package
+        was delivered after its deadline (None if it was not delivered) and the status of
+        packages and trucks at each query time
+    """
+    scenario = dict(DEFAULT_SCENARIO, **scenario)
+    simulation, hash_table, loads = simulate_scenario(scenario, context)
+    all_ids = [int(row[0]) for row in context['packages'][scenario['packages']]]
+    result = summarize(simulation, hash_table, all_ids)
+
+    query_ids = scenario.get('query_packages') or all_ids
+    snapshots = []
+    for query_time in scenario['query_times']:
+        at = parse_clock(query_time)
+        trucks = {}
+        for number in simulation.trucks:
+            place, miles, at_hub, waiting = simulation.truck_state_at(number, at)
+            trucks[str(number)] = {'place': place, 'miles': round(miles, 2), 'at_hub': at_hub,
+                                   'waiting': waiting}
+        snapshots.append({
+            'time': str(seconds_to_time(at)),
+            'packages': {str(id): simulation.status_text_at(id, at) for id in query_ids},
+            'trucks': trucks,
+        })
+    result['snapshots'] = snapshots
+    return result
+
+
+#O(1) + the cost of run_scenario
+def _run_line(task, context=None):
+    """
+    Parses and runs one line of a scenario file. Errors are returned in the result
+    instead of raised, so one bad scenario does not stop the batch.
+    """
+    line_number, line = task
+    result = {'id': line_number}
+    try:
+        scenario = json.loads(line)
+        result['id'] = scenario.pop('id', line_number)
+        result.update(run_scenario(scenario, context or _worker_context))
+    except Exception as error:
+        result['error'] = type(error).__name__ + ': ' + str(error)
+    return result
+
+
+#O(s * (m + k^2) / w)
+#Where s = the number of scenarios and w = the number of workers
+def run_batch(in_file, out_file, csv_file='adjacencyMtrx.csv', workers=None, chunk_size=256):
+    """
+    Runs every scenario of a JSON lines file and writes one JSON line of results per scenario.
+
+    Parameters
+    ----------
+    in_file : file object
+        The scenarios, one JSON object per line. Blank lines are skipped
+    out_file : file object
+        The file the results are written to, in the order of the scenarios
+    csv_file : str
+        The adjacency matrix csv file shared by every scenario (default = 'adjacencyMtrx.csv')
+    workers : int
+        The number of worker processes (default = None, one per CPU).
+        With 0 workers the scenarios are run in this process
+    chunk_size : int
+        The number of scenarios read and sent to the workers at a time (default = 256)
+
+    Returns
+    ----------
+    int
+        The number of scenarios run
+    """
+    tasks = ((i + 1, line) for i, line in enumerate(in_file) if line.strip())
+    count = 0
+    if workers == 0:
+        context = _load_context(csv_file)
+        for task in tasks:
+            out_file.write(json.dumps(_run_line(task, context)) + '\n')
+            count += 1
+        return count
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(csv_file,)) as pool:
+        while True:
+            chunk = list(islice(tasks, chunk_size))
+            if not chunk:
+                break
+            for result in pool.map(_run_line, chunk, chunksize=max(1, len(chunk) // (4 * (workers or 8)))):
+                out_file.write(json.dumps(result) + '\n')
+            count += len(chunk)
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs delivery scenarios from a JSON lines file.')
+    parser.add_argument('scenarios', nargs='?', help='the scenario file (default = standard input)')
+    parser.add_argument('-o', '--output', help='the result file (default = standard output)')
+    parser.add_argument('-m', '--matrix', default='adjacencyMtrx.csv', help='the adjacency matrix csv file')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='the number of worker processes')
+    args = parser.parse_args()
+
+    in_file = open(args.scenarios) if args.scenarios else sys.stdin
+    out_file = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        run_batch(in_file, out_file, args.matrix, args.workers)
+    finally:
+        if args.scenarios:
+            in_file.close()
+        if args.output:
+            out_file.close()
@@ -0,0 +1,453 @@
+"""
+benchmark
+
+This python file contains functions to time the hot paths of the delivery application
+on synthetic data. It can be run directly to print the results, save them as JSON and
+compare them with the results of an earlier version:
+
+        python benchmark.py --output results.json --compare baseline.json
+
+The functions used to create synthetic data are below:
+
+        * make_graph - creates places and a random metric distance matrix
+        * make_packages - creates a number of package objects with random addresses
+
+The functions used to time the application are below:
+
+        * time_call - times a function call
+        * peak_memory - finds the peak memory allocated by a function call
+        * benchmark_hash_tables - times inserting and searching packages in each hash table
+        * benchmark_graph - times creating graphs, partial graphs and nearest neighbor searches
+        * benchmark_loads - times grouping packages into truck loads
+        * benchmark_delivery - times loading and delivering every package with trucks
+        * run_all - runs every benchmark
+
+The functions used to detect performance regressions are below:
+
+        * save_results - saves benchmark results and details of the machine as JSON
+        * compare_results - finds the benchmarks that became slower than in earlier results
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time as timer
+import tracemalloc
+from datetime import datetime, time
+from math import ceil
+
+from package import Package
+from hash_table import ChainHashTable, OpenAddressHashTable
+from graph_traversal import Graph
+from load_builder import create_clustered_loads
+from main import create_all_loads
+from truck import Truck, MAX_LOAD_SIZE
+
+HUB = '4001 South 700 East'
+
+
+#O(n^2)
+#Where n = the number of places
+def make_graph(num_places, seed=0):
+    """
+    Creates places and a random metric distance matrix.
+
+    The places are random points in a 10 by 10 mile square and the distances are the
+    straight line distances between them, so the triangle inequality holds.
+    The first place is the hub.
+
+    Parameters
+    ----------
+    num_places : int
+        The number of places to create
+    seed : int
+        The seed for the random number generator (default = 0)
+
+    Returns
+    ----------
+    list[str]
+        A list of places that are the nodes of the matrix
+    list[list[float]]
+        A 2D list representing the distance between places
+    """
+    rand = random.Random(seed)
+    points = [(rand.random() * 10, rand.random() * 10) for i in range(num_places)]
+    places = [HUB] + [str(i) + ' Synthetic St' for i in range(1, num_places)]
+    matrix = []
+    for x1, y1 in points:
+        matrix.append([((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5 for x2, y2 in points])
+    return places, matrix
+
+
+#O(n)
+def make_packages(count, seed=0, places=None):
+    """
+    Creates a number of package objects with random addresses.
+
+    Parameters
+    ----------
+    count : int
+        The number of packages to create
+    seed : int
+        The seed for the random number generator (default = 0)
+    places : list[str]
+        If given, each package is sent to one of these places other than the first (the hub),
+        and its address_id is the place's index (default = None, random street addresses)
+
+    Returns
+    ----------
+    list[Package]
+        A list of new package objects with ids 1 to count
+    """
+    rand = random.Random(seed)
+    packages = []
+    for i in range(1, count + 1):
+        if places is None:
+            packages.append(Package(i, str(rand.randrange(1, 10000)) + ' S State St', 'EOD',
+                                    'Salt Lake City', '841' + str(rand.randrange(10, 99)),
+                                    rand.randrange(1, 100)))
+            continue
+        address_id = rand.randrange(1, len(places))
+        packages.append(Package(i, places[address_id], 'EOD', 'Salt Lake City',
+                                str(84100 + address_id // 10), rand.randrange(1, 100),
+                                address_id=address_id))
+    return packages
+
+
+#O(1)
+def time_call(func, *args):
+    """
+    Times a function call.
+
+    Parameters
+    ----------
+    func : function
+        The function to time
+    args : tuple
+        The arguments to call the function with
+
+    Returns
+    ----------
+    float
+        The number of seconds the call took
+    object
+        The value returned by the call
+    """
+    start = timer.perf_counter()
+    result = func(*args)
+    return timer.perf_counter() - start, result
+
+
+#O(1)
+def peak_memory(func, *args):
+    """
+    Finds the peak memory allocated by a function call.
+
+    The call is traced with tracemalloc, which makes it slower, so it should not be
+    used for the timed call.
+
+    Parameters
+    ----------
+    func : function
+        The function to measure
+    args : tuple
+        The arguments to call the function with
+
+    Returns
+    ----------
+    int
+        The largest number of bytes allocated at once during the call
+    object
+        The value returned by the call
+    """
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+#O(n)
+def _num_places(count):
+    """
+    Picks the number of places for a number of packages, from the WGU size of 27 up to 500.
+    """
+    return min(500, max(27, count // 20))
+
+
+#O(k * n)
+#Where k = the number of sizes and n = the largest size
+def benchmark_hash_tables(sizes=(40, 1000, 10000, 100000)):
+    """
+    Times inserting and searching packages in a fixed-size, a resizing and an open addressing hash table.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The numbers of packages to time (default = (40, 1000, 10000, 100000))
+
+    Returns
+    ----------
+    list[dict]
+        One result per table type and size with the insert and search times in seconds
+        and the peak memory of inserting in bytes
+    """
+    #the fixed table is skipped for large sizes since every search walks a chain of size / 10 items
+    tables = [
+        ('chain (fixed 10 buckets)', lambda: ChainHashTable(load_factor=None), 10000),
+        ('chain (resizing)', ChainHashTable, None),
+        ('open addressing', OpenAddressHashTable, None),
+    ]
+    results = []
+    for size in sizes:
+        packages = make_packages(size)
+        ids = [package.id for package in packages]
+        for name, create, max_size in tables:
+            if max_size and size > max_size:
+                continue
+
+            def insert_all():
+                hash_table = create()
+                for package in packages:
+                    hash_table.insert(package.id, package)
+                return hash_table
+
+            def search_all():
+                for id in ids:
+                    hash_table.search(id)
+
+            insert_time, hash_table = time_call(insert_all)
+            search_time, _ = time_call(search_all)
+            peak, _ = peak_memory(insert_all)
+            results.append({'benchmark': 'hash_table', 'name': name, 'size': size,
+                            'insert_s': insert_time, 'search_s': search_time, 'peak_bytes': peak})
+    return results
+
+
+#O(k * n^2)
+#Where k = the number of sizes and n = the largest number of places
+def benchmark_graph(sizes=(27, 100, 500, 1000)):
+    """
+    Times creating a graph, creating a partial graph of half the places, finding the
+    nearest neighbor of every place and building a nearest neighbor tour of every place.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The numbers of places to time (default = (27, 100, 500, 1000))
+
+    Returns
+    ----------
+    list[dict]
+        One result per operation and size with the time in seconds and the peak memory in bytes
+    """
+    results = []
+    for size in sizes:
+        places, matrix = make_graph(size)
+        graph = Graph(places, matrix)
+        half = places[::2]
+        operations = [
+            ('Graph', lambda: Graph(places, matrix)),
+            ('create_partial_graph', lambda: graph.create_partial_graph(half)),
+            ('find_nearest_neighbor', lambda: [graph.find_nearest_neighbor(place) for place in places]),
+            ('nearest_neighbor_tour', lambda: graph.nearest_neighbor_tour(0, range(1, size))),
+        ]
+        for name, operation in operations:
+            seconds, _ = time_call(operation)
+            peak, _ = peak_memory(operation)
+            results.append({'benchmark': 'graph', 'name': name, 'size': size,
+                            'time_s': seconds, 'peak_bytes': peak})
+    return results
+
+
+#O(k * n log L + k * c_l)
+#Where L = the number of locations and c_l = the cost of create_clustered_loads
+def benchmark_loads(sizes=(40, 1000, 10000, 100000)):
+    """
+    Times grouping packages into truck loads by location (create_all_loads) and by
+    distance (create_clustered_loads).
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The numbers of packages to time (default = (40, 1000, 10000, 100000))
+
+    Returns
+    ----------
+    list[dict]
+        One result per function and size with the time in seconds and the peak memory in bytes
+    """
+    results = []
+    for size in sizes:
+        places, matrix = make_graph(_num_places(size))
+        graph = Graph(places, matrix)
+        hash_table = ChainHashTable()
+        hash_table.insert_many(make_packages(size, places=places))
+        ids = list(range(1, size + 1))
+        num_loads = ceil(size / MAX_LOAD_SIZE)
+        functions = [
+            ('create_all_loads', lambda: create_all_loads(num_loads, ids.copy(), [], hash_table)),
+            ('create_clustered_loads', lambda: create_clustered_loads(ids, hash_table, graph, HUB)),
+        ]
+        for name, function in functions:
+            seconds, _ = time_call(function)
+            peak, _ = peak_memory(function)
+            results.append({'benchmark': 'loads', 'name': name, 'size': size,
+                            'time_s': seconds, 'peak_bytes': peak})
+    return results
+
+
+#O(k * n * c^2)
+def benchmark_delivery(sizes=(40, 1000, 10000), indexed_modes=(False, True)):
+    """
+    Times loading and delivering every package with Truck.load_and_deliver, one truck per load.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The numbers of packages to time (default = (40, 1000, 10000))
+    indexed_modes : list[bool]
+        The routing modes to time, False for the partial graph routing and True for
+        indexed routing (default = (False, True))
+
+    Returns
+    ----------
+    list[dict]
+        One result per routing mode and size with the time in seconds, the peak memory in
+        bytes and the total miles traveled
+    """
+    results = []
+    for size in sizes:
+        places, matrix = make_graph(_num_places(size))
+        graph = Graph(places, matrix)
+        packages = make_packages(size, places=places)
+        ids = list(range(1, size + 1))
+        loads = [ids[i:i + MAX_LOAD_SIZE] for i in range(0, size, MAX_LOAD_SIZE)]
+        for indexed in indexed_modes:
+
+            def deliver_all():
+                hash_table = ChainHashTable()
+                hash_table.insert_many(packages)
+                trucks = [Truck(i + 1, time(8, 0, 0), indexed) for i in range(len(loads))]
+                for truck, load in zip(trucks, loads):
+                    truck.hub = HUB
+                    truck.load_and_deliver(load, hash_table, graph)
+                return sum(truck.mi_traveled for truck in trucks)
+
+            seconds, miles = time_call(deliver_all)
+            peak, _ = peak_memory(deliver_all)
+            results.append({'benchmark': 'delivery', 'name': 'indexed' if indexed else 'partial graph',
+                            'size': size, 'time_s': seconds, 'peak_bytes': peak, 'miles': miles})
+    return results
+
+
+#O(k * n^2)
+def run_all(quick=False):
+    """
+    Runs every benchmark.
+
+    Parameters
+    ----------
+    quick : bool
+        If True, only small sizes are run (default = False)
+
+    Returns
+    ----------
+    list[dict]
+        The results of every benchmark
+    """
+    if quick:
+        return (benchmark_hash_tables((40, 1000)) + benchmark_graph((27, 100))
+                + benchmark_loads((40, 1000)) + benchmark_delivery((40, 1000)))
+    return benchmark_hash_tables() + benchmark_graph() + benchmark_loads() + benchmark_delivery()
+
+
+#O(r)
+#Where r = the number of results
+def save_results(results, json_file):
+    """
+    Saves benchmark results and details of the machine as JSON.
+
+    Parameters
+    ----------
+    results : list[dict]
+        The results of the benchmarks
+    json_file : str
+        The name of the file to write
+    """
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(json_file, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+#O(r)
+def compare_results(old_results, new_results, threshold=1.25):
+    """
+    Finds the benchmarks that became slower than in earlier results.
+
+    Results are matched by their benchmark, name and size. Timings shorter than a
+    millisecond are ignored since they are mostly noise.
+
+    Parameters
+    ----------
+    old_results : list[dict]
+        The earlier results, e.g. the 'results' of a file written by save_results
+    new_results : list[dict]
+        The current results
+    threshold : float
+        The ratio of the new time to the old time above which a benchmark is slower (default = 1.25)
+
+    Returns
+    ----------
+    list[dict]
+        The benchmark, name, size, timing key, old and new times and ratio of each slower timing
+    """
+    old = {(result['benchmark'], result['name'], result['size']): result for result in old_results}
+    regressions = []
+    for result in new_results:
+        key = (result['benchmark'], result['name'], result['size'])
+        if key not in old:
+            continue
+        for name, value in result.items():
+            if not name.endswith('_s') or name not in old[key]:
+                continue
+            before = old[key][name]
+            if before >= 0.001 and value / before > threshold:
+                regressions.append({'benchmark': key[0], 'name': key[1], 'size': key[2],
+                                    'timing': name, 'old_s': before, 'new_s': value,
+                                    'ratio': value / before})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Times the hot paths of the delivery application.')
+    parser.add_argument('-o', '--output', help='saves the results as JSON to this file')
+    parser.add_argument('-c', '--compare', help='compares the results with an earlier JSON file')
+    parser.add_argument('-q', '--quick', action='store_true', help='only runs small sizes')
+    args = parser.parse_args()
+
+    results = run_all(args.quick)
+    for result in results:
+        timings = '  '.join('{} {:8.4f}s'.format(name[:-2], value)
+                            for name, value in result.items() if name.endswith('_s'))
+        print('{:<10} {:<26} n={:<7} {}  peak {:>10,} B'.format(
+            result['benchmark'], result['name'], result['size'], timings, result['peak_bytes']))
+    if args.output:
+        save_results(results, args.output)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(json.load(f)['results'], results)
+        for regression in regressions:
+            print('SLOWER: {benchmark} {name} n={size} {timing} {old_s:.4f}s -> {new_s:.4f}s '
+                  '({ratio:.2f}x)'.format(**regression))
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,381 @@
+"""
+constraints
+
+This python file contains a compiler that turns the Special Notes column of the package
+data into constraints that loading and routing code can check in O(1) per package:
+
+        * "Can only be on truck 2" - the package may only be loaded on truck 2
+        * "Delayed on flight---will not arrive to depot until 9:05 am" - the package may not
+          leave the hub before 9:05
+        * "Wrong address listed" - the package is held at the hub until its address is corrected
+        * "Must be delivered with 15, 19" - the packages must be in the same load
+
+Packages that must be delivered together are joined in a union-find. The union-find is
+fully compressed once it is compiled, so the group of a package is a single lookup.
+
+        * CoDeliveryGroups - a union-find of packages that must be in the same load
+        * PackageConstraints - the truck restrictions, release times, held packages and groups
+        * compile_constraints - parses the Special Notes of package rows into constraints
+"""
+
+import re
+
+from package import deadline_minutes
+
+TRUCK_NOTE = re.compile(r'can only be on truck\s*(\d+)', re.IGNORECASE)
+DELAYED_NOTE = re.compile(r'delayed.*until\s*(\d{1,2}:\d{2}\s*[ap]\.?m\.?)', re.IGNORECASE)
+WRONG_ADDRESS_NOTE = re.compile(r'wrong address', re.IGNORECASE)
+TOGETHER_NOTE = re.compile(r'must be delivered with\s*([\d,\s]+)', re.IGNORECASE)
+
+
+class CoDeliveryGroups:
+    """
+    This class is a union-find of packages that must be in the same load.
+
+    Attributes
+    ----------
+    parent : dict[int, int]
+        The parent of each package id in the union-find (packages without a group are left out)
+    size : dict[int, int]
+        The number of packages in the group of each root
+
+    Methods
+    -------
+    find(package_id)
+        Finds the root of a package's group
+
+    union(a, b)
+        Joins the groups of two packages
+
+    compress()
+        Points every package directly at the root of its group
+
+    members(package_id)
+        Finds the packages in the group of a package
+
+    groups()
+        Lists every group of more than one package
+    """
+
+    #O(1)
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+        self._members = None
+
+    #O(α(n)), O(1) once compressed
+    #Where n = the number of packages in groups
+    def find(self, package_id):
+        """
+        Finds the root of a package's group.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+
+        Returns
+        ----------
+        int
+            The id of the root package of the group (the package itself if it has no group)
+        """
+        parent = self.parent
+        root = package_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while package_id != root:
+            parent[package_id], package_id = root, parent[package_id]
+        return root
+
+    #O(α(n))
+    def union(self, a, b):
+        """
+        Joins the groups of two packages.
+
+        Parameters
+        ----------
+        a : int
+            The unique ID of a package
+        b : int
+            The unique ID of another package
+        """
+        for package_id in (a, b):
+            if package_id not in self.parent:
+                self.parent[package_id] = package_id
+                self.size[package_id] = 1
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size.pop(root_b)
+        self._members = None
+
+    #O(n)
+    def compress(self):
+        """
+        Points every package directly at the root of its group and lists the members of each group.
+        """
+        members = {}
+        for package_id in self.parent:
+            members.setdefault(self.find(package_id), []).append(package_id)
+        for package_ids in members.values():
+            package_ids.sort()
+        self._members = members
+
+    #O(1) once compressed
+    def members(self, package_id):
+        """
+        Finds the packages in the group of a package.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+
+        Returns
+        ----------
+        list[int]
+            The sorted ids of the packages in the group (just the package if it has no group)
+        """
+        if self._members is None:
+            self.compress()
+        return self._members.get(self.find(package_id), [package_id])
+
+    #O(1) once compressed
+    def groups(self):
+        """
+        Lists every group of more than one package.
+
+        Returns
+        ----------
+        list[list[int]]
+            The sorted ids of the packages in each group, ordered by their smallest id
+        """
+        if self._members is None:
+            self.compress()
+        return sorted(self._members.values())
+
+
+class PackageConstraints:
+    """
+    This class stores the constraints compiled from the Special Notes of packages.
+
+    Attributes
+    ----------
+    trucks : dict[int, int]
+        The only truck each restricted package may be loaded on
+    release : dict[int, int]
+        The earliest time each delayed package may leave the hub in seconds after midnight
+    held : set[int]
+        The packages that stay at the hub until their address is corrected
+    groups : CoDeliveryGroups
+        The packages that must be in the same load
+    unparsed : dict[int, str]
+        The notes that did not match any known constraint
+
+    Methods
+    -------
+    allowed(package_id, truck_num, depart)
+        Checks if a package may leave on a truck at a time
+
+    check_load(package_ids, truck_num, depart)
+        Finds the packages of a load that break a constraint
+
+    release_hold(package_id, at)
+        Lets a held package leave once its address has been corrected
+
+    needed_loads(capacity)
+        Groups the constrained packages into the loads they need
+    """
+
+    #O(1)
+    def __init__(self):
+        self.trucks = {}
+        self.release = {}
+        self.held = set()
+        self.groups = CoDeliveryGroups()
+        self.unparsed = {}
+
+    #O(1)
+    def allowed(self, package_id, truck_num=None, depart=None):
+        """
+        Checks if a package may leave on a truck at a time.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        truck_num : int
+            The id of the truck (default = None, any truck)
+        depart : int
+            The time the truck leaves the hub in seconds after midnight (default = None, any time)
+
+        Returns
+        ----------
+        bool
+            False if the package is held, restricted to another truck or not released yet
+        """
+        if package_id in self.held:
+            return False
+        if truck_num is not None and self.trucks.get(package_id, truck_num) != truck_num:
+            return False
+        if depart is not None and depart < self.release.get(package_id, depart):
+            return False
+        return True
+
+    #O(1)
+    def release_hold(self, package_id, at=None):
+        """
+        Lets a held package leave once its address has been corrected.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        at : int
+            The time the address was corrected in seconds after midnight, which becomes
+            the package's release time (default = None)
+        """
+        self.held.discard(package_id)
+        if at is not None:
+            self.release[package_id] = max(at, self.release.get(package_id, at))
+
+    #O(m)
+    #Where m = the number of packages in the load
+    def check_load(self, package_ids, truck_num=None, depart=None):
+        """
+        Finds the packages of a load that break a constraint.
+
+        A package breaks a constraint if it may not leave on the truck at the time, or if
+        another package of its group is not in the load.
+
+        Parameters
+        ----------
+        package_ids : list[int]
+            The package ids of the load
+        truck_num : int
+            The id of the truck (default = None, any truck)
+        depart : int
+            The time the truck leaves the hub in seconds after midnight (default = None, any time)
+
+        Returns
+        ----------
+        list[int]
+            The package ids that break a constraint, in the order of the load
+        """
+        in_load = {}
+        for package_id in package_ids:
+            root = self.groups.find(package_id)
+            in_load[root] = in_load.get(root, 0) + 1
+        violations = []
+        for package_id in package_ids:
+            root = self.groups.find(package_id)
+            if (not self.allowed(package_id, truck_num, depart)
+                    or in_load[root] != self.groups.size.get(root, 1)):
+                violations.append(package_id)
+        return violations
+
+    #O(m)
+    def _requirements(self, package_ids):
+        """
+        Combines the truck restrictions, release times and holds of a list of packages.
+        """
+        trucks = {self.trucks[package_id] for package_id in package_ids if package_id in self.trucks}
+        release = max([self.release.get(package_id, 0) for package_id in package_ids])
+        held = any(package_id in self.held for package_id in package_ids)
+        return trucks, release, held
+
+    #O(c^2)
+    #Where c = the number of constrained packages
+    def needed_loads(self, capacity):
+        """
+        Groups the constrained packages into the loads they need, so they can be given to
+        main.create_all_loads as its packages_need_lst.
+
+        Each group of packages that must be delivered together starts a load. Packages
+        restricted to a truck or delayed are then added to the first load they are
+        compatible with (the same truck, and held packages only with held packages) that
+        has room, so a load on truck 2 leaving at 9:05 can carry both.
+
+        Parameters
+        ----------
+        capacity : int
+            The maximum number of packages in a load
+
+        Returns
+        ----------
+        list[list[int]]
+            The package ids of each needed load
+        """
+        units = [list(group) for group in self.groups.groups()]
+        grouped = {package_id for group in units for package_id in group}
+        constrained = sorted((set(self.trucks) | set(self.release) | self.held) - grouped)
+        units += [[package_id] for package_id in constrained]
+
+        loads = []
+        requirements = []
+        for unit in units:
+            trucks, release, held = self._requirements(unit)
+            constrained_unit = bool(trucks or release or held)
+            for ix, load in enumerate(loads):
+                load_trucks, load_release, load_held = requirements[ix]
+                load_constrained = bool(load_trucks or load_release or load_held)
+                if (not constrained_unit or not load_constrained or held != load_held
+                        or len(trucks | load_trucks) > 1 or len(load) + len(unit) > capacity):
+                    continue
+                load.extend(unit)
+                requirements[ix] = (trucks | load_trucks, max(release, load_release), held)
+                break
+            else:
+                loads.append(list(unit))
+                requirements.append((trucks, release, held))
+        return loads
+
+
+#O(n)
+#Where n = the number of packages
+def compile_constraints(packages):
+    """
+    Parses the Special Notes of package rows into constraints.
+
+    Parameters
+    ----------
+    packages : list[list[str]]
+        A list of package rows as returned by read_data.read_package_data, where the
+        eighth value is the special note
+
+    Returns
+    ----------
+    PackageConstraints
+        The truck restrictions, release times, held packages and co-delivery groups
+    """
+    constraints = PackageConstraints()
+    for row in packages:
+        note = row[7].strip() if len(row) > 7 else ''
+        if not note:
+            continue
+        package_id = int(row[0])
+        matched = False
+        match = TRUCK_NOTE.search(note)
+        if match:
+            constraints.trucks[package_id] = int(match.group(1))
+            matched = True
+        match = DELAYED_NOTE.search(note)
+        if match:
+            constraints.release[package_id] = deadline_minutes(match.group(1).replace('.', '')) * 60
+            matched = True
+        if WRONG_ADDRESS_NOTE.search(note):
+            constraints.held.add(package_id)
+            matched = True
+        match = TOGETHER_NOTE.search(note)
+        if match:
+            for other in re.findall(r'\d+', match.group(1)):
+                constraints.groups.union(package_id, int(other))
+            matched = True
+        if not matched:
+            constraints.unparsed[package_id] = note
+    constraints.groups.compress()
+    return constraints
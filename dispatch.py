@@ -0,0 +1,635 @@
+"""
+dispatch
+
+This python file contains a long-running dispatch service with a small HTTP/JSON API.
+The graph, package rows and ChainHashTable are loaded once when the service starts, and
+the service only listens on the loopback interface:
+
+        python dispatch.py --port 8325
+
+A day is planned with the same scenario keys as batch.py, in an executor so status
+queries are still answered while a plan is being made. Every status query is answered
+with a binary search of the log of the last finished plan.
+
+        * POST /packages - adds a package, or a list of packages, e.g.
+          {"address": "410 S State St", "city": "Salt Lake City", "zip": "84111",
+           "deadline": "10:30 AM", "weight": 2, "notes": ""}
+        * POST /plan - plans the loads and routes of the day from a batch scenario
+        * GET /plan - the miles, return times, late packages and loads of the last plan
+        * GET /packages?at=10:00&ids=1,2 - the status of packages at a time
+        * GET /packages/<id>?at=10:00 - the status of one package at a time
+        * GET /trucks?at=10:00 - the place and miles of every truck at a time
+        * GET /trucks/progress?from=8:00&until=12:00&speedup=60 - streams every move of the
+          trucks as JSON lines, replayed speedup times faster than the day (0 = no waiting)
+
+Times are 24 hour clock times such as '9:05'; a missing time means the end of the day.
+The API is written on asyncio streams with only the standard library. Each request is
+answered on its own connection, which is closed after the response.
+
+        * DispatchService - the packages, plan and request handlers of the service
+        * run_service - starts a service and serves requests until it is stopped
+"""
+
+import argparse
+import asyncio
+import heapq
+import ipaddress
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import urlsplit, parse_qs
+
+from batch import parse_clock, _load_context, simulate_scenario, summarize
+from hash_table import ChainHashTable
+from main import insert_all_packages, create_package
+from package import format_status, seconds_to_time
+from read_data import read_package_data, create_address_registry
+from simulation import Simulation
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8325
+END_OF_DAY = 24 * 3600 - 1
+MAX_BODY_SIZE = 1 << 20
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+_worker_context = None
+
+
+class HTTPError(Exception):
+    """
+    This class is an error that is sent to the client as an HTTP status and a JSON message.
+
+    Attributes
+    ----------
+    status : int
+        The HTTP status code
+    message : str
+        The reason for the error
+    """
+
+    #O(1)
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+#O(n^2)
+#Where n = the number of nodes in the graph
+def _init_worker(csv_file):
+    """
+    Parses the distance matrix once when a planning process starts.
+    """
+    global _worker_context
+    _worker_context = _load_context(csv_file)
+
+
+#O(m + k^2)
+#Where m = the number of packages and k = the number of stops per trip
+def _plan_day(scenario, rows, context=None):
+    """
+    Plans and simulates a day in the executor. Only the summary and the logs of the
+    simulation are returned, so the graph is never sent back from a planning process.
+    """
+    simulation, hash_table, loads = simulate_scenario(scenario, context or _worker_context, rows)
+    result = summarize(simulation, hash_table, [int(row[0]) for row in rows])
+    result['loads'] = loads
+    return result, simulation.package_log, simulation.truck_log
+
+
+#O(1)
+def _check_loopback(host):
+    """
+    Raises a ValueError if a host name is not a loopback address.
+    """
+    if host == 'localhost':
+        return
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError('the dispatch service only listens on localhost, not ' + repr(host))
+
+
+#O(1)
+def _query_clock(query, name, default):
+    """
+    Reads a time of a query string in seconds after midnight, or the default if it is missing.
+    """
+    try:
+        value = parse_clock(query.get(name, [None])[0])
+    except ValueError as error:
+        raise HTTPError(400, str(error))
+    return default if value is None else value
+
+
+#O(1)
+def _query_time(query):
+    """
+    Reads the 'at' time of a query string, or the end of the day if it is missing.
+    """
+    return _query_clock(query, 'at', END_OF_DAY)
+
+
+class DispatchService:
+    """
+    This class stores the packages and plan of the dispatch service and handles its requests.
+
+    Packages are added to the service's ChainHashTable and package rows. Planning copies
+    the rows to the executor, so packages added while a plan is made are left for the
+    next plan. The statuses of packages come from the log of the last finished plan; a
+    package that was not in it is at the hub.
+
+    Attributes
+    ----------
+    context : dict
+        The places, graph and route cache loaded when the service starts
+    graph : Graph
+        The graph storing data about all addresses
+    rows : list[list[str]]
+        The package rows in the format of read_data.read_package_data
+    registry : AddressRegistry
+        The interned ids of every address
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    executor : concurrent.futures.Executor
+        The process or thread pool that plans are made on
+    plan : Simulation
+        The simulation log of the last finished plan (None before the first plan)
+    summary : dict
+        The miles, return times, late packages and loads of the last finished plan
+    version : int
+        The number of plans finished since the service started
+
+    Methods
+    -------
+    add_packages(items)
+        Adds packages from JSON objects
+
+    plan_day(scenario)
+        Plans the loads and routes of the day in the executor
+
+    package_status(package_ids, at)
+        Finds the status of packages at a time
+
+    truck_states(at)
+        Finds the place and miles of every truck at a time
+
+    truck_progress(start, until, speedup)
+        Replays every move of the trucks of the last plan
+
+    handle(reader, writer)
+        Answers one HTTP request
+
+    close()
+        Shuts down the executor
+    """
+
+    #O(n^2 + m)
+    #Where n = the number of nodes in the graph and m = the number of packages
+    def __init__(self, csv_file='adjacencyMtrx.csv', package_file='clean_packages.csv', workers=1):
+        """
+        Parameters
+        ----------
+        csv_file : str
+            The adjacency matrix csv file (default = 'adjacencyMtrx.csv')
+        package_file : str
+            The package csv file loaded at startup (default = 'clean_packages.csv', None for no packages)
+        workers : int
+            The number of planning processes (default = 1). With 0 workers plans are made
+            on a thread of this process
+        """
+        self.context = _load_context(csv_file)
+        self.graph = self.context['graph']
+        self.rows = read_package_data(package_file) if package_file else []
+        self.registry = create_address_registry(self.context['places'], self.rows)
+        self.hash_table = ChainHashTable()
+        insert_all_packages(self.rows, self.hash_table, self.registry)
+        if workers:
+            #spawned workers do not inherit the sockets of open connections, so closing a
+            #connection in this process ends it
+            self.executor = ProcessPoolExecutor(workers, mp_context=get_context('spawn'),
+                                                initializer=_init_worker, initargs=(csv_file,))
+        else:
+            self.executor = ThreadPoolExecutor(1)
+        self._local = not workers
+        self.plan = None
+        self.summary = None
+        self.version = 0
+        self._plan_lock = asyncio.Lock()
+
+    #O(p)
+    #Where p = the number of new packages
+    def add_packages(self, items):
+        """
+        Adds packages from JSON objects. Every package is checked before any is added.
+
+        Parameters
+        ----------
+        items : list[dict]
+            The packages, each with an address and optionally an id (default = the next
+            free id), city, state, zip, deadline (default = 'EOD'), weight and notes
+
+        Returns
+        ----------
+        list[int]
+            The ids of the new packages
+        """
+        next_id = max([int(row[0]) for row in self.rows], default=0) + 1
+        rows = []
+        packages = []
+        new_ids = set()
+        for item in items:
+            if not isinstance(item, dict) or 'address' not in item:
+                raise HTTPError(400, 'each package needs an address')
+            if item['address'] not in self.graph.index:
+                raise HTTPError(400, 'unknown address: ' + repr(item['address']))
+            package_id = item.get('id', next_id)
+            if not isinstance(package_id, int) or package_id < 1:
+                raise HTTPError(400, 'package ids must be positive integers')
+            if package_id in new_ids or self.hash_table.search(package_id) is not None:
+                raise HTTPError(409, 'package ' + str(package_id) + ' already exists')
+            new_ids.add(package_id)
+            next_id = max(next_id, package_id + 1)
+            row = [str(package_id), item['address'], item.get('city', ''), item.get('state', ''),
+                   str(item.get('zip', '')), item.get('deadline', 'EOD'), str(item.get('weight', 0)),
+                   item.get('notes', '')]
+            try:
+                packages.append(create_package(row, self.registry))
+            except (TypeError, ValueError) as error:
+                raise HTTPError(400, 'invalid package ' + str(package_id) + ': ' + str(error))
+            rows.append(row)
+        self.rows.extend(rows)
+        self.hash_table.insert_many(packages)
+        return [package.id for package in packages]
+
+    #O(m + k^2) in the executor
+    #Where k = the number of stops per trip
+    async def plan_day(self, scenario):
+        """
+        Plans the loads and routes of the day in the executor. Plans are made one at a time.
+
+        Parameters
+        ----------
+        scenario : dict
+            The scenario in the format of batch.py, without its packages and query keys
+
+        Returns
+        ----------
+        dict
+            The plan version, miles, return times, late packages and loads
+        """
+        if not isinstance(scenario, dict):
+            raise HTTPError(400, 'the plan must be a JSON object')
+        scenario = {name: value for name, value in scenario.items()
+                    if name not in ('id', 'packages', 'query_times', 'query_packages')}
+        loop = asyncio.get_running_loop()
+        async with self._plan_lock:
+            context = self.context if self._local else None
+            try:
+                summary, package_log, truck_log = await loop.run_in_executor(
+                    self.executor, _plan_day, scenario, list(self.rows), context)
+            except (KeyError, IndexError, TypeError, ValueError) as error:
+                raise HTTPError(400, 'invalid plan: ' + type(error).__name__ + ': ' + str(error))
+            #the planned logs are answered by a Simulation of this process's graph
+            plan = Simulation(self.graph, self.hash_table)
+            plan.package_log = package_log
+            plan.truck_log = truck_log
+            self.version += 1
+            summary['version'] = self.version
+            self.plan = plan
+            self.summary = summary
+        return summary
+
+    #O(p log c)
+    #Where p = the number of packages and c = the status changes per package
+    def package_status(self, package_ids, at):
+        """
+        Finds the status of packages at a time.
+
+        Parameters
+        ----------
+        package_ids : list[int]
+            The unique IDs of the packages
+        at : int
+            The time of the status in seconds after midnight
+
+        Returns
+        ----------
+        dict[str, dict]
+            The address, deadline, status and truck of each package
+        """
+        plan = self.plan
+        statuses = {}
+        for package_id, package in zip(package_ids, self.hash_table.search_many(package_ids)):
+            if package is None:
+                raise HTTPError(404, 'package ' + str(package_id) + ' does not exist')
+            if plan is None:
+                statuses[str(package_id)] = {'address': package.address, 'deadline': package.deadline,
+                                             'status': 'at the hub', 'truck': None}
+                continue
+            code, changed, truck_num, left_hub = plan.package_status_at(package_id, at)
+            statuses[str(package_id)] = {'address': package.address, 'deadline': package.deadline,
+                                         'status': format_status(code, changed, truck_num), 'truck': truck_num}
+        return statuses
+
+    #O(t log e)
+    #Where t = the number of trucks and e = the moves per truck
+    def truck_states(self, at):
+        """
+        Finds the place and miles of every truck at a time.
+
+        Parameters
+        ----------
+        at : int
+            The time of the states in seconds after midnight
+
+        Returns
+        ----------
+        dict[str, dict]
+            The place, miles and whether each truck is at the hub and waiting for its next trip
+        """
+        if self.plan is None:
+            raise HTTPError(409, 'no plan has been made')
+        trucks = {}
+        for number in self.plan.truck_log:
+            place, miles, at_hub, waiting = self.plan.truck_state_at(number, at)
+            trucks[str(number)] = {'place': place, 'miles': round(miles, 2), 'at_hub': at_hub,
+                                   'waiting': waiting}
+        return trucks
+
+    #O(e log t)
+    #Where e = the number of moves of all trucks
+    async def truck_progress(self, start=0, until=END_OF_DAY, speedup=0):
+        """
+        Replays every move of the trucks of the last plan in time order.
+
+        Parameters
+        ----------
+        start : int
+            The first time to replay in seconds after midnight (default = 0)
+        until : int
+            The last time to replay in seconds after midnight (default = the end of the day)
+        speedup : float
+            How many times faster than the day the moves are replayed (default = 0, no waiting)
+
+        Yields
+        ----------
+        dict
+            The time, truck, place, miles and whether the truck is at the hub and waiting after each move
+        """
+        if self.plan is None:
+            raise HTTPError(409, 'no plan has been made')
+        plan = self.plan
+        moves = heapq.merge(*[
+            [(at, number, entry) for at, entry in zip(*plan.truck_log[number])]
+            for number in sorted(plan.truck_log)
+        ])
+        last = start
+        for at, number, (node, miles, at_hub, waiting) in moves:
+            if at < start:
+                continue
+            if at > until:
+                break
+            if speedup > 0 and at > last:
+                await asyncio.sleep((at - last) / speedup)
+            last = at
+            yield {'time': str(seconds_to_time(at)), 'truck': number, 'place': self.graph.places[node],
+                   'miles': round(miles, 2), 'at_hub': at_hub, 'waiting': waiting}
+
+    #O(h + b)
+    #Where h = the size of the headers and b = the size of the body
+    async def _read_request(self, reader):
+        """
+        Reads the method, target and JSON body of an HTTP/1.1 request.
+        """
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'invalid request line')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, 'invalid Content-Length')
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, 'the body is larger than ' + str(MAX_BODY_SIZE) + ' bytes')
+        body = None
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except ValueError as error:
+                raise HTTPError(400, 'invalid JSON: ' + str(error))
+        return method.upper(), target, body
+
+    #O(1)
+    def _head(self, status, headers):
+        """
+        Builds the status line and headers of a response.
+        """
+        lines = ['HTTP/1.1 ' + str(status) + ' ' + REASONS.get(status, ''), 'Connection: close']
+        lines += [name + ': ' + value for name, value in headers]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    #O(b)
+    async def _send_json(self, writer, status, payload):
+        """
+        Sends a JSON response.
+        """
+        body = json.dumps(payload).encode()
+        writer.write(self._head(status, [('Content-Type', 'application/json'),
+                                         ('Content-Length', str(len(body)))]) + body)
+        await writer.drain()
+
+    #O(e) + the time the moves are replayed over
+    async def _send_stream(self, writer, items):
+        """
+        Sends JSON lines as a chunked response as they are produced.
+        """
+        writer.write(self._head(200, [('Content-Type', 'application/x-ndjson'),
+                                      ('Transfer-Encoding', 'chunked')]))
+        async for item in items:
+            data = (json.dumps(item) + '\n').encode()
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    #O(1) + the cost of the request
+    async def _route(self, method, target, body):
+        """
+        Runs the handler of a request. Returns a status and JSON payload, or an async
+        generator for a streamed response.
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        query = parse_qs(url.query)
+        parts = path.strip('/').split('/')
+
+        if path == '/packages':
+            if method == 'POST':
+                items = body if isinstance(body, list) else [body]
+                return 201, {'ids': self.add_packages(items)}
+            if method == 'GET':
+                if 'ids' in query:
+                    try:
+                        package_ids = [int(id) for id in query['ids'][0].split(',')]
+                    except ValueError:
+                        raise HTTPError(400, 'ids must be comma separated integers')
+                else:
+                    package_ids = [int(row[0]) for row in self.rows]
+                at = _query_time(query)
+                return 200, {'time': str(seconds_to_time(at)), 'version': self.version,
+                             'packages': self.package_status(package_ids, at)}
+        elif len(parts) == 2 and parts[0] == 'packages' and parts[1].isdigit():
+            if method == 'GET':
+                at = _query_time(query)
+                status = self.package_status([int(parts[1])], at)[parts[1]]
+                return 200, dict(status, id=int(parts[1]), time=str(seconds_to_time(at)), version=self.version)
+        elif path == '/plan':
+            if method == 'POST':
+                return 200, await self.plan_day(body if body is not None else {})
+            if method == 'GET':
+                if self.summary is None:
+                    raise HTTPError(409, 'no plan has been made')
+                return 200, self.summary
+        elif path == '/trucks':
+            if method == 'GET':
+                at = _query_time(query)
+                return 200, {'time': str(seconds_to_time(at)), 'version': self.version,
+                             'trucks': self.truck_states(at)}
+        elif path == '/trucks/progress':
+            if method == 'GET':
+                start = _query_clock(query, 'from', 0)
+                until = _query_clock(query, 'until', END_OF_DAY)
+                try:
+                    speedup = float(query.get('speedup', ['0'])[0])
+                except ValueError as error:
+                    raise HTTPError(400, str(error))
+                if self.plan is None:
+                    raise HTTPError(409, 'no plan has been made')
+                return 200, self.truck_progress(start, until, speedup)
+        else:
+            raise HTTPError(404, 'no such path: ' + path)
+        raise HTTPError(405, method + ' is not allowed on ' + path)
+
+    #O(1) + the cost of the request
+    async def handle(self, reader, writer):
+        """
+        Answers one HTTP request and closes the connection.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            The stream the request is read from
+        writer : asyncio.StreamWriter
+            The stream the response is written to
+        """
+        try:
+            try:
+                request = await self._read_request(reader)
+                if request is None:
+                    return
+                status, payload = await self._route(*request)
+            except HTTPError as error:
+                await self._send_json(writer, error.status, {'error': error.message})
+                return
+            except Exception as error:
+                await self._send_json(writer, 500, {'error': type(error).__name__ + ': ' + str(error)})
+                return
+            if isinstance(payload, dict):
+                await self._send_json(writer, status, payload)
+            else:
+                await self._send_stream(writer, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass #the client went away
+        finally:
+            writer.close()
+
+    #O(1)
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening for requests on a loopback address.
+
+        Parameters
+        ----------
+        host : str
+            The loopback address to listen on (default = '127.0.0.1')
+        port : int
+            The port to listen on, 0 for any free port (default = 8325)
+
+        Returns
+        ----------
+        asyncio.Server
+            The started server
+        """
+        _check_loopback(host)
+        return await asyncio.start_server(self.handle, host, port)
+
+    #O(1)
+    def close(self):
+        """
+        Shuts down the executor.
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+
+#O(n^2 + m) + the time it is served for
+async def run_service(host=DEFAULT_HOST, port=DEFAULT_PORT, csv_file='adjacencyMtrx.csv',
+                      package_file='clean_packages.csv', workers=1):
+    """
+    Starts a dispatch service and serves requests until it is stopped.
+
+    Parameters
+    ----------
+    host : str
+        The loopback address to listen on (default = '127.0.0.1')
+    port : int
+        The port to listen on (default = 8325)
+    csv_file : str
+        The adjacency matrix csv file (default = 'adjacencyMtrx.csv')
+    package_file : str
+        The package csv file loaded at startup (default = 'clean_packages.csv')
+    workers : int
+        The number of planning processes (default = 1)
+    """
+    service = DispatchService(csv_file, package_file, workers)
+    try:
+        server = await service.serve(host, port)
+        address = server.sockets[0].getsockname()
+        print('Dispatch service listening on http://' + address[0] + ':' + str(address[1]))
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs the dispatch service on localhost.')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='the loopback address to listen on')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='the port to listen on')
+    parser.add_argument('-m', '--matrix', default='adjacencyMtrx.csv', help='the adjacency matrix csv file')
+    parser.add_argument('--packages', default='clean_packages.csv', help='the package csv file loaded at startup')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='the number of planning processes')
+    args = parser.parse_args()
+    try:
+        _check_loopback(args.host)
+    except ValueError as error:
+        parser.error(str(error))
+
+    try:
+        asyncio.run(run_service(args.host, args.port, args.matrix, args.packages, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,302 @@
+"""
+fleet
+
+This python file contains functions to plan the routes of many truck loads at the same
+time on a pool of worker processes, and to deliver the planned routes with trucks.
+
+The distance matrix is copied once into shared memory; each worker attaches to it
+read-only when it starts, so the matrix is never pickled per task. Every load is planned
+independently and the results are returned in the order of the loads, so the plans are
+the same for any number of workers (as long as no local search time budget is used,
+since a time budget depends on the speed of the machine). The counters of the solver,
+such as ExactSolver.unproven and DeadlineSolver.late_routes, are counted in the workers'
+copies and added back to the solver that was given.
+
+        * load_stops - finds the node indexes that a load of packages must visit
+        * load_deadlines - finds the earliest deadline of a load's packages at each stop
+        * plan_routes - plans a tour for each set of stops, in parallel
+        * deliver_fleet - plans the routes for many truck loads and delivers them
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from graph_traversal import Graph
+from package import time_to_seconds
+from route_solvers import NearestNeighborSolver
+
+#The private counters of the solvers, read through properties such as ExactSolver.unproven
+COUNTERS = ('_unproven', '_late_routes')
+
+_worker_graph = None
+_worker_memory = None
+
+
+#O(n)
+#Where n = the number of nodes in the graph
+def _init_worker(memory_name, n, neighbors=None):
+    """
+    Attaches a worker process to the shared distance matrix.
+
+    Parameters
+    ----------
+    memory_name : str
+        The name of the shared memory block holding the matrix
+    n : int
+        The number of nodes in the graph
+    neighbors : list[list[int]]
+        The neighbor lists of the graph, so they are not built again (default = None)
+    """
+    global _worker_graph, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    buffer = _worker_memory.buf.cast('d')
+    matrix = [buffer[i * n:(i + 1) * n] for i in range(n)]
+    _worker_graph = Graph(list(range(n)), matrix)
+    _worker_graph.neighbors = neighbors
+
+
+#O(1)
+def _counters(solver):
+    """
+    Reads the counters of a solver and of the solvers it wraps, such as CachedSolver.solver.
+    """
+    counters = {}
+    depth = 0
+    while solver is not None:
+        for name in COUNTERS:
+            if hasattr(solver, name):
+                counters[(depth, name)] = getattr(solver, name)
+        solver = getattr(solver, 'solver', None)
+        depth += 1
+    return counters
+
+
+#O(1)
+def _add_counters(solver, counts):
+    """
+    Adds the counts of a worker's copy of a solver to the counters of the solver.
+    """
+    depth = 0
+    while solver is not None:
+        for name in COUNTERS:
+            if counts.get((depth, name)):
+                setattr(solver, name, getattr(solver, name) + counts[(depth, name)])
+        solver = getattr(solver, 'solver', None)
+        depth += 1
+
+
+#O(k^2)
+#Where k = the number of stops
+def _plan(solver, graph, hub_ix, stops, deadlines, start):
+    """
+    Plans one route, with solve_timed when there are deadlines and the solver has it.
+    """
+    if deadlines is not None and hasattr(solver, 'solve_timed'):
+        return solver.solve_timed(graph, hub_ix, stops, deadlines, start)
+    return solver.solve(graph, hub_ix, stops)
+
+
+#O(k^2)
+def _plan_task(task):
+    """
+    Plans one route in a worker process and counts what it added to the solver's counters.
+    """
+    hub_ix, stops, solver, deadlines, start = task
+    before = _counters(solver)
+    plan = _plan(solver, _worker_graph, hub_ix, stops, deadlines, start)
+    after = _counters(solver)
+    return plan, {key: after[key] - before[key] for key in after}
+
+
+#O(m)
+#Where m = the number of packages in the load
+def load_stops(package_ids, hash_table, graph):
+    """
+    Finds the node indexes that a load of packages must visit.
+
+    Parameters
+    ----------
+    package_ids : list[int]
+        The package ids of the load
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    graph : Graph
+        The graph storing data about all addresses
+
+    Returns
+    ----------
+    list[int]
+        The sorted node indexes of the packages' addresses
+    """
+    stops = set()
+    for package in hash_table.search_many(package_ids):
+        if package.address_id is not None:
+            stops.add(package.address_id)
+        else:
+            stops.add(graph.index_of(package.address))
+    return sorted(stops)
+
+
+#O(m)
+def load_deadlines(package_ids, hash_table, graph):
+    """
+    Finds the earliest deadline of the packages of a load at each stop.
+
+    Parameters
+    ----------
+    package_ids : list[int]
+        The package ids of the load
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    graph : Graph
+        The graph storing data about all addresses
+
+    Returns
+    ----------
+    dict[int, int]
+        The earliest deadline in seconds after midnight of each node index with a deadline
+    """
+    deadlines = {}
+    for package in hash_table.search_many(package_ids):
+        if package.due is None:
+            continue
+        node = package.address_id
+        if node is None:
+            node = graph.index_of(package.address)
+        due = package.due * 60
+        if due < deadlines.get(node, due + 1):
+            deadlines[node] = due
+    return deadlines
+
+
+#O(r * k^2 / w)
+#Where r = the number of routes, k = the number of stops per route and w = the number of workers
+def plan_routes(graph, hub, stop_sets, workers=None, improve_time=None, solver=None,
+                deadlines=None, starts=None):
+    """
+    Plans a tour from the hub for each set of stops, using a pool of worker processes.
+
+    Parameters
+    ----------
+    graph : Graph
+        The graph storing data about all addresses
+    hub : str
+        The address of the hub that every tour starts and ends at
+    stop_sets : list[list[int]]
+        The node indexes to visit on each route
+    workers : int
+        The number of worker processes (default = None, one per CPU).
+        With 0 workers, or a single route, the routes are planned in this process
+    improve_time : float
+        The time budget in seconds for improving each route with local search (default = None)
+    solver : object
+        The routing engine from route_solvers used for every route (default = None, nearest neighbor)
+    deadlines : list[dict[int, int]]
+        The deadline of each stop of each route in seconds after midnight, e.g. from
+        load_deadlines. Used with a solver that has solve_timed, such as DeadlineSolver
+        (default = None)
+    starts : list[int]
+        The time each route leaves the hub in seconds after midnight, given with deadlines
+        (default = None)
+
+    Returns
+    ----------
+    list[(list[int], float)]
+        For each set of stops, the stops in the order they are visited and the distance of
+        the tour including the return to the hub. Routes planned with solve_timed also have
+        the seconds each stop that is still late is reached after its deadline
+    """
+    hub_ix = graph.index_of(hub)
+    solver = solver or NearestNeighborSolver(improve_time)
+    deadlines = deadlines or [None] * len(stop_sets)
+    starts = starts or [None] * len(stop_sets)
+    tasks = [(hub_ix, sorted(set(stops)), solver, route_deadlines, start)
+             for stops, route_deadlines, start in zip(stop_sets, deadlines, starts)]
+    if workers == 0 or len(tasks) <= 1:
+        return [_plan(solver, graph, hub_ix, stops, route_deadlines, start)
+                for hub_ix, stops, _, route_deadlines, start in tasks]
+
+    n = len(graph.places)
+    memory = shared_memory.SharedMemory(create=True, size=max(8 * n * n, 8))
+    try:
+        buffer = memory.buf.cast('d')
+        for i, row in enumerate(graph.matrix):
+            buffer[i * n:(i + 1) * n] = array('d', row)
+        buffer.release()
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(memory.name, n, graph.neighbors)) as pool:
+            chunksize = max(1, len(tasks) // (4 * (workers or 8)))
+            results = list(pool.map(_plan_task, tasks, chunksize=chunksize))
+    finally:
+        memory.close()
+        memory.unlink()
+    for plan, counts in results:
+        _add_counters(solver, counts)
+    return [plan for plan, counts in results]
+
+
+#O(r * k^2 / w + p)
+#Where p = the total number of packages
+def deliver_fleet(assignments, hash_table, graph, workers=None, improve_time=None, solver=None):
+    """
+    Plans the routes of many truck loads in parallel, then delivers them in order.
+
+    Each truck's visited paths, mileage and time are updated as if the loads had been
+    delivered one after another with Truck.load_and_deliver. A solver with a solve_timed
+    method, such as DeadlineSolver, is given the deadline of each stop and the time the
+    truck leaves; since a truck's next load leaves when its previous route is delivered,
+    those routes are planned in rounds of one load per truck.
+
+    Parameters
+    ----------
+    assignments : list[(Truck, list[int])]
+        The truck and package ids of each load, in the order they are delivered.
+        The trucks must use indexed routing
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    graph : Graph
+        The graph storing data about all addresses
+    workers : int
+        The number of worker processes (default = None, one per CPU)
+    improve_time : float
+        The time budget in seconds for improving each route with local search (default = None)
+    solver : object
+        The routing engine from route_solvers used for every route (default = None, nearest neighbor)
+
+    Returns
+    ----------
+    list[(list[int], float)]
+        The planned tour and its distance for each load, and the late stops of routes
+        planned with solve_timed as in plan_routes
+    """
+    if not assignments:
+        return []
+    hub = assignments[0][0].hub
+    solver = solver or NearestNeighborSolver(improve_time)
+    stop_sets = [load_stops(package_ids, hash_table, graph) for truck, package_ids in assignments]
+    if not hasattr(solver, 'solve_timed'):
+        rounds = [list(range(len(assignments)))]
+    else:
+        rounds = []
+        trips = {}
+        for ix, (truck, package_ids) in enumerate(assignments):
+            trip = trips.get(id(truck), 0)
+            trips[id(truck)] = trip + 1
+            if trip == len(rounds):
+                rounds.append([])
+            rounds[trip].append(ix)
+
+    plans = [None] * len(assignments)
+    for ixs in rounds:
+        deadlines = starts = None
+        if hasattr(solver, 'solve_timed'):
+            deadlines = [load_deadlines(assignments[ix][1], hash_table, graph) for ix in ixs]
+            starts = [time_to_seconds(assignments[ix][0].time) for ix in ixs]
+        round_plans = plan_routes(graph, hub, [stop_sets[ix] for ix in ixs], workers, improve_time,
+                                  solver, deadlines, starts)
+        for ix, plan in zip(ixs, round_plans):
+            truck, package_ids = assignments[ix]
+            truck.load_and_deliver(package_ids, hash_table, graph, plan[0])
+            plans[ix] = plan
+    return plans
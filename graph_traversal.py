@@ -1,3 +1,13 @@
+import hashlib
+import heapq
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  #numpy is optional, the list matrix is used without it
+    np = None
+
+
 class Graph:
     """
     This class represent a fully connected weighted graph.
@@ -8,6 +18,14 @@ class Graph:
         a list of places that are the nodes of the graph
     matrix : list[list[float]]
         an adjacency matrix to represent distances of nodes
+    index : dict[str, int]
+        maps each place to its row/column in the matrix
+    array : numpy.ndarray
+        a contiguous float copy of the matrix, None unless numpy is in use
+    neighbors : list[list[int]]
+        the indexes of each node's nearest nodes, nearest first (None until they are built)
+    version : str
+        a digest of the places and matrix, e.g. for caching routes (None until it is found)
 
     Methods
     -------
@@ -16,10 +34,31 @@ class Graph:
 
     find_nearest_neighbor(start)
         finds the closest node to the given node
+
+    index_of(place)
+        finds the row/column of a place in the matrix
+
+    find_nearest_index(start_ix, candidates)
+        finds the closest candidate node to the given node index
+
+    nearest_neighbor_tour(start_ix, stops)
+        orders a set of node indexes using the nearest neighbor algorithm
+
+    find_nearest_many(sources, visited)
+        finds the closest unvisited node for many node indexes at once
+
+    build_neighbors(k)
+        finds and stores the k nearest nodes of every node
+
+    find_nearest_unvisited(start_ix, remaining)
+        finds the closest unvisited node using the stored nearest nodes first
+
+    matrix_version()
+        finds a digest of the places and matrix
     """
 
-    #O(1)
-    def __init__(self, places, matrix):
+    #O(n)
+    def __init__(self, places, matrix, use_numpy=False, num_neighbors=0):
         """
         Parameters
         ----------
@@ -27,9 +66,25 @@ class Graph:
             a list of places that are the nodes of the graph
         matrix : list[list[float]]
             an adjacency matrix to represent distances of nodes
+        use_numpy : bool
+            if True, also stores the matrix as a numpy array used for vectorized lookups
+            (default = False)
+        num_neighbors : int
+            if greater than 0, the nearest nodes of every node are built once here
+            (default = 0, see build_neighbors)
         """
         self.places = places
         self.matrix = matrix
+        self.index = {place: i for i, place in enumerate(places)}
+        self.array = None
+        self.neighbors = None
+        self.version = None
+        if use_numpy:
+            if np is None:
+                raise ImportError('numpy is required when use_numpy is True')
+            self.array = np.ascontiguousarray(matrix, dtype=np.float64)
+        if num_neighbors > 0:
+            self.build_neighbors(num_neighbors)
 
     #O((n * (n-1))/2) = O(n^2)
     #Where n = number of nodes in current graph
@@ -48,22 +103,23 @@ class Graph:
         Returns
         ----------
         2D list
-            a new adjacency matrix with the same or fewer nodes
+            a new adjacency matrix with the same or fewer nodes, whose rows and columns
+            follow the order of sub_places
         """
-        indexes = []
-        for place in sub_places:
-            indexes.append(self.places.index(place))
-        indexes.sort()
+        indexes = [self.index[place] for place in sub_places]
         new_matrix = []
-        for i, row in enumerate(self.matrix):
-            if i in indexes:
-                new_row = []
-                for ix in indexes:
-                    new_row.append(row[ix])
-                new_matrix.append(new_row)
+        for i in indexes:
+            row = self.matrix[i]
+            new_matrix.append([row[ix] for ix in indexes])
         if inplace:
             self.matrix = new_matrix
             self.places = sub_places
+            self.index = {place: i for i, place in enumerate(sub_places)}
+            self.version = None
+            if self.array is not None:
+                self.array = np.ascontiguousarray(new_matrix, dtype=np.float64)
+            if self.neighbors is not None:
+                self.build_neighbors(max([len(row) for row in self.neighbors], default=0))
         return new_matrix
 
     #O(n)
@@ -83,11 +139,243 @@ class Graph:
         float
             The distance between the nodes
         """
-        start_ix = self.places.index(start)
-        min = 100
+        start_ix = self.index[start]
+        if self.array is not None:
+            row = self.array[start_ix]
+            ix = int(np.where(row != 0, row, np.inf).argmin())
+            return self.places[ix], float(row[ix])
+        min = float('inf')
         ix = None
         for i, dist in enumerate(self.matrix[start_ix]):
             if dist < min and dist != 0:
                 min = dist
                 ix = i
-        return self.places[ix], min
\ No newline at end of file
+        return self.places[ix], min
+
+    #O(1)
+    def index_of(self, place):
+        """
+        Finds the row/column of a place in the adjacency matrix.
+
+        Parameters
+        ----------
+        place : str
+            The name of the place
+
+        Returns
+        ----------
+        int
+            The index of the place in the matrix
+        """
+        return self.index[place]
+
+    #O(k)
+    #Where k = the number of candidates
+    def find_nearest_index(self, start_ix, candidates):
+        """
+        Finds the nearest candidate node of a given node without building a subgraph.
+
+        Only the row of the starting node is read, so the matrix is never copied.
+
+        Parameters
+        ----------
+        start_ix : int
+            The index of the starting node
+        candidates : list[int]
+            The indexes of the nodes that have not been visited yet
+
+        Returns
+        ----------
+        int
+            The position in candidates of the nearest node (None if there are no candidates)
+        float
+            The distance between the nodes
+        """
+        if self.array is not None and len(candidates) > 0:
+            dists = self.array[start_ix, candidates]
+            best = int(dists.argmin())
+            return best, float(dists[best])
+        row = self.matrix[start_ix]
+        best = None
+        min = float('inf')
+        for pos, ix in enumerate(candidates):
+            dist = row[ix]
+            if dist < min:
+                min = dist
+                best = pos
+        return best, min
+
+    #O(k^2)
+    #Where k = the number of stops (close to O(k * m) with neighbor lists of m nodes)
+    def nearest_neighbor_tour(self, start_ix, stops):
+        """
+        Orders a set of stops with the nearest neighbor algorithm over the full matrix.
+
+        If the neighbor lists have been built, each step checks the current node's list
+        first and only scans the remaining stops when all of them have been visited.
+
+        Parameters
+        ----------
+        start_ix : int
+            The index of the node the tour starts from
+        stops : list[int]
+            The indexes of the nodes to visit
+
+        Returns
+        ----------
+        list[int]
+            The indexes of the stops in the order they are visited
+        float
+            The distance of the tour, excluding the return to the starting node
+        """
+        tour = []
+        total = 0
+        curr_ix = start_ix
+        if self.neighbors is not None:
+            remaining = set(stops) - {start_ix}
+            while remaining:
+                curr_ix, dist = self.find_nearest_unvisited(curr_ix, remaining)
+                remaining.remove(curr_ix)
+                tour.append(curr_ix)
+                total += dist
+            return tour, total
+        #sorted so that ties are broken by the lowest index
+        remaining = sorted(set(stops) - {start_ix})
+        while remaining:
+            pos, dist = self.find_nearest_index(curr_ix, remaining)  # O(k)
+            curr_ix = remaining.pop(pos)  # O(k)
+            tour.append(curr_ix)
+            total += dist
+        return tour, total
+
+    #O(k * n)
+    #Where k = the number of sources and n = number of nodes in the graph
+    def find_nearest_many(self, sources, visited=()):
+        """
+        Finds the nearest unvisited node for many starting nodes in one call.
+
+        With numpy the whole batch is a single masked argmin over the source rows.
+
+        Parameters
+        ----------
+        sources : list[int]
+            The indexes of the starting nodes
+        visited : list[int]
+            The indexes of nodes that may not be chosen (default = ())
+
+        Returns
+        ----------
+        list[int]
+            The index of the nearest node for each source (None if every node is visited)
+        list[float]
+            The distance to the nearest node for each source
+        """
+        if self.array is not None:
+            sources = np.asarray(sources, dtype=np.intp)
+            dists = self.array[sources]  # copy of the source rows
+            dists[:, np.asarray(list(visited), dtype=np.intp)] = np.inf
+            dists[np.arange(len(sources)), sources] = np.inf
+            nearest = dists.argmin(axis=1)
+            mins = dists[np.arange(len(sources)), nearest]
+            return ([int(ix) if dist != np.inf else None for ix, dist in zip(nearest, mins)],
+                    mins.tolist())
+        visited = set(visited)
+        candidates = [ix for ix in range(len(self.places)) if ix not in visited]
+        nearest = []
+        mins = []
+        for start_ix in sources:
+            others = [ix for ix in candidates if ix != start_ix]
+            pos, dist = self.find_nearest_index(start_ix, others)  # O(n)
+            nearest.append(None if pos is None else others[pos])
+            mins.append(dist)
+        return nearest, mins
+
+    #O(n^2 log k)
+    #Where n = number of nodes in the graph and k = the number of neighbors
+    def build_neighbors(self, k=8):
+        """
+        Finds the k nearest nodes of every node and stores them in neighbors.
+
+        Nodes at the same distance are ordered by their index, so the first unvisited node
+        of a list is the node a full scan of the row would choose.
+
+        Parameters
+        ----------
+        k : int
+            The number of neighbors to store per node (default = 8)
+
+        Returns
+        ----------
+        list[list[int]]
+            The indexes of each node's nearest nodes, nearest first
+        """
+        n = len(self.places)
+        k = min(k, n - 1)
+        neighbors = []
+        if self.array is not None:
+            order = np.argsort(self.array, axis=1, kind='stable')[:, :k + 1]
+            for ix, row in enumerate(order.tolist()):
+                neighbors.append([other for other in row if other != ix][:k])
+        else:
+            for ix, row in enumerate(self.matrix):
+                others = (other for other in range(n) if other != ix)
+                neighbors.append(heapq.nsmallest(k, others, key=lambda other: (row[other], other)))
+        self.neighbors = neighbors
+        return neighbors
+
+    #O(m) when a neighbor is unvisited, O(r) otherwise
+    #Where m = the number of neighbors per node and r = the number of remaining nodes
+    def find_nearest_unvisited(self, start_ix, remaining):
+        """
+        Finds the nearest unvisited node, checking the neighbor list of the node first.
+
+        The remaining nodes are only scanned when every node on the list has been visited
+        (or the neighbor lists have not been built).
+
+        Parameters
+        ----------
+        start_ix : int
+            The index of the starting node
+        remaining : set[int]
+            The indexes of the nodes that have not been visited yet
+
+        Returns
+        ----------
+        int
+            The index of the nearest node (None if no nodes remain)
+        float
+            The distance between the nodes
+        """
+        row = self.matrix[start_ix]
+        if self.neighbors is not None:
+            for ix in self.neighbors[start_ix]:
+                if ix in remaining:
+                    return ix, row[ix]
+        best = None
+        min = float('inf')
+        for ix in remaining:
+            dist = row[ix]
+            if dist < min or (dist == min and best is not None and ix < best):
+                min = dist
+                best = ix
+        return best, min
+
+    #O(n^2)
+    def matrix_version(self):
+        """
+        Finds a digest of the places and matrix. It is found once and stored in version,
+        which create_partial_graph clears when it changes the matrix in place. Code that
+        changes distances in the matrix directly must set version to None.
+
+        Returns
+        ----------
+        str
+            A hex digest that changes whenever a place or distance changes
+        """
+        if self.version is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update('\n'.join(map(str, self.places)).encode('utf-8'))
+            for row in self.matrix:
+                digest.update(array('d', row).tobytes())
+            self.version = digest.hexdigest()
+        return self.version
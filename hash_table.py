@@ -1,7 +1,15 @@
+from array import array
+
+from package import PackageStatus, time_to_seconds
+
+
 class ChainHashTable:
     """
     This class is a hash table used to store package data.
 
+    The table doubles its number of buckets and rehashes its items whenever the
+    number of items per bucket passes the load factor, so chains stay short.
+
     Attributes
     ----------
     table : list[list[package obj]
@@ -10,6 +18,11 @@ class ChainHashTable:
         The hash function for the hash table
     buckets : int
         The number of buckets in the hash table (default is 10)
+    load_factor : float
+        The maximum average number of items per bucket before the table grows
+        (default is 0.75, None never grows)
+    count : int
+        The number of items in the hash table
 
     Methods
     -------
@@ -27,22 +40,65 @@ class ChainHashTable:
 
     display(key)
         Displays information about one or all packages
+
+    resize(buckets)
+        Rehashes all items into a new number of buckets
+
+    insert_many(items)
+        Inserts many package objects after presizing the hash table
+
+    search_many(keys)
+        Searches for many package objects in one pass
+
+    deliver_many(keys, time, truck_num)
+        Changes many package objects' statuses to delivered in one pass
     """
 
-    #O(1)
-    def __init__(self, buckets=10):
+    #O(b)
+    #Where b = the number of buckets
+    def __init__(self, buckets=10, load_factor=0.75):
         """
         Parameters
         ----------
         buckets : int
             The number of buckets for the hash table
+        load_factor : float
+            The maximum average number of items per bucket before the table grows (None never grows)
+
+        Raises
+        ----------
+        ValueError
+            If the load factor is not None or above 0
         """
+        if load_factor is not None and not 0 < load_factor:
+            raise ValueError('load_factor must be above 0 or None, not ' + repr(load_factor))
         self.table = []
-        self.hash = lambda x: x % buckets
+        self.buckets = buckets
+        self.load_factor = load_factor
+        self.count = 0
+        self.hash = lambda x: x % self.buckets
         for n in range(buckets):
             self.table.append([])
 
-    #O(1)
+    #O(n)
+    #Where n = the number of items in the hash table
+    def resize(self, buckets):
+        """
+        Rehashes all items into a new number of buckets.
+
+        Parameters
+        ----------
+        buckets : int
+            The new number of buckets
+        """
+        old_table = self.table
+        self.table = [[] for n in range(buckets)]
+        self.buckets = buckets
+        for bucket in old_table:
+            for item in bucket:
+                self.table[self.hash(item.id)].append(item)
+
+    #O(1) amortized
     def insert(self, key, item):
         """
         Inserts a new package object into the hash table.
@@ -57,8 +113,11 @@ class ChainHashTable:
         """
         table_ix = self.hash(key)
         self.table[table_ix].append(item)
+        self.count += 1
+        if self.load_factor is not None and self.count > self.load_factor * self.buckets:
+            self.resize(self.buckets * 2) #O(n), amortized over the inserts since the last resize
 
-    #O(n)
+    #O(1) average
     def search(self, key):
         """
         Searches for a package object in the hash table.
@@ -79,7 +138,7 @@ class ChainHashTable:
                 return item
         return
 
-    #O(n)
+    #O(1) average
     def remove(self, key):
         """
         Removes a package object from the hash table.
@@ -90,11 +149,12 @@ class ChainHashTable:
             The unique key of the package object
         """
         table_ix = self.hash(int(key))
-        item = self.search(key) #O(n)
+        item = self.search(key) #O(1) average
         if item:
             self.table[table_ix].remove(item)
+            self.count -= 1
 
-    #O(n)
+    #O(1) average
     def deliver(self, key, time, truck_num):
         """
         Represents a package object being delivered and changes its status.
@@ -110,9 +170,83 @@ class ChainHashTable:
         truck_num : int
             The id of the truck that delivered the package
         """
-        item = self.search(key) #O(n)
+        item = self.search(key) #O(1) average
         if item:
-            item.status = "delivered at " + str(time) + ' (Truck ' + str(truck_num) + ')'
+            item.mark_delivered(time_to_seconds(time), truck_num)
+
+    #O(n)
+    #Where n = the number of items inserted
+    def insert_many(self, items):
+        """
+        Inserts many package objects, growing the hash table once beforehand.
+
+        Parameters
+        ----------
+        items : list[Package]
+            The new package objects to be inserted, keyed by their ids
+        """
+        items = list(items)
+        if self.load_factor is not None:
+            needed = self.buckets
+            while self.count + len(items) > self.load_factor * needed:
+                needed *= 2
+            if needed != self.buckets:
+                self.resize(needed)
+        table = self.table
+        buckets = self.buckets
+        for item in items:
+            table[item.id % buckets].append(item)
+        self.count += len(items)
+
+    #O(k) average
+    #Where k = the number of keys
+    def search_many(self, keys):
+        """
+        Searches for many package objects in one pass.
+
+        Parameters
+        ----------
+        keys : list[int]
+            The unique keys of the package objects
+
+        Returns
+        ----------
+        list[Package]
+            The package object matching each key (None if a key is not found)
+        """
+        table = self.table
+        buckets = self.buckets
+        items = []
+        for key in keys:
+            found = None
+            for item in table[key % buckets]:
+                if item.id == key:
+                    found = item
+                    break
+            items.append(found)
+        return items
+
+    #O(k) average
+    #Where k = the number of keys
+    def deliver_many(self, keys, time, truck_num):
+        """
+        Represents many package objects being delivered together and changes their statuses.
+
+        Parameters
+        ----------
+        keys : list[int]
+            The unique keys of the package objects
+
+        time : datetime.time
+            The time that the packages were delivered
+
+        truck_num : int
+            The id of the truck that delivered the packages
+        """
+        seconds = time_to_seconds(time)
+        for item in self.search_many(keys):
+            if item:
+                item.mark_delivered(seconds, truck_num)
 
     #O(n)
     #Where n = the number of items in the hash table
@@ -133,11 +267,255 @@ class ChainHashTable:
                 time = item.time_left
                 if item.id < 10: #improves formatting for single digit ids
                     tab1 += '\t'
-                if 'delivered' not in item.status: #improves formatting for shorter statuses
+                if item.status_code != PackageStatus.DELIVERED: #improves formatting for shorter statuses
                     tab2 += '\t\t'
-                    if item.status == 'at the hub': #adds more tabs for the shortest status
+                    if item.status_code == PackageStatus.AT_HUB: #adds more tabs for the shortest status
                         tab2 += '\t'
                 if not time: #if the package has not left the hub
                     time = 'N/A'
                 print('Package ID: ', item.id, tab1 + 'Delivery Status: ', item.status,
-                      tab2 + 'Time Left Hub:', time)
\ No newline at end of file
+                      tab2 + 'Time Left Hub:', time)
+
+
+class OpenAddressHashTable(ChainHashTable):
+    """
+    This class is an open addressing hash table used to store package data.
+
+    Keys are stored in a compact integer array and collisions are resolved with
+    linear probing, so no per-bucket lists are allocated. The capacity is always a
+    power of two and doubles when the load factor is passed.
+
+    Attributes
+    ----------
+    keys : array[int]
+        The key stored in each slot
+    states : array[int]
+        Whether each slot is empty (0), used (1) or deleted (2)
+    values : list[package obj]
+        The package object stored in each slot
+    capacity : int
+        The number of slots in the hash table
+    load_factor : float
+        The maximum fraction of used and deleted slots before the table grows (default is 0.5)
+    count : int
+        The number of items in the hash table
+
+    Methods
+    -------
+    insert(key, item)
+        Inserts a new package object into the hash table
+
+    search(key)
+        Searches for a package object in the hash table
+
+    remove(key)
+        Removes a package object from the hash table
+
+    deliver(key)
+        Changes a package object's status to True
+
+    display(key)
+        Displays information about one or all packages
+
+    resize(capacity)
+        Rehashes all items into a new number of slots
+
+    insert_many(items)
+        Inserts many package objects after presizing the hash table
+
+    search_many(keys)
+        Searches for many package objects in one pass
+
+    deliver_many(keys, time, truck_num)
+        Changes many package objects' statuses to delivered in one pass
+    """
+    EMPTY, USED, DELETED = 0, 1, 2
+
+    #O(c)
+    #Where c = the capacity
+    def __init__(self, capacity=16, load_factor=0.5):
+        """
+        Parameters
+        ----------
+        capacity : int
+            The initial number of slots, rounded up to a power of two
+        load_factor : float
+            The maximum fraction of used and deleted slots before the table grows
+
+        Raises
+        ----------
+        ValueError
+            If the load factor is not between 0 and 1
+        """
+        if not 0 < load_factor < 1:
+            raise ValueError('load_factor must be between 0 and 1, not ' + repr(load_factor))
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.capacity = size
+        self.load_factor = load_factor
+        self.count = 0
+        self.filled = 0 #used and deleted slots
+        self.keys = array('q', [0]) * size
+        self.states = array('b', [self.EMPTY]) * size
+        self.values = [None] * size
+
+    #O(1) average
+    def _probe(self, key):
+        """
+        Finds the slot of a key, or the slot where it should be inserted.
+
+        Parameters
+        ----------
+        key : int
+            The unique key of the package object
+
+        Returns
+        ----------
+        int
+            The slot holding the key, or None if the key is not in the table
+        int
+            The first free slot on the key's probe sequence
+        """
+        mask = self.capacity - 1
+        ix = key & mask
+        free = None
+        while True:
+            state = self.states[ix]
+            if state == self.EMPTY:
+                return None, (ix if free is None else free)
+            if state == self.USED and self.keys[ix] == key:
+                return ix, free
+            if state == self.DELETED and free is None:
+                free = ix
+            ix = (ix + 1) & mask
+
+    #O(n)
+    #Where n = the number of items in the hash table
+    def resize(self, capacity):
+        """
+        Rehashes all items into a new number of slots.
+
+        Parameters
+        ----------
+        capacity : int
+            The new number of slots (a power of two)
+        """
+        old_keys, old_states, old_values = self.keys, self.states, self.values
+        self.capacity = capacity
+        self.keys = array('q', [0]) * capacity
+        self.states = array('b', [self.EMPTY]) * capacity
+        self.values = [None] * capacity
+        self.count = 0
+        self.filled = 0
+        for ix, state in enumerate(old_states):
+            if state == self.USED:
+                self.insert(old_keys[ix], old_values[ix])
+
+    #O(1) amortized
+    def insert(self, key, item):
+        """
+        Inserts a new package object into the hash table, replacing any item with the same key.
+
+        Parameters
+        ----------
+        key : int
+            The unique key of the package object
+
+        item: Package
+            The new package object to be inserted
+        """
+        ix, free = self._probe(key)
+        if ix is not None:
+            self.values[ix] = item
+            return
+        if self.states[free] == self.EMPTY:
+            self.filled += 1
+        self.keys[free] = key
+        self.states[free] = self.USED
+        self.values[free] = item
+        self.count += 1
+        if self.filled > self.load_factor * self.capacity:
+            #only grow if the slots are mostly used, otherwise rehashing clears the deleted slots
+            if self.count * 2 > self.filled:
+                self.resize(self.capacity * 2) #O(n), amortized over the inserts since the last resize
+            else:
+                self.resize(self.capacity)
+
+    #O(1) average
+    def search(self, key):
+        """
+        Searches for a package object in the hash table.
+
+        Parameters
+        ----------
+        key : int
+            The unique key of the package object
+
+        Returns
+        ----------
+        Package
+            The package object that matches the unique key
+        """
+        ix, free = self._probe(key)
+        if ix is not None:
+            return self.values[ix]
+        return
+
+    #O(1) average
+    def remove(self, key):
+        """
+        Removes a package object from the hash table.
+
+        Parameters
+        ----------
+        key : int
+            The unique key of the package object
+        """
+        ix, free = self._probe(int(key))
+        if ix is not None:
+            self.states[ix] = self.DELETED
+            self.values[ix] = None
+            self.count -= 1
+
+    #O(n)
+    #Where n = the number of items inserted
+    def insert_many(self, items):
+        """
+        Inserts many package objects, growing the hash table once beforehand.
+
+        Parameters
+        ----------
+        items : list[Package]
+            The new package objects to be inserted, keyed by their ids
+        """
+        items = list(items)
+        needed = self.capacity
+        while self.filled + len(items) > self.load_factor * needed:
+            needed *= 2
+        if needed != self.capacity:
+            self.resize(needed)
+        for item in items:
+            self.insert(item.id, item)
+
+    #O(k) average
+    #Where k = the number of keys
+    def search_many(self, keys):
+        """
+        Searches for many package objects in one pass.
+
+        Parameters
+        ----------
+        keys : list[int]
+            The unique keys of the package objects
+
+        Returns
+        ----------
+        list[Package]
+            The package object matching each key (None if a key is not found)
+        """
+        items = []
+        for key in keys:
+            ix, free = self._probe(key)
+            items.append(self.values[ix] if ix is not None else None)
+        return items
@@ -0,0 +1,250 @@
+"""
+instrumentation
+
+This python file contains opt-in instrumentation of the hot paths of the delivery application.
+
+While instrumentation is enabled, the instrumented methods are replaced on their classes
+by wrappers that record the number of calls, the cumulative time and the net number of
+memory blocks allocated by each call. Disabling it puts the original methods back, so the
+application runs its normal code with no overhead when instrumentation is off.
+
+        with Instrumentation() as stats:
+            truck.load_and_deliver(load, package_hash, address_graph)
+        stats.display()
+
+The default instrumented methods are Graph.find_nearest_neighbor, Graph.create_partial_graph,
+ChainHashTable.search, ChainHashTable.search_many and Truck.update_cargo. The recorded calls
+can be written as collapsed stacks for flame graph tools, and profile_call writes a full
+cProfile dump that can be read with pstats, snakeviz or flameprof.
+
+        * Instrumentation - records call counts, time and allocations of instrumented methods
+        * profile_call - runs a function under cProfile
+"""
+
+import cProfile
+import pstats
+import sys
+from time import perf_counter
+
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from truck import Truck
+
+CLASSES = {'Graph': Graph, 'ChainHashTable': ChainHashTable, 'Truck': Truck}
+DEFAULT_TARGETS = (
+    'Graph.find_nearest_neighbor',
+    'Graph.create_partial_graph',
+    'ChainHashTable.search',
+    'ChainHashTable.search_many',
+    'Truck.update_cargo',
+)
+
+#sys.getallocatedblocks is specific to CPython
+_allocated_blocks = getattr(sys, 'getallocatedblocks', lambda: 0)
+
+
+class Instrumentation:
+    """
+    This class records call counts, cumulative time and allocations of instrumented methods.
+
+    Attributes
+    ----------
+    targets : list[str]
+        The instrumented methods as 'Class.method' names of classes in CLASSES
+    stats : dict[str, list]
+        The number of calls, cumulative seconds and net allocated memory blocks of each method
+    stacks : dict[str, float]
+        The seconds spent in each method itself (without instrumented methods it called)
+        by the ';' separated stack of instrumented methods that led to it
+    enabled : bool
+        Whether the instrumented methods are currently replaced by wrappers
+
+    Methods
+    -------
+    enable()
+        Replaces the instrumented methods with recording wrappers
+
+    disable()
+        Puts the original methods back
+
+    reset()
+        Clears the recorded statistics
+
+    summary()
+        Builds the statistics of each method, slowest first
+
+    display()
+        Displays the statistics of each method
+
+    write_collapsed(out_file)
+        Writes the recorded stacks in the collapsed format used by flame graph tools
+    """
+
+    #O(1)
+    def __init__(self, targets=DEFAULT_TARGETS):
+        """
+        Parameters
+        ----------
+        targets : list[str]
+            The methods to instrument as 'Class.method' names (default = DEFAULT_TARGETS)
+        """
+        self.targets = list(targets)
+        self.stats = {}
+        self.stacks = {}
+        self.enabled = False
+        self._originals = {}
+        self._stack = []
+
+    #O(1)
+    def __enter__(self):
+        self.enable()
+        return self
+
+    #O(1)
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    #O(1)
+    def _wrap(self, name, method):
+        """
+        Creates a wrapper that records the calls of a method.
+        """
+        stats = self.stats.setdefault(name, [0, 0.0, 0])
+        stacks = self.stacks
+        stack = self._stack
+
+        def wrapper(*args, **kwargs):
+            #each frame is [name, seconds spent in instrumented methods it called]
+            frame = [name, 0.0]
+            stack.append(frame)
+            blocks = _allocated_blocks()
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += _allocated_blocks() - blocks
+                key = ';'.join(caller[0] for caller in stack)
+                stacks[key] = stacks.get(key, 0.0) + elapsed - frame[1]
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+
+        wrapper.__name__ = method.__name__
+        wrapper.__doc__ = method.__doc__
+        wrapper.__wrapped__ = method
+        return wrapper
+
+    #O(t)
+    #Where t = the number of targets
+    def enable(self):
+        """
+        Replaces the instrumented methods with recording wrappers.
+        """
+        if self.enabled:
+            return
+        for name in self.targets:
+            class_name, method_name = name.split('.')
+            owner = CLASSES[class_name]
+            method = owner.__dict__[method_name]
+            self._originals[name] = (owner, method_name, method)
+            setattr(owner, method_name, self._wrap(name, method))
+        self.enabled = True
+
+    #O(t)
+    def disable(self):
+        """
+        Puts the original methods back.
+        """
+        for owner, method_name, method in self._originals.values():
+            setattr(owner, method_name, method)
+        self._originals = {}
+        self._stack.clear()
+        self.enabled = False
+
+    #O(1)
+    def reset(self):
+        """
+        Clears the recorded statistics.
+        """
+        for stats in self.stats.values():
+            stats[:] = [0, 0.0, 0]
+        self.stacks.clear()
+
+    #O(t log t)
+    def summary(self):
+        """
+        Builds the statistics of each instrumented method, slowest first.
+
+        Returns
+        ----------
+        list[dict]
+            The name, number of calls, cumulative seconds, seconds per call and net
+            allocated memory blocks of each method that was called
+        """
+        rows = []
+        for name, (calls, seconds, blocks) in self.stats.items():
+            if calls:
+                rows.append({'name': name, 'calls': calls, 'time_s': seconds,
+                             'per_call_s': seconds / calls, 'blocks': blocks})
+        rows.sort(key=lambda row: row['time_s'], reverse=True)
+        return rows
+
+    #O(t log t)
+    def display(self):
+        """
+        Displays the statistics of each instrumented method, slowest first.
+        """
+        print('================================================================')
+        print('{:<30}{:>9}{:>11}{:>11}{:>9}'.format('Method', 'Calls', 'Total s', 'Per call', 'Blocks'))
+        print('================================================================')
+        for row in self.summary():
+            print('{name:<30}{calls:>9}{time_s:>11.4f}{per_call_s:>11.2e}{blocks:>9}'.format(**row))
+
+    #O(s)
+    #Where s = the number of distinct stacks
+    def write_collapsed(self, out_file):
+        """
+        Writes the recorded stacks in the collapsed format read by flamegraph.pl and speedscope.
+
+        Each line is a ';' separated stack of instrumented methods and the microseconds
+        spent in the last method of the stack itself.
+
+        Parameters
+        ----------
+        out_file : file object
+            The file to write to
+        """
+        for stack, seconds in sorted(self.stacks.items()):
+            out_file.write(stack + ' ' + str(round(seconds * 1e6)) + '\n')
+
+
+#O(1) + the cost of the call
+def profile_call(func, *args, dump_file=None):
+    """
+    Runs a function under cProfile.
+
+    Parameters
+    ----------
+    func : function
+        The function to profile
+    args : tuple
+        The arguments to call the function with
+    dump_file : str
+        If given, the profile is saved to this file in the binary format read by pstats,
+        snakeviz and flameprof (default = None)
+
+    Returns
+    ----------
+    object
+        The value returned by the call
+    pstats.Stats
+        The profile of the call
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    if dump_file is not None:
+        profiler.dump_stats(dump_file)
+    return result, pstats.Stats(profiler)
@@ -0,0 +1,279 @@
+"""
+load_builder
+
+This python file contains functions that group packages into truck loads by how close
+their addresses are in the distance matrix, instead of by matching addresses and zip codes.
+
+Packages are grouped by their destination (a stop), and stops are clustered with a
+capacitated k-medoids method:
+
+        1. The number of loads is the smallest number that fits every package.
+        2. Each load starts from a seed stop; seeds are spread out by picking the stop
+           farthest from the hub and the seeds chosen so far.
+        3. Stops are assigned to their nearest seed that still has room, closest stops first.
+        4. Each seed moves to the medoid of its load and the assignment is repeated until
+           the seeds stop moving.
+
+With s stops, p packages and k loads one iteration costs O(p + s * k + k * c^2)
+where c is the number of stops in a load, so it does not grow with the square of the
+number of packages.
+
+        * group_by_stop - groups package ids by the node index of their address
+        * create_clustered_loads - groups packages into compact loads under a truck capacity
+        * create_savings_loads - groups and routes packages with the Clarke-Wright savings algorithm
+"""
+
+import heapq
+from math import ceil
+
+from route_solvers import ClarkeWrightSolver
+from truck import MAX_LOAD_SIZE
+
+
+#O(p)
+#Where p = the number of packages
+def group_by_stop(package_ids, hash_table, graph):
+    """
+    Groups package ids by the node index of their address.
+
+    Parameters
+    ----------
+    package_ids : list[int]
+        The package ids to group
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    graph : Graph
+        The graph storing data about all addresses
+
+    Returns
+    ----------
+    dict[int, list[int]]
+        The package ids at each node index, in the order they were given
+    """
+    stops = {}
+    for package in hash_table.search_many(package_ids):
+        node = package.address_id
+        if node is None:
+            node = graph.index_of(package.address)
+        stops.setdefault(node, []).append(package.id)
+    return stops
+
+
+#O(c^2)
+#Where c = the number of stops in the load
+def _medoid(matrix, members, weights):
+    """
+    Finds the stop of a load with the smallest weighted distance to the load's other stops.
+    """
+    best = None
+    best_cost = float('inf')
+    for node in members:
+        row = matrix[node]
+        cost = 0
+        for other in members:
+            cost += row[other] * weights[other]
+        if cost < best_cost or (cost == best_cost and node < best):
+            best = node
+            best_cost = cost
+    return best
+
+
+#O(s * k)
+#Where s = the number of stops and k = the number of seeds
+def _spread_seeds(matrix, hub_ix, nodes, seeds, count):
+    """
+    Adds seeds until there are count of them, each time picking the stop farthest from
+    the hub and the existing seeds.
+    """
+    seeds = list(seeds)
+    nearest = {}
+    for node in nodes:
+        nearest[node] = min([matrix[node][hub_ix]] + [matrix[node][seed] for seed in seeds])
+    while len(seeds) < count and nearest:
+        seed = max(nearest, key=lambda node: (nearest[node], -node))
+        seeds.append(seed)
+        for node in nearest:
+            dist = matrix[node][seed]
+            if dist < nearest[node]:
+                nearest[node] = dist
+        del nearest[seed]
+    return seeds
+
+
+#O(s * k + p)
+def _assign(matrix, stops, seeds, fixed_loads, capacity, num_preferences=8):
+    """
+    Assigns every stop's packages to the nearest seed with room, closest stops first.
+    Packages at one stop are only split between loads if no load has room for all of them.
+    Only the nearest few seeds of a stop are sorted unless none of them have room.
+    """
+    loads = [list(load) for load in fixed_loads]
+    loads += [[] for i in range(len(seeds) - len(loads))]
+    members = [set() for seed in seeds]
+    seed_ixs = range(len(seeds))
+    preferences = []
+    for node in stops:
+        row = matrix[node]
+        order = heapq.nsmallest(num_preferences, seed_ixs, key=lambda ix: (row[seeds[ix]], ix))
+        preferences.append((row[seeds[order[0]]], node, order))
+    preferences.sort()
+    leftover = []
+    for dist, node, order in preferences:
+        package_ids = stops[node]
+        target = None
+        for ix in order:
+            if len(loads[ix]) + len(package_ids) <= capacity:
+                target = ix
+                break
+        if target is None and len(order) < len(seeds):
+            row = matrix[node]
+            order = sorted(seed_ixs, key=lambda ix: (row[seeds[ix]], ix))
+            for ix in order:
+                if len(loads[ix]) + len(package_ids) <= capacity:
+                    target = ix
+                    break
+        if target is not None:
+            loads[target].extend(package_ids)
+            members[target].add(node)
+            continue
+        remaining = list(package_ids)
+        for ix in order:
+            room = capacity - len(loads[ix])
+            if room > 0 and remaining:
+                loads[ix].extend(remaining[:room])
+                members[ix].add(node)
+                remaining = remaining[room:]
+        leftover.extend(remaining)
+    return loads, members, leftover
+
+
+#O(i * (s * k + p + k * c^2))
+#Where i = the number of iterations
+def create_clustered_loads(packages_all, hash_table, graph, hub, capacity=MAX_LOAD_SIZE,
+                           packages_need_lst=(), max_iterations=10):
+    """
+    Groups packages into compact loads under a truck capacity using the distance matrix.
+
+    The number of loads is chosen automatically as the fewest loads that can hold every
+    package. Lists of packages that must travel together each start their own load, and
+    the other packages are clustered around them.
+
+    Parameters
+    ----------
+    packages_all : list[int]
+        A list of all the available packages
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    graph : Graph
+        The graph storing data about all addresses
+    hub : str
+        The address of the hub the trucks leave from
+    capacity : int
+        The maximum number of packages in a load (default = 16)
+    packages_need_lst : list[list[int]]
+        Lists of package ids that need to be in the same load regardless of their address (default = ())
+    max_iterations : int
+        The maximum number of times the seeds are moved to their load's medoid (default = 10)
+
+    Returns
+    ----------
+    list[list[int]]
+        A list of loads containing package ids
+    """
+    matrix = graph.matrix
+    hub_ix = graph.index_of(hub)
+    fixed_loads = [list(lst) for lst in packages_need_lst]
+    fixed = {package_id for lst in fixed_loads for package_id in lst}
+    free_ids = [package_id for package_id in packages_all if package_id not in fixed]
+    stops = group_by_stop(free_ids, hash_table, graph)
+    num_loads = max(len(fixed_loads), ceil((len(free_ids) + len(fixed)) / capacity))
+    if not stops:
+        return fixed_loads
+
+    #fixed loads are seeded at the medoid of their own stops
+    seeds = []
+    for load in fixed_loads:
+        weights = {}
+        for node, package_ids in group_by_stop(load, hash_table, graph).items():
+            weights[node] = len(package_ids)
+        seeds.append(_medoid(matrix, list(weights), weights) if weights else hub_ix)
+    seeds = _spread_seeds(matrix, hub_ix, list(stops), seeds, num_loads)
+
+    weights = {node: len(package_ids) for node, package_ids in stops.items()}
+    for iteration in range(max_iterations):
+        loads, members, leftover = _assign(matrix, stops, seeds, fixed_loads, capacity)
+        new_seeds = seeds[:len(fixed_loads)]
+        for ix in range(len(fixed_loads), len(seeds)):
+            if members[ix]:
+                new_seeds.append(_medoid(matrix, sorted(members[ix]), weights))
+            else:
+                new_seeds.append(seeds[ix])
+        if new_seeds == seeds:
+            break
+        seeds = new_seeds
+    else:
+        loads, members, leftover = _assign(matrix, stops, seeds, fixed_loads, capacity)
+
+    #only happens when the fixed loads leave too little room for the other packages
+    while leftover:
+        loads.append(leftover[:capacity])
+        leftover = leftover[capacity:]
+
+    return [load for load in loads if load]
+
+
+#O(s^2 log s + p)
+#Where s = the number of stops and p = the number of packages
+def create_savings_loads(packages_all, hash_table, graph, hub, capacity=MAX_LOAD_SIZE):
+    """
+    Groups packages into loads and orders each load's stops with the Clarke-Wright savings algorithm.
+
+    Stops with more packages than a truck can hold first get full loads of their own.
+    Packages addressed to the hub are delivered as a zero-distance first stop of the first
+    load with room for them, or of a load of their own.
+
+    Parameters
+    ----------
+    packages_all : list[int]
+        A list of all the available packages
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    graph : Graph
+        The graph storing data about all addresses
+    hub : str
+        The address of the hub the trucks leave from
+    capacity : int
+        The maximum number of packages in a load (default = 16)
+
+    Returns
+    ----------
+    list[list[int]]
+        A list of loads containing package ids
+    list[(list[int], float)]
+        For each load, its stops in the order they are visited and the distance of the tour
+    """
+    hub_ix = graph.index_of(hub)
+    stops = group_by_stop(packages_all, hash_table, graph)
+    loads = []
+    plans = []
+    for node, package_ids in stops.items():
+        while len(package_ids) > capacity:
+            loads.append(package_ids[:capacity])
+            plans.append(([node], graph.matrix[hub_ix][node] + graph.matrix[node][hub_ix]))
+            package_ids = package_ids[capacity:]
+        stops[node] = package_ids
+    at_hub = stops.pop(hub_ix, [])
+    demands = {node: len(package_ids) for node, package_ids in stops.items()}
+    for route, miles in ClarkeWrightSolver(capacity).plan(graph, hub_ix, list(stops), demands):
+        loads.append([package_id for node in route for package_id in stops[node]])
+        plans.append((route, miles))
+    if at_hub:
+        #the savings algorithm only plans stops away from the hub
+        ix = next((ix for ix, load in enumerate(loads) if len(load) + len(at_hub) <= capacity), None)
+        if ix is None:
+            loads.append(at_hub)
+            plans.append(([hub_ix], 0))
+        else:
+            loads[ix] = at_hub + loads[ix]
+            plans[ix] = ([hub_ix] + plans[ix][0], plans[ix][1])
+    return loads, plans
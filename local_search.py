@@ -0,0 +1,241 @@
+"""
+local_search
+
+This python file contains functions that improve a delivery route after it has been
+built by the nearest neighbor algorithm. A route is a closed tour that starts and ends
+at the hub; the hub always stays at the front of the tour.
+
+The improvement uses two kinds of moves:
+
+        * 2-opt - removes two edges and reconnects the tour by reversing the path between them
+        * Or-opt - moves a segment of 1 to 3 stops to a better place in the tour
+
+Only moves towards each stop's nearest neighbors are tried, and stops whose surroundings
+have not changed are skipped ("don't-look bits"), so routes with hundreds of stops
+can be improved within a time budget.
+
+        * tour_length - finds the length of a closed tour
+        * build_neighbor_lists - finds the nearest neighbors of each stop in a tour
+        * improve_tour - applies 2-opt and Or-opt moves until no move improves the tour
+"""
+
+import heapq
+from collections import deque
+from time import perf_counter
+
+EPSILON = 1e-9
+
+
+#O(n)
+def tour_length(matrix, start_ix, tour):
+    """
+    Finds the length of a closed tour.
+
+    Parameters
+    ----------
+    matrix : list[list[float]]
+        An adjacency matrix to represent distances of nodes
+    start_ix : int
+        The index of the node the tour starts and ends at
+    tour : list[int]
+        The indexes of the stops in the order they are visited
+
+    Returns
+    ----------
+    float
+        The distance of the tour including the return to the starting node
+    """
+    total = 0
+    curr_ix = start_ix
+    for next_ix in tour:
+        total += matrix[curr_ix][next_ix]
+        curr_ix = next_ix
+    return total + matrix[curr_ix][start_ix]
+
+
+#O(s * n log k)
+#Where s = the number of sources, n = the number of nodes and k = the number of neighbors
+def build_neighbor_lists(matrix, nodes, k=8, sources=None):
+    """
+    Finds the k nearest neighbors of each node among a set of nodes.
+
+    Parameters
+    ----------
+    matrix : list[list[float]]
+        An adjacency matrix to represent distances of nodes
+    nodes : list[int]
+        The indexes of the nodes
+    k : int
+        The number of neighbors to find for each node (default = 8)
+    sources : list[int]
+        The nodes to find neighbors for (default = None, every node)
+
+    Returns
+    ----------
+    dict[int, list[int]]
+        The neighbors of each source node, nearest first
+    """
+    neighbors = {}
+    for node in nodes if sources is None else sources:
+        row = matrix[node]
+        others = [other for other in nodes if other != node]
+        neighbors[node] = heapq.nsmallest(k, others, key=lambda other: (row[other], other))
+    return neighbors
+
+
+#O(n)
+def _reverse(route, pos, i, j):
+    """
+    Replaces the edges (i, i+1) and (j, j+1) of a route with (i, j) and (i+1, j+1).
+
+    The path between the edges is reversed in place. Position 0 is never moved.
+    """
+    if i > j:
+        i, j = j, i
+    segment = route[i + 1:j + 1]
+    segment.reverse()
+    route[i + 1:j + 1] = segment
+    for offset, node in enumerate(segment):
+        pos[node] = i + 1 + offset
+
+
+#O(k)
+#Where k = the number of neighbors
+def _try_two_opt(matrix, route, pos, neighbors, a):
+    """
+    Tries the 2-opt moves that connect a to one of its neighbors.
+
+    Returns
+    ----------
+    list[int]
+        The nodes whose edges changed (empty if no improving move was found)
+    """
+    n = len(route)
+    i = pos[a]
+    for direction in (1, -1):
+        b = route[(i + direction) % n]
+        d_ab = matrix[a][b]
+        for c in neighbors[a]:
+            d_ac = matrix[a][c]
+            if d_ac >= d_ab:
+                break
+            j = pos[c]
+            d = route[(j + direction) % n]
+            if c == b or d == a:
+                continue
+            if d_ac + matrix[b][d] - d_ab - matrix[c][d] < -EPSILON:
+                if direction == 1:
+                    _reverse(route, pos, i, j)
+                else:
+                    _reverse(route, pos, (i - 1) % n, (j - 1) % n)
+                return [a, b, c, d]
+    return []
+
+
+#O(n)
+def _try_or_opt(matrix, route, pos, neighbors, a, max_segment=3):
+    """
+    Tries to move a segment of stops starting at a next to one of a's neighbors.
+
+    Returns
+    ----------
+    list[int]
+        The nodes whose edges changed (empty if no improving move was found)
+    """
+    n = len(route)
+    i = pos[a]
+    if i == 0:
+        return []
+    for length in range(1, max_segment + 1):
+        end = i + length - 1
+        if end >= n:
+            break
+        first = route[i]
+        last = route[end]
+        prev_node = route[i - 1]
+        next_node = route[(end + 1) % n]
+        if next_node == prev_node:
+            break
+        gain = matrix[prev_node][first] + matrix[last][next_node] - matrix[prev_node][next_node]
+        segment = set(route[i:end + 1])
+        for c in neighbors[first] + neighbors[last]:
+            if c in segment:
+                continue
+            c_next = route[(pos[c] + 1) % n]
+            if c_next in segment:
+                continue
+            forward = matrix[c][first] + matrix[last][c_next] - matrix[c][c_next]
+            backward = matrix[c][last] + matrix[first][c_next] - matrix[c][c_next]
+            cost = min(forward, backward)
+            if cost < gain - EPSILON:
+                moved = route[i:end + 1]
+                if backward < forward:
+                    moved.reverse()
+                del route[i:end + 1]
+                insert_at = route.index(c) + 1
+                route[insert_at:insert_at] = moved
+                for ix, node in enumerate(route):
+                    pos[node] = ix
+                return [prev_node, next_node, c, c_next, first, last]
+    return []
+
+
+#O(m * n)
+#Where m = the number of improving moves and n = the number of stops
+def improve_tour(matrix, start_ix, tour, time_budget=None, num_neighbors=8, neighbors=None):
+    """
+    Improves a tour with 2-opt and Or-opt moves until no move improves it.
+
+    Parameters
+    ----------
+    matrix : list[list[float]]
+        An adjacency matrix to represent distances of nodes
+    start_ix : int
+        The index of the node the tour starts and ends at
+    tour : list[int]
+        The indexes of the stops in the order they are visited, e.g. from the nearest neighbor algorithm
+    time_budget : float
+        The maximum number of seconds to spend improving the tour (default = None, no limit)
+    num_neighbors : int
+        The number of nearest neighbors to try moves towards (default = 8)
+    neighbors : dict[int, list[int]] or list[list[int]]
+        Precomputed neighbor lists covering the stops and start node, e.g. Graph.neighbors.
+        Neighbors that are not on the tour are ignored, and the lists of nodes left with
+        fewer than num_neighbors stops are found again among the stops (default = None)
+
+    Returns
+    ----------
+    list[int]
+        The indexes of the stops in the improved order
+    float
+        The distance of the improved tour including the return to the starting node
+    """
+    route = [start_ix] + [ix for ix in tour if ix != start_ix]
+    if len(route) < 4:
+        return route[1:], tour_length(matrix, start_ix, route[1:])
+    deadline = None if time_budget is None else perf_counter() + time_budget
+    if neighbors is None:
+        neighbors = build_neighbor_lists(matrix, route, num_neighbors)
+    else:
+        members = set(route)
+        k = min(num_neighbors, len(route) - 1)
+        neighbors = {node: [other for other in neighbors[node] if other in members][:k]
+                     for node in route}
+        short = [node for node in route if len(neighbors[node]) < k]
+        neighbors.update(build_neighbor_lists(matrix, route, k, short))
+    pos = {node: i for i, node in enumerate(route)}
+    active = deque(route)
+    queued = set(route)
+    while active:
+        if deadline is not None and perf_counter() > deadline:
+            break
+        a = active.popleft()
+        queued.discard(a)
+        changed = _try_two_opt(matrix, route, pos, neighbors, a)
+        if not changed:
+            changed = _try_or_opt(matrix, route, pos, neighbors, a)
+        for node in changed:
+            if node not in queued:
+                queued.add(node)
+                active.append(node)
+    return route[1:], tour_length(matrix, start_ix, route[1:])
@@ -18,6 +18,8 @@ The functions used for package objects are below:
 
 The functions used to group packages together into individual loads are below:
 
+        * create_location_index - groups packages by address, zip code and city
+        * PackagePool - the packages that have not been loaded yet, in order
         * find_nearby_packages - given a list of packages, find other packages that are nearby
         * create_load - create a single group (or load) of packages to be delivered
         * create_all_loads - takes all packages and splits them into a number of loads
@@ -28,15 +30,16 @@ The functions used to display information to the user are below:
         * get_inputs - prompts the user to input time and package ids
 """
 
-from read_data import create_graph_and_places, read_package_data
+from read_data import create_graph_and_places, read_package_data, create_address_registry
 from package import Package
 from hash_table import ChainHashTable
 from graph_traversal import Graph
-from truck import Truck
+from truck import Truck, MAX_LOAD_SIZE
 from datetime import time
+from heapq import heapify, heappop, heappush
 
 #O(1)
-def create_package(package_str):
+def create_package(package_str, registry=None):
     """
     Creates a package object from a comma separated value string.
 
@@ -44,6 +47,8 @@ def create_package(package_str):
     ----------
     package_str : str
         A comma seperated value string of package attributes
+    registry : AddressRegistry
+        If given, the package's address is interned as its address_id (default = None)
 
     Returns
     ----------
@@ -52,11 +57,13 @@ def create_package(package_str):
     """
     package = Package(package_str[0], package_str[1], package_str[5], package_str[2],
                       package_str[4], package_str[6])
+    if registry is not None:
+        package.address_id = registry.intern(package.address)
     return package
 
 #O(n)
 #Where n = the total number of packages
-def insert_all_packages(packages, hash_table):
+def insert_all_packages(packages, hash_table, registry=None):
     """
     Creates package objects for all packages and inserts them into a hash table.
 
@@ -67,13 +74,215 @@ def insert_all_packages(packages, hash_table):
 
     hash_table : ChainHashTable
         A hash table that will store the package objects
+
+    registry : AddressRegistry
+        If given, each package's address is interned as its address_id (default = None)
+    """
+    hash_table.insert_many([create_package(package, registry) for package in packages])
+
+#O(n)
+#Where n = the total number of packages
+def create_location_index(package_ids, hash_table):
     """
-    for package in packages:
-        pack_obj = create_package(package)
-        hash_table.insert(pack_obj.id, pack_obj)
+    Groups packages by their address, zip code and city.
 
-#O(n^2)
-def find_nearby_packages(loc_type, locations, load, packages_all, hash_table, max_load_size=16):
+    Parameters
+    ----------
+    package_ids : list[int]
+        A list of package ids to group
+    hash_table : ChainHashTable
+        A hash table that stores the package objects
+
+    Returns
+    ----------
+    dict[str, dict[str, list[int]]]
+        For each location type ('address', 'zipcode' and 'city'), the package ids at each
+        location in the order they were given
+    """
+    location_index = {'address': {}, 'zipcode': {}, 'city': {}}
+    for package in hash_table.search_many(package_ids):
+        location_index['address'].setdefault(package.address, []).append(package.id)
+        location_index['zipcode'].setdefault(package.zipcode, []).append(package.id)
+        location_index['city'].setdefault(package.city, []).append(package.id)
+    return location_index
+
+
+class PackagePool:
+    """
+    A class to store the packages that have not been loaded yet, in their original order.
+
+    Every list is only ever read forward, so taking all n packages out of the pool
+    costs O(n log L) in total however many loads they are split into.
+
+    Attributes
+    ----------
+    order : list[int]
+        The package ids in their original order
+    position : dict[int, int]
+        The index in order of each package that has not been loaded yet
+    location_index : dict[str, dict[str, list[int]]]
+        The packages at each location from create_location_index
+    heads : dict[tuple[str, str], int]
+        For each location, how many packages at the start of its list have been loaded
+    head : int
+        How many packages at the start of order have been loaded
+
+    Methods
+    ----------
+    take(package_id)
+        Removes a package from the pool
+    first()
+        Takes the first package in the pool
+    nearby(loc_type, locations, count)
+        Takes up to count packages at the given locations
+    rest(count)
+        Takes up to count packages in their original order
+    """
+
+    #O(n)
+    def __init__(self, package_ids, location_index):
+        """
+        Parameters
+        ----------
+        package_ids : list[int]
+            The package ids that have not been loaded yet, in order
+        location_index : dict[str, dict[str, list[int]]]
+            The packages at each location from create_location_index. It may hold
+            packages that are not in the pool; they are skipped
+        """
+        self.order = list(package_ids)
+        self.position = {package_id: i for i, package_id in enumerate(self.order)}
+        self.location_index = location_index
+        self.heads = {}
+        self.head = 0
+
+    #O(1)
+    def __len__(self):
+        return len(self.position)
+
+    #O(1)
+    def __contains__(self, package_id):
+        return package_id in self.position
+
+    #O(1)
+    def take(self, package_id):
+        """
+        Removes a package from the pool.
+
+        Parameters
+        ----------
+        package_id : int
+            The id of a package in the pool
+        """
+        del self.position[package_id]
+
+    #O(1) amortized
+    def first(self):
+        """
+        Takes the first package in the pool.
+
+        Returns
+        ----------
+        int
+            The id of the package, or None if the pool is empty
+        """
+        load = self.rest(1)
+        return load[0] if load else None
+
+    #O(c log L) amortized
+    #Where c is the count and L is the number of locations
+    def nearby(self, loc_type, locations, count):
+        """
+        Takes up to count packages at the given locations, in their original order.
+
+        Parameters
+        ----------
+        loc_type : str
+            A string indicating if the locations are addresses, zip codes or cities
+        locations : list[str]
+            The locations to take packages from
+        count : int
+            The most packages to take
+
+        Returns
+        ----------
+        list[int]
+            The ids of the packages taken
+        """
+        by_location = self.location_index[loc_type]
+        heap = [] #The next package at each location, by its position in order
+        for location in set(locations):
+            key = (loc_type, location)
+            ids = by_location.get(location, [])
+            head = self._skip_loaded(ids, self.heads.get(key, 0))
+            self.heads[key] = head
+            if head < len(ids):
+                heap.append((self.position[ids[head]], key, ids, head))
+        heapify(heap)
+
+        taken = []
+        while heap and len(taken) < count:
+            _, key, ids, head = heappop(heap)
+            taken.append(ids[head])
+            self.take(ids[head])
+            head = self._skip_loaded(ids, head + 1)
+            self.heads[key] = head
+            if head < len(ids):
+                heappush(heap, (self.position[ids[head]], key, ids, head))
+        return taken
+
+    #O(c) amortized
+    #Where c is the count
+    def rest(self, count):
+        """
+        Takes up to count packages in their original order.
+
+        Parameters
+        ----------
+        count : int
+            The most packages to take
+
+        Returns
+        ----------
+        list[int]
+            The ids of the packages taken
+        """
+        taken = []
+        self.head = self._skip_loaded(self.order, self.head)
+        i = self.head
+        while i < len(self.order) and len(taken) < count:
+            if self.order[i] in self.position:
+                taken.append(self.order[i])
+            i += 1
+        for package_id in taken:
+            self.take(package_id)
+        self.head = self._skip_loaded(self.order, self.head)
+        return taken
+
+    #O(1) amortized
+    def _skip_loaded(self, ids, head):
+        """
+        Moves head forward past the packages in ids that have been loaded.
+
+        Parameters
+        ----------
+        ids : list[int]
+            A list of package ids
+        head : int
+            An index in ids
+
+        Returns
+        ----------
+        int
+            The index of the next package in ids that is still in the pool
+        """
+        while head < len(ids) and ids[head] not in self.position:
+            head += 1
+        return head
+
+#O(c log L)
+#Where c is the max load size and L is the number of locations
+def find_nearby_packages(loc_type, locations, load, pool, max_load_size=MAX_LOAD_SIZE):
     """
     Finds packages that are nearby each other given a list of locations to search.
 
@@ -85,10 +294,9 @@ def find_nearby_packages(loc_type, locations, load, packages_all, hash_table, ma
         A list of locations of the current packages in the load
     load : list[int]
         The package ids of the current load
-    packages_all : list[int]
-        A list of all the available packages
-    hash_table : ChainHashTable
-        A hash table that will store the package objects
+    pool : PackagePool
+        The packages that have not been loaded yet. The packages added to the load are
+        taken out of it
     max_load_size : int
         The maximum size of the load (default = 16)
 
@@ -96,35 +304,13 @@ def find_nearby_packages(loc_type, locations, load, packages_all, hash_table, ma
     ----------
     list[int]
         A list of package ids that are in the load
-    list[int]
-        A list of remaining packages
     """
-    for package_id in packages_all:
-        if len(load) < max_load_size:
-            if package_id in load:
-                packages_all.remove(package_id)
-            else:
-                package = hash_table.search(package_id) #O(n)
-                if loc_type == 'address':
-                    if package.address in locations:
-                        load.append(package.id)
-                        packages_all.remove(package_id)
-                elif loc_type == 'zipcode':
-                    if package.zipcode in locations:
-                        load.append(package.id)
-                        packages_all.remove(package_id)
-                else:
-                    if package.city in locations:
-                        load.append(package.id)
-                        packages_all.remove(package_id)
-
-        else:
-            break
+    load.extend(pool.nearby(loc_type, locations, max_load_size - len(load)))
+    return load
 
-    return load, packages_all
-
-#O(n^2)
-def create_load(packages_need, packages_all, hash_table):
+#O(c log L)
+#Where c is the max load size and L is the number of locations
+def create_load(packages_need, pool, hash_table, max_load_size=MAX_LOAD_SIZE):
     """
     Creates a group of packages to load onto a truck.
 
@@ -135,45 +321,46 @@ def create_load(packages_need, packages_all, hash_table):
     ----------
     packages_need : list[int]
         A list of package ids that need to be in the load regardless of their address
-    packages_all : list[int]
-        A list of all the available packages
+    pool : PackagePool
+        The packages that have not been loaded yet. The packages added to the load are
+        taken out of it
     hash_table : ChainHashTable
         A hash table that will store the package objects
+    max_load_size : int
+        The maximum size of the load (default = 16)
 
     Returns
     ----------
     list[int]
         A list of package ids that are in the load
-    list[int]
-        A list of remaining packages
     """
     load = packages_need.copy() #The packages on the load
-    addresses = []
-    zip_codes = []
-    cities = []
+    for package_id in load:
+        if package_id in pool:
+            pool.take(package_id)
 
     if len(load) == 0:
-        load.append(packages_all[0])
-        packages_all.remove(packages_all[0])
-
-    for i in load:
-        package = hash_table.search(i)
-        if package.address not in addresses:
-            addresses.append(package.address)
-        if package.zipcode not in zip_codes:
-            zip_codes.append(package.zipcode)
-        if package.city not in cities:
-            cities.append(package.city)
+        first = pool.first()
+        if first is None:
+            return load
+        load.append(first)
 
+    addresses = set()
+    zip_codes = set()
+    for package in hash_table.search_many(load):
+        addresses.add(package.address)
+        zip_codes.add(package.zipcode)
 
-    load, packages_all = find_nearby_packages('address', addresses, load, packages_all, hash_table) #O(n^2)
-    load, packages_all = find_nearby_packages('zipcode', zip_codes, load, packages_all, hash_table) #O(n^2)
+    load = find_nearby_packages('address', addresses, load, pool, max_load_size)
+    load = find_nearby_packages('zipcode', zip_codes, load, pool, max_load_size)
 
-    return load, packages_all
+    return load
 
 
-#O(k * n^2)
-def create_all_loads(num_loads, packages_all, packages_need_lst, hash_table):
+#O(n log L)
+#Where L is the number of locations
+def create_all_loads(num_loads, packages_all, packages_need_lst, hash_table,
+                     max_load_size=MAX_LOAD_SIZE, constraints=None):
     """
     Creates a number of loads that places all packages given into different groups
 
@@ -187,6 +374,11 @@ def create_all_loads(num_loads, packages_all, packages_need_lst, hash_table):
         A list of lists of package ids that need to be in the load regardless of their address
     hash_table : ChainHashTable
         A hash table that will store the package objects
+    max_load_size : int
+        The maximum size of each load (default = 16)
+    constraints : PackageConstraints
+        If given, the loads needed by the constraints compiled from the packages' special
+        notes are added after packages_need_lst (default = None)
 
     Returns
     ----------
@@ -194,39 +386,35 @@ def create_all_loads(num_loads, packages_all, packages_need_lst, hash_table):
         A list of loads containing package ids
     """
     all_loads = []
-
-    for lst in packages_need_lst:
-        for package_id in lst:
-            if package_id in packages_all:
-                packages_all.remove(package_id)
+    if constraints is not None:
+        listed = {package_id for lst in packages_need_lst for package_id in lst}
+        packages_need_lst = list(packages_need_lst)
+        for lst in constraints.needed_loads(max_load_size):
+            lst = [package_id for package_id in lst if package_id not in listed]
+            if lst:
+                packages_need_lst.append(lst)
+        num_loads = max(num_loads, len(packages_need_lst))
+    location_index = create_location_index(packages_all, hash_table) #O(n)
+
+    needed = {package_id for lst in packages_need_lst for package_id in lst}
+    pool = PackagePool([package_id for package_id in packages_all if package_id not in needed],
+                       location_index)
 
     for i in range(num_loads):
         try:
             package_need = packages_need_lst[i]
-        except:
+        except IndexError:
             package_need = []
         if i == num_loads - 1: #If this is the last load
-            try:
-                room = 16 - len(package_need)
-                load = package_need + packages_all[:room]
-                packages_all = packages_all[room:]
-            except:
-                load = package_need + packages_all
-                packages_all = []
+            load = package_need + pool.rest(max_load_size - len(package_need))
 
         else:
-            load, packages_all = create_load(package_need, packages_all, hash_table) #O(n^2)
+            load = create_load(package_need, pool, hash_table, max_load_size) #O(c log L)
         all_loads.append(load)
 
-    if len(packages_all) > 0: #if there are still remaining packages that have not been loaded
+    if len(pool) > 0: #if there are still remaining packages that have not been loaded
         for load in all_loads:
-            while len(load) < 16 and len(packages_all) > 0:
-                load.append(packages_all[0])
-                try:
-                    packages_all = packages_all[1:]
-                except:
-                    packages_all = []
-                    break
+            load.extend(pool.rest(max_load_size - len(load)))
 
     return all_loads
 
@@ -247,7 +435,7 @@ def display_title():
      the order in which addresses are chosen is the nearest neighbor algorithm 
      which has a big-O time complexity of O(n^2) and the algorithm used to group
      packages together in loads is a modified greedy algorithm with a big-O time
-     complexity of O(n^2). The entire program has a big-O time complexity of 
+     complexity of O(n). The entire program has a big-O time complexity of 
      O(n^3) with a spacial complexity of O(n^2).
     
                             Created by: Caleb Reigada
@@ -313,22 +501,23 @@ if __name__ == '__main__':
      the order in which addresses are chosen is the nearest neighbor algorithm 
      which has a big-O time complexity of O(n^2) and the algorithm used to group
      packages together in loads is a modified greedy algorithm with a big-O time
-     complexity of O(n^2). The entire program has a big-O time complexity of 
+     complexity of O(n). The entire program has a big-O time complexity of 
      O(n^3) with a spacial complexity of O(n^2).
      
      
      
      Below many variables are created to represent the constraints and information provided
      in the task requirements. With the given information and requirements, the simulation 
-     finishes with a total of 110.1 mi traveled.
+     finishes with a total of 118.9 mi traveled.
     """
 
     #Creates the package hash table, main graph and tests out truck delivery options
     ALL_PACKAGES = [i for i in range(1, 41)] #The package ids for the given packages
     places, graph = create_graph_and_places() #Adjacency matrix and place names for given WGU file
     packages = read_package_data('clean_packages.csv') #Creates list of package data from given WGU file
+    registry = create_address_registry(places, packages) #Interns every address as an integer id
     package_hash = ChainHashTable() #Initialize hash table
-    insert_all_packages(packages, package_hash) #Add all packages to hash table
+    insert_all_packages(packages, package_hash, registry) #Add all packages to hash table
     address_graph = Graph(places, graph)#Creates a graph data structure with all nodes
 
 
@@ -347,7 +536,7 @@ if __name__ == '__main__':
 
     #Creates the loads based on package constraints
     packages_needed = [
-        [13, 14, 15, 16, 19, 20, 29, 31, 40], #packages that must be together or have other time constraints
+        [13, 14, 15, 16, 19, 20, 29, 30, 31, 37, 40], #packages that must be together or have other time constraints
         [25, 3, 6, 18, 28, 32, 36, 38],# packages that are delayed until 9:05 or must be in Truck 2
         [9] #Package 9 must be loaded after 10:20
     ]
@@ -362,6 +551,7 @@ if __name__ == '__main__':
     truck1.time = time(10, 20, 0) #Waits until 10:20 at the hub
     package9 = package_hash.search(9)
     package9.address = '410 S State St' #Updated address
+    package9.address_id = registry.intern(package9.address)
     #Delivers the last load
     truck1.load_and_deliver(loads[2], package_hash, address_graph)
 
@@ -1,7 +1,131 @@
+"""
+package
+
+This python file contains the classes used to store package data.
+
+        * PackageStatus - the status codes of a package
+        * Package - a single package with compact attribute storage
+        * PackageStore - many packages stored column by column in typed arrays
+
+The helper functions used by both classes are below:
+
+        * time_to_seconds - converts a datetime.time into seconds after midnight
+        * seconds_to_time - converts seconds after midnight into a datetime.time
+        * deadline_minutes - parses a delivery deadline such as '10:30 AM' into minutes after midnight
+        * format_status - builds the human-readable status of a package
+"""
+
+from array import array
+from datetime import time
+from enum import IntEnum
+
+
+class PackageStatus(IntEnum):
+    """
+    This class enumerates the statuses a package can have.
+    """
+    AT_HUB = 0
+    EN_ROUTE = 1
+    DELIVERED = 2
+
+
+#O(1)
+def time_to_seconds(clock_time):
+    """
+    Converts a time of day into whole seconds after midnight.
+
+    Parameters
+    ----------
+    clock_time : datetime.time
+        The time of day
+
+    Returns
+    ----------
+    int
+        The number of seconds after midnight, rounded to the nearest second
+    """
+    return round(clock_time.hour * 3600 + clock_time.minute * 60 + clock_time.second
+                 + clock_time.microsecond / 1000000)
+
+
+#O(1)
+def seconds_to_time(seconds):
+    """
+    Converts whole seconds after midnight into a time of day.
+
+    Parameters
+    ----------
+    seconds : int
+        The number of seconds after midnight
+
+    Returns
+    ----------
+    datetime.time
+        The time of day
+    """
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+#O(1)
+def deadline_minutes(deadline):
+    """
+    Parses a delivery deadline into minutes after midnight.
+
+    Parameters
+    ----------
+    deadline : str
+        A deadline such as '10:30 AM', '9:05am' or 'EOD'
+
+    Returns
+    ----------
+    int
+        The number of minutes after midnight (None for 'EOD' or an empty deadline)
+    """
+    deadline = deadline.strip().upper()
+    if not deadline or deadline == 'EOD':
+        return None
+    meridiem = deadline[-2:] if deadline[-2:] in ('AM', 'PM') else ''
+    clock = deadline[:len(deadline) - len(meridiem)].strip()
+    hour, _, minute = clock.partition(':')
+    hour = int(hour) % 12
+    if meridiem == 'PM':
+        hour += 12
+    return hour * 60 + int(minute or 0)
+
+
+#O(1)
+def format_status(code, seconds, truck_num):
+    """
+    Builds the human-readable status of a package.
+
+    Parameters
+    ----------
+    code : PackageStatus
+        The status code of the package
+    seconds : int
+        The time of delivery in seconds after midnight
+    truck_num : int
+        The id of the truck carrying or that delivered the package
+
+    Returns
+    ----------
+    str
+        The status, e.g. 'at the hub', 'en route (Truck 1)' or 'delivered at 09:13:00 (Truck 2)'
+    """
+    if code == PackageStatus.DELIVERED:
+        return 'delivered at ' + str(seconds_to_time(seconds)) + ' (Truck ' + str(truck_num) + ')'
+    if code == PackageStatus.EN_ROUTE:
+        return 'en route (Truck ' + str(truck_num) + ')'
+    return 'at the hub'
+
+
 class Package:
     """
     This class represents a package.
 
+    The attributes are stored in __slots__ and the status is kept as an integer code,
+    time and truck number. The status string is only built when it is read.
+
     Attributes
     ----------
     id : int
@@ -10,21 +134,48 @@ class Package:
         The address of the package's destination
     deadline : str
         The time that the package must be delivered by
+    due : int
+        The deadline in minutes after midnight, parsed once whenever the deadline is set
+        (None for 'EOD')
     city : str
         The city of the package's destination
     zipcode : str
         The zipcode of the package's destination
     weight : str
         The weight of the package
+    address_id : int
+        The interned id of the package's address (default = None)
+    status_code : PackageStatus
+        Whether the package is at the hub, en route or delivered (default is AT_HUB)
+    status_time : int
+        The time the package was delivered in seconds after midnight (default = None)
+    status_truck : int
+        The id of the truck carrying or that delivered the package (default = None)
     status : str
-        The status of whether the package has been delivered, is en route, or at the hub
-         (default is "at the hub")
+        The human-readable status of the package
     time_left : datetime.time
         The time the package left its hub (default = None)
+
+    Methods
+    -------
+    mark_at_hub()
+        Changes the package's status back to at the hub
+
+    mark_en_route(truck_num)
+        Changes the package's status to en route
+
+    mark_delivered(seconds, truck_num)
+        Changes the package's status to delivered
+
+    lateness()
+        Finds how late the package was delivered
     """
+    __slots__ = ('id', 'address', '_deadline', 'due', 'city', 'zipcode', 'weight', 'address_id',
+                 'status_code', 'status_time', 'status_truck', 'time_left')
+
     #O(1)
     def __init__(self, id, address, deadline, city, zipcode, weight,
-                 status="at the hub", time_left=None):
+                 status=PackageStatus.AT_HUB, time_left=None, address_id=None):
         """
         Parameters
         ----------
@@ -40,10 +191,12 @@ class Package:
             The zipcode of the package's destination
         weight : str
             The weight of the package
-        status : bool
-            The status of whether the package has been delivered (default is False)
+        status : PackageStatus
+            The status code of the package (default is AT_HUB)
         time_left : datetime.time
             The time the package left its hub (default = None)
+        address_id : int
+            The interned id of the package's address (default = None)
         """
         self.id = int(id)
         self.address = address
@@ -51,5 +204,260 @@ class Package:
         self.city = city
         self.zipcode = zipcode
         self.weight = int(weight)
-        self.status = status
+        self.address_id = address_id
+        self.status_code = PackageStatus(status)
+        self.status_time = None
+        self.status_truck = None
         self.time_left = time_left
+
+    #O(1)
+    @property
+    def deadline(self):
+        """
+        The time that the package must be delivered by, e.g. '10:30 AM' or 'EOD'.
+        """
+        return self._deadline
+
+    #O(1)
+    @deadline.setter
+    def deadline(self, deadline):
+        self._deadline = deadline
+        self.due = deadline_minutes(deadline)
+
+    #O(1)
+    @property
+    def status(self):
+        """
+        Builds the human-readable status of the package.
+        """
+        return format_status(self.status_code, self.status_time, self.status_truck)
+
+    #O(1)
+    def mark_at_hub(self):
+        """
+        Changes the package's status back to at the hub, e.g. when it is unloaded undelivered.
+        """
+        self.status_code = PackageStatus.AT_HUB
+        self.status_truck = None
+
+    #O(1)
+    def mark_en_route(self, truck_num):
+        """
+        Changes the package's status to en route.
+
+        Parameters
+        ----------
+        truck_num : int
+            The id of the truck carrying the package
+        """
+        self.status_code = PackageStatus.EN_ROUTE
+        self.status_truck = truck_num
+
+    #O(1)
+    def mark_delivered(self, seconds, truck_num):
+        """
+        Changes the package's status to delivered.
+
+        Parameters
+        ----------
+        seconds : int
+            The time of delivery in seconds after midnight
+        truck_num : int
+            The id of the truck that delivered the package
+        """
+        self.status_code = PackageStatus.DELIVERED
+        self.status_time = seconds
+        self.status_truck = truck_num
+
+    #O(1)
+    def lateness(self):
+        """
+        Finds how late the package was delivered.
+
+        Returns
+        ----------
+        int
+            The number of seconds the package was delivered after its deadline, 0 if it was
+            delivered on time or has no deadline (None if it has not been delivered)
+        """
+        if self.status_code != PackageStatus.DELIVERED:
+            return None
+        if self.due is None:
+            return 0
+        return max(0, self.status_time - self.due * 60)
+
+
+class PackageStore:
+    """
+    This class stores many packages column by column in parallel typed arrays.
+
+    Each package is a row; addresses are stored as integer indexes and deadlines as
+    minutes after midnight, so a package costs a few bytes per column instead of a
+    full object.
+
+    Attributes
+    ----------
+    ids : array[int]
+        The unique ID of each package
+    address_ix : array[int]
+        The index of each package's destination address
+    deadline : array[int]
+        Each package's deadline in minutes after midnight (-1 for 'EOD')
+    weight : array[int]
+        The weight of each package
+    status_code : array[int]
+        The PackageStatus code of each package
+    status_time : array[int]
+        The delivery time of each package in seconds after midnight (-1 if not delivered)
+    status_truck : array[int]
+        The truck carrying or that delivered each package (-1 if none)
+    addresses : list[str]
+        The address string of each address index
+    address_index : dict[str, int]
+        Maps each address string to its address index
+    rows : dict[int, int]
+        Maps each package ID to its row
+
+    Methods
+    -------
+    append(package)
+        Adds a package object as a new row
+
+    append_many(packages)
+        Adds many package objects as new rows
+
+    status(id)
+        Builds the human-readable status of a package
+
+    mark_en_route(id, truck_num)
+        Changes a package's status to en route
+
+    mark_delivered(id, seconds, truck_num)
+        Changes a package's status to delivered
+    """
+
+    #O(a)
+    #Where a = the number of addresses in address_index
+    def __init__(self, address_index=None):
+        """
+        Parameters
+        ----------
+        address_index : dict[str, int]
+            An existing mapping of addresses to indexes, e.g. AddressRegistry.ids (default = None)
+        """
+        self.ids = array('q')
+        self.address_ix = array('l')
+        self.deadline = array('l')
+        self.weight = array('l')
+        self.status_code = array('b')
+        self.status_time = array('l')
+        self.status_truck = array('l')
+        self.address_index = dict(address_index) if address_index else {}
+        self.addresses = [None] * len(self.address_index)
+        for address, ix in self.address_index.items():
+            self.addresses[ix] = address
+        self.rows = {}
+
+    #O(1)
+    def __len__(self):
+        return len(self.ids)
+
+    #O(1)
+    def append(self, package):
+        """
+        Adds a package object as a new row.
+
+        Parameters
+        ----------
+        package : Package
+            The package to add
+
+        Returns
+        ----------
+        int
+            The row of the package
+        """
+        address_ix = self.address_index.get(package.address)
+        if address_ix is None:
+            address_ix = len(self.addresses)
+            self.address_index[package.address] = address_ix
+            self.addresses.append(package.address)
+        minutes = deadline_minutes(package.deadline)
+        row = len(self.ids)
+        self.ids.append(package.id)
+        self.address_ix.append(address_ix)
+        self.deadline.append(-1 if minutes is None else minutes)
+        self.weight.append(package.weight)
+        self.status_code.append(package.status_code)
+        self.status_time.append(-1 if package.status_time is None else package.status_time)
+        self.status_truck.append(-1 if package.status_truck is None else package.status_truck)
+        self.rows[package.id] = row
+        return row
+
+    #O(n)
+    #Where n = the number of packages
+    def append_many(self, packages):
+        """
+        Adds many package objects as new rows.
+
+        Parameters
+        ----------
+        packages : list[Package]
+            The packages to add
+        """
+        for package in packages:
+            self.append(package)
+
+    #O(1)
+    def status(self, id):
+        """
+        Builds the human-readable status of a package.
+
+        Parameters
+        ----------
+        id : int
+            The unique ID of the package
+
+        Returns
+        ----------
+        str
+            The status of the package
+        """
+        row = self.rows[id]
+        return format_status(PackageStatus(self.status_code[row]), self.status_time[row],
+                             self.status_truck[row])
+
+    #O(1)
+    def mark_en_route(self, id, truck_num):
+        """
+        Changes a package's status to en route.
+
+        Parameters
+        ----------
+        id : int
+            The unique ID of the package
+        truck_num : int
+            The id of the truck carrying the package
+        """
+        row = self.rows[id]
+        self.status_code[row] = PackageStatus.EN_ROUTE
+        self.status_truck[row] = truck_num
+
+    #O(1)
+    def mark_delivered(self, id, seconds, truck_num):
+        """
+        Changes a package's status to delivered.
+
+        Parameters
+        ----------
+        id : int
+            The unique ID of the package
+        seconds : int
+            The time of delivery in seconds after midnight
+        truck_num : int
+            The id of the truck that delivered the package
+        """
+        row = self.rows[id]
+        self.status_code[row] = PackageStatus.DELIVERED
+        self.status_time[row] = seconds
+        self.status_truck[row] = truck_num
@@ -9,17 +9,42 @@ This type of file will be read and parsed with the following functions:
         * read_adjacency_matrix - parses place names and distances from a csv file
         * clean_places - removes unnecessary spaces and words from the parsed places
         * clean_matrix - transforms the distances from strings to float
+        * load_adjacency_matrix - streams a csv file or file object into a preallocated float buffer
         * create_graph_and_places - using the above functions, reads in a csv file and parses its data
 
+Parsed adjacency matrices are cached in a binary file next to the csv file so later runs
+can memory-map them instead of parsing the csv again:
+
+        * write_matrix_cache - writes places and distances to a binary cache file
+        * load_matrix_cache - memory-maps a cache file if it still matches its csv file
+
 The other file needs to be a csv file containing package data with id, address, city, state,
 zip code, delivery deadline, weight and special notes. This type of file will be read and parsed
 with the following function:
 
         * read_package_data - reads a csv file and returns a list of packages
 
+The addresses of both files are interned as integer ids with the following function:
+
+        * create_address_registry - maps every place and package address to a dense integer id
+
 """
 
 import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from address_registry import AddressRegistry
+
+try:
+    import numpy as np
+except ImportError:  #numpy is optional, array('d') buffers are used without it
+    np = None
 
 #=======================================================================
 #Functions for reading in adjacency matrix data
@@ -106,23 +131,254 @@ def clean_matrix(matrix):
 
     return new_matrix
 
+# O(n^2)
+def load_adjacency_matrix(source, use_numpy=False):
+    """
+    Streams an adjacency matrix csv file into a single preallocated float buffer.
+
+    Each row is parsed straight into the buffer as it is read, so no nested lists of
+    strings or floats are built and the shape is checked one row at a time.
+
+    Parameters
+    ----------
+    source : str or file object
+        The path of a csv file in the form of an adjacency matrix with place names as header,
+        or an open text file with the same contents
+    use_numpy : bool
+        If True, the buffer is a 2D numpy array instead of an array('d') (default = False)
+
+    Returns
+    ----------
+    list[str]
+        A list of cleaned places that are the nodes of the adjacency matrix.
+
+    list[memoryview] or numpy.ndarray
+        The rows of the adjacency matrix, indexable like list[list[float]]
+
+    Raises
+    ----------
+    ValueError
+        If the matrix is not square with one row and column per place
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', newline='') as f:
+            return load_adjacency_matrix(f, use_numpy)
+    if use_numpy and np is None:
+        raise ImportError('numpy is required when use_numpy is True')
+    reader = csv.reader(source, delimiter=',', quotechar='"')
+    places = clean_places(next(reader, []))
+    n = len(places)
+    if use_numpy:
+        buffer = np.empty((n, n), dtype=np.float64)
+    else:
+        buffer = array('d', [0.0]) * (n * n)
+    i = 0
+    for row in reader:
+        if not row:
+            continue
+        if i >= n:
+            raise ValueError('adjacency matrix has more than ' + str(n) + ' rows')
+        if len(row) != n:
+            raise ValueError('row ' + str(i + 1) + ' has ' + str(len(row)) +
+                             ' distances, expected ' + str(n))
+        if use_numpy:
+            buffer[i] = [float(item) for item in row]
+        else:
+            buffer[i * n:(i + 1) * n] = array('d', map(float, row))
+        i += 1
+    if i != n:
+        raise ValueError('adjacency matrix has ' + str(i) + ' rows, expected ' + str(n))
+    if use_numpy:
+        return places, buffer
+    return places, _matrix_rows(memoryview(buffer), n)
+
+#=======================================================================
+#Functions for caching adjacency matrix data
+
+CACHE_SUFFIX = '.cache'
+_CACHE_MAGIC = b'NNDC'
+_CACHE_VERSION = 1
+#magic, version, byte order, csv mtime, csv size, csv sha256, node count, places length
+_CACHE_HEADER = struct.Struct('<4sBcxxdQ32sQQ')
+
+
+#O(n)
+#Where n = the size of the file in bytes
+def _file_digest(file_name):
+    """
+    Computes the sha256 digest of a file.
+
+    Parameters
+    ----------
+    file_name : str
+        The path of the file
+
+    Returns
+    ----------
+    bytes
+        The sha256 digest of the file's contents
+    """
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+#O(n)
+def _matrix_rows(buffer, n):
+    """
+    Splits a flat buffer of n*n distances into n row views without copying.
+
+    Parameters
+    ----------
+    buffer : memoryview
+        A flat buffer of floats
+    n : int
+        The number of nodes
+
+    Returns
+    ----------
+    list[memoryview]
+        A list of rows that can be indexed like list[list[float]]
+    """
+    return [buffer[i * n:(i + 1) * n] for i in range(n)]
+
+
 #O(n^2)
-def create_graph_and_places():
+def write_matrix_cache(csv_file, places, matrix, cache_file=None):
     """
-    Parses place names and an adjacency matrix from the 'adjacencyMtrx.csv' file.
+    Writes parsed places and distances to a binary cache file.
+
+    The cache is keyed on the csv file's modification time, size and sha256 digest.
+    Failing to write the cache (e.g. a read-only directory) is not an error.
+
+    Parameters
+    ----------
+    csv_file : str
+        The csv file that the places and matrix were parsed from
+    places : list[str]
+        A list of places that are the nodes of the adjacency matrix
+    matrix : list[list[float]]
+        A 2D list representing the distance between nodes
+    cache_file : str
+        The path of the cache file (default = csv_file + '.cache')
+
+    Returns
+    ----------
+    bool
+        Whether the cache file was written
+    """
+    if cache_file is None:
+        cache_file = csv_file + CACHE_SUFFIX
+    stat = os.stat(csv_file)
+    place_bytes = json.dumps(places).encode('utf-8')
+    place_bytes += b' ' * (-(_CACHE_HEADER.size + len(place_bytes)) % 8)  #aligns the distances
+    header = _CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, sys.byteorder[0].encode(),
+                                stat.st_mtime, stat.st_size, _file_digest(csv_file),
+                                len(places), len(place_bytes))
+    tmp_file = cache_file + '.tmp'
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(header)
+            f.write(place_bytes)
+            for row in matrix:
+                array('d', row).tofile(f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        return False
+    return True
+
+
+#O(n)
+def load_matrix_cache(csv_file, cache_file=None):
+    """
+    Memory-maps a binary cache file written by write_matrix_cache.
+
+    The distances are not copied; the rows are views into the mapped file, so
+    processes that load the same cache share its pages.
+
+    Parameters
+    ----------
+    csv_file : str
+        The csv file that the cache was created from
+    cache_file : str
+        The path of the cache file (default = csv_file + '.cache')
+
+    Returns
+    ----------
+    list[str]
+        A list of places that are the nodes of the adjacency matrix (None if the cache is missing or stale)
+    list[memoryview]
+        The rows of the adjacency matrix (None if the cache is missing or stale)
+    """
+    if cache_file is None:
+        cache_file = csv_file + CACHE_SUFFIX
+    try:
+        stat = os.stat(csv_file)
+        with open(cache_file, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None, None
+    if len(mapped) < _CACHE_HEADER.size:
+        return None, None
+    (magic, version, byteorder, mtime, size, digest,
+     n, places_len) = _CACHE_HEADER.unpack_from(mapped)
+    if (magic != _CACHE_MAGIC or version != _CACHE_VERSION
+            or byteorder != sys.byteorder[0].encode()):
+        return None, None
+    #a changed mtime alone does not invalidate the cache if the contents are the same
+    if (mtime != stat.st_mtime or size != stat.st_size) and digest != _file_digest(csv_file):
+        return None, None
+    start = _CACHE_HEADER.size + places_len
+    if len(mapped) != start + 8 * n * n:
+        return None, None
+    places = json.loads(bytes(mapped[_CACHE_HEADER.size:start]))
+    buffer = memoryview(mapped)[start:].cast('d')
+    return places, _matrix_rows(buffer, n)
+
+#=======================================================================
+#Function for creating the graph from an adjacency matrix file
+
+#O(n^2)
+def create_graph_and_places(csv_file='adjacencyMtrx.csv', use_cache=True, zero_copy=False):
+    """
+    Parses place names and an adjacency matrix from an adjacency matrix csv file.
+
+    If use_cache is True, a valid binary cache next to the csv file is memory-mapped
+    instead of parsing the csv, and a new cache is written after parsing.
+
+    Parameters
+    ----------
+    csv_file : str or file object
+        The adjacency matrix csv file (default = 'adjacencyMtrx.csv').
+        The cache is only used when a path is given.
+    use_cache : bool
+        Whether to read and write the binary cache (default = True)
+    zero_copy : bool
+        If True, the rows are memoryviews of the parsed buffer or of the memory-mapped
+        cache instead of lists. They are not copied, but rows from the cache are read-only
+        and a Graph built from them cannot be pickled (default = False)
 
     Returns
     ----------
     list[str]
         A list of places that are the nodes of the adjacency matrix.
 
-    list[list[float]]
+    list[list[float]] or list[memoryview]
         A 2D list representing the distance between nodes
     """
-    places, graph = read_adjacency_matrix('adjacencyMtrx.csv')  #O(n)
-    places = clean_places(places)                               #O(n)
-    graph = clean_matrix(graph)                                 #O(n^2)
-    return places, graph
+    use_cache = use_cache and isinstance(csv_file, (str, os.PathLike))
+    graph = None
+    if use_cache:
+        places, graph = load_matrix_cache(csv_file)             #O(n)
+    if graph is None:
+        places, graph = load_adjacency_matrix(csv_file)         #O(n^2)
+        if use_cache:
+            write_matrix_cache(csv_file, places, graph)         #O(n^2)
+    if zero_copy:
+        return places, graph
+    return places, [row.tolist() for row in graph]              #O(n^2)
 
 #=======================================================================
 #Function for reading in package data
@@ -150,3 +406,38 @@ def read_package_data(csv_file):
             if i != 0:
                 packages.append(row)
     return packages
+
+#=======================================================================
+#Function for interning addresses
+
+#O(n + m)
+#Where n = the number of places and m = the number of packages
+def create_address_registry(places, packages=()):
+    """
+    Interns the places of an adjacency matrix as integer ids and checks that every package
+    is addressed to one of them.
+
+    A place's id is its index in the adjacency matrix.
+
+    Parameters
+    ----------
+    places : list[str]
+        A list of places that are the nodes of the adjacency matrix
+    packages : list[list[str]]
+        A list of package rows as returned by read_package_data (default = ())
+
+    Returns
+    ----------
+    AddressRegistry
+        The registry of every place
+
+    Raises
+    ----------
+    ValueError
+        If a package's address is not one of the places, since it could not be routed to
+    """
+    registry = AddressRegistry(places)
+    for package in packages:
+        if package[1] not in registry:
+            raise ValueError('package ' + str(package[0]) + ' has an unknown address: ' + repr(package[1]))
+    return registry
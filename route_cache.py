@@ -0,0 +1,324 @@
+"""
+route_cache
+
+This python file contains a least recently used cache of planned routes, so the same set
+of stops is only routed once across trucks, scenarios and re-plans.
+
+A route is stored by the version of the graph's matrix, the hub, the set of stops and a
+description of the solver and its settings. The ordered tour and its distance are returned
+for any order of the same stops. The cache holds at most max_size routes, counts its hits
+and misses, and can be saved to and loaded from a JSON file.
+
+        cache = RouteCache(max_size=4096)
+        truck = Truck(1, time(8, 0, 0), solver=CachedSolver(ExactSolver(), cache))
+
+        * solver_key - describes a solver and its settings as a string
+        * RouteCache - a bounded least recently used cache of routes
+        * CachedSolver - a solver that looks routes up in a RouteCache before solving them
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+
+#O(a)
+#Where a = the number of settings of the solver
+def solver_key(solver):
+    """
+    Describes a solver and its settings as a string, e.g. 'NearestNeighborSolver(improve_time=None)'.
+
+    Settings that are solvers themselves, such as a fallback solver, are described the same way.
+    Attributes whose names start with an underscore are state, not settings, and are left out.
+
+    Parameters
+    ----------
+    solver : object
+        A solver from route_solvers
+
+    Returns
+    ----------
+    str
+        The class name of the solver and its settings in name order
+    """
+    settings = []
+    for name, value in sorted(vars(solver).items()):
+        if name.startswith('_'):
+            continue
+        if hasattr(value, 'solve'):
+            value = solver_key(value)
+        else:
+            value = repr(value)
+        settings.append(name + '=' + value)
+    return type(solver).__name__ + '(' + ', '.join(settings) + ')'
+
+
+class RouteCache:
+    """
+    This class is a bounded least recently used cache of planned routes.
+
+    Attributes
+    ----------
+    max_size : int
+        The largest number of routes kept; the least recently used route is dropped first
+    routes : OrderedDict[tuple, (list[int], float)]
+        The tour and distance of each route, least recently used first
+    hits : int
+        The number of routes found in the cache
+    misses : int
+        The number of routes that had to be solved
+
+    Methods
+    -------
+    key(graph, hub_ix, stops, solver)
+        Builds the cache key of a route
+
+    get(key)
+        Finds a cached route
+
+    put(key, tour, miles)
+        Stores a route
+
+    solve(solver, graph, hub_ix, stops)
+        Finds a route in the cache, or solves and stores it
+
+    stats()
+        Builds the hit and miss statistics of the cache
+
+    save(json_file)
+        Saves the cached routes to a JSON file
+
+    load(json_file)
+        Adds the routes saved in a JSON file to the cache
+    """
+
+    #O(1)
+    def __init__(self, max_size=1024):
+        """
+        Parameters
+        ----------
+        max_size : int
+            The largest number of routes kept (default = 1024)
+        """
+        self.max_size = max_size
+        self.routes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    #O(1)
+    def __len__(self):
+        return len(self.routes)
+
+    #O(k + n^2 the first time a graph is used)
+    #Where k = the number of stops and n = the number of nodes in the graph
+    def key(self, graph, hub_ix, stops, solver):
+        """
+        Builds the cache key of a route.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+        solver : object or str
+            The solver, or its description from solver_key
+
+        Returns
+        ----------
+        tuple
+            The matrix version, hub, frozenset of stops and solver description
+        """
+        if not isinstance(solver, str):
+            solver = solver_key(solver)
+        return graph.matrix_version(), hub_ix, frozenset(stops) - {hub_ix}, solver
+
+    #O(1)
+    def get(self, key):
+        """
+        Finds a cached route and marks it as the most recently used.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the route from key()
+
+        Returns
+        ----------
+        (list[int], float)
+            The tour and its distance including the return to the hub (None if the route is not cached)
+        """
+        route = self.routes.get(key)
+        if route is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.routes.move_to_end(key)
+        return list(route[0]), route[1]
+
+    #O(1)
+    def put(self, key, tour, miles):
+        """
+        Stores a route, dropping the least recently used route if the cache is full.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the route from key()
+        tour : list[int]
+            The node indexes of the stops in the order they are visited
+        miles : float
+            The distance of the tour including the return to the hub
+        """
+        self.routes[key] = (tuple(tour), miles)
+        self.routes.move_to_end(key)
+        while len(self.routes) > self.max_size:
+            self.routes.popitem(last=False)
+
+    #O(k) on a hit, plus the cost of the solver on a miss
+    def solve(self, solver, graph, hub_ix, stops):
+        """
+        Finds a route in the cache, or solves and stores it.
+
+        Parameters
+        ----------
+        solver : object
+            The solver used on a miss
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        """
+        key = self.key(graph, hub_ix, stops, solver)
+        route = self.get(key)
+        if route is None:
+            route = solver.solve(graph, hub_ix, sorted(key[2]))
+            self.put(key, *route)
+        return route
+
+    #O(1)
+    def stats(self):
+        """
+        Builds the hit and miss statistics of the cache.
+
+        Returns
+        ----------
+        dict
+            The number of hits, misses and cached routes, the maximum size and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.routes),
+                'max_size': self.max_size, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    #O(r * k)
+    #Where r = the number of cached routes
+    def save(self, json_file):
+        """
+        Saves the cached routes to a JSON file, least recently used first.
+        The file is written to a temporary file first and then renamed over json_file.
+
+        Parameters
+        ----------
+        json_file : str
+            The name of the file to write
+        """
+        routes = []
+        for (version, hub_ix, stops, solver), (tour, miles) in self.routes.items():
+            routes.append([version, hub_ix, sorted(stops), solver, list(tour), miles])
+        temp_file = json_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({'routes': routes}, f)
+        os.replace(temp_file, json_file)
+
+    #O(r * k)
+    def load(self, json_file):
+        """
+        Adds the routes saved in a JSON file to the cache. A missing file is ignored.
+
+        Parameters
+        ----------
+        json_file : str
+            The name of the file to read
+
+        Returns
+        ----------
+        int
+            The number of routes read
+        """
+        if not os.path.exists(json_file):
+            return 0
+        with open(json_file) as f:
+            routes = json.load(f)['routes']
+        for version, hub_ix, stops, solver, tour, miles in routes:
+            self.put((version, hub_ix, frozenset(stops), solver), tour, miles)
+        return len(routes)
+
+
+class CachedSolver:
+    """
+    This class is a solver that looks routes up in a RouteCache before solving them.
+
+    It has the same solve interface as the solvers in route_solvers, so it can be given to
+    Truck(solver=...) or Simulation(solver=...). Routes planned with deadlines depend on
+    the departure time, so they are not cached and solve_timed is not provided. When it is
+    sent to worker processes, each worker uses its own copy of the cache.
+
+    Attributes
+    ----------
+    solver : object
+        The solver used when a route is not cached
+    cache : RouteCache
+        The cache of routes
+
+    Methods
+    -------
+    solve(graph, hub_ix, stops)
+        Orders the stops of one route, using the cache when it can
+    """
+
+    #O(1)
+    def __init__(self, solver, cache=None):
+        """
+        Parameters
+        ----------
+        solver : object
+            The solver used when a route is not cached
+        cache : RouteCache
+            The cache of routes (default = None, a new RouteCache)
+        """
+        self.solver = solver
+        self.cache = cache if cache is not None else RouteCache()
+
+    #O(k) on a hit, plus the cost of the solver on a miss
+    def solve(self, graph, hub_ix, stops):
+        """
+        Orders the stops of one route, using the cache when it can.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        """
+        return self.cache.solve(self.solver, graph, hub_ix, stops)
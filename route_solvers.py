@@ -0,0 +1,836 @@
+"""
+route_solvers
+
+This python file contains the routing engines that a truck can use to order its stops.
+Every solver has the same interface:
+
+        solve(graph, hub_ix, stops) - returns the stops in the order they are visited
+                                      and the distance of the tour including the return to the hub
+
+A solver is given to Truck(solver=...) or to fleet.plan_routes(solver=...). Solvers only
+store their settings and private counters, so they can be sent to worker processes. A solver that also has a
+solve_timed(graph, hub_ix, stops, deadlines, start) method is given the deadline of each
+stop and the time the truck leaves by the trucks and the simulation.
+
+        * NearestNeighborSolver - the nearest neighbor algorithm, optionally improved with local search
+        * ClarkeWrightSolver - the Clarke-Wright savings algorithm, which can also split stops
+                               into many capacitated routes from the hub in one pass
+        * DeadlineSolver - a nearest neighbor algorithm steered by how urgent each stop's
+                           deadline is, followed by moves that repair late stops
+        * ExactSolver - finds the shortest tour with dynamic programming or branch and bound
+                        for small routes, and uses another solver for larger routes
+
+The helper function used to check deadlines is below:
+
+        * tour_lateness - finds how late each stop of a tour is reached
+"""
+
+import heapq
+from array import array
+from collections import deque
+from itertools import chain, islice
+
+from local_search import EPSILON, improve_tour, tour_length
+
+
+class NearestNeighborSolver:
+    """
+    This class orders stops with the nearest neighbor algorithm.
+
+    Attributes
+    ----------
+    improve_time : float
+        The time budget in seconds for improving the tour with 2-opt and Or-opt moves
+        (None skips the improvement)
+
+    Methods
+    -------
+    solve(graph, hub_ix, stops)
+        Orders the stops of one route
+    """
+
+    #O(1)
+    def __init__(self, improve_time=None):
+        """
+        Parameters
+        ----------
+        improve_time : float
+            The time budget in seconds for improving the tour with local search (default = None)
+        """
+        self.improve_time = improve_time
+
+    #O(k^2)
+    #Where k = the number of stops
+    def solve(self, graph, hub_ix, stops):
+        """
+        Orders the stops of one route.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        """
+        tour, _ = graph.nearest_neighbor_tour(hub_ix, stops)
+        if self.improve_time is not None:
+            return improve_tour(graph.matrix, hub_ix, tour, self.improve_time,
+                                neighbors=graph.neighbors)
+        return tour, tour_length(graph.matrix, hub_ix, tour)
+
+
+class _Routes:
+    """
+    This class is a union-find over stops where each set is a route stored as a deque.
+    """
+
+    #O(k)
+    def __init__(self, stops, demands):
+        self.parent = {stop: stop for stop in stops}
+        self.route = {stop: deque([stop]) for stop in stops}
+        self.load = {stop: demands.get(stop, 1) for stop in stops}
+
+    #O(α(k))
+    def find(self, stop):
+        root = stop
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[stop] != root:
+            self.parent[stop], stop = root, self.parent[stop]
+        return root
+
+    #O(min(|a|, |b|))
+    def join(self, i, j):
+        """
+        Joins the route ending at i to the route ending at j with the edge (i, j).
+        The smaller route is always the one that is copied.
+        """
+        root_i = self.find(i)
+        root_j = self.find(j)
+        if len(self.route[root_i]) < len(self.route[root_j]):
+            root_i, root_j, i, j = root_j, root_i, j, i
+        big = self.route[root_i]
+        small = self.route.pop(root_j)
+        #orient the small route so that j is the end touching i
+        if big[-1] == i:
+            if small[0] != j:
+                small.reverse()
+            big.extend(small)
+        else:
+            if small[-1] != j:
+                small.reverse()
+            big.extendleft(reversed(small))
+        self.parent[root_j] = root_i
+        self.load[root_i] += self.load.pop(root_j)
+
+
+class ClarkeWrightSolver:
+    """
+    This class orders stops with the Clarke-Wright savings algorithm.
+
+    Every stop starts on its own route from the hub. The savings of serving two stops on
+    one route, d(hub, i) + d(hub, j) - d(i, j), are popped from a heap largest first and
+    the routes ending at i and j are merged when the merged route fits the capacity.
+    Routes are tracked with a union-find, so the algorithm is O(k^2 log k).
+
+    Attributes
+    ----------
+    capacity : int
+        The maximum demand of a route used by plan (None for no limit)
+
+    Methods
+    -------
+    solve(graph, hub_ix, stops)
+        Orders the stops of one route
+
+    plan(graph, hub_ix, stops, demands)
+        Splits the stops into routes that fit the capacity and orders each route
+    """
+
+    #O(1)
+    def __init__(self, capacity=None):
+        """
+        Parameters
+        ----------
+        capacity : int
+            The maximum demand of a route used by plan (default = None, no limit)
+        """
+        self.capacity = capacity
+
+    #O(k^2 log k)
+    #Where k = the number of stops
+    def _merge(self, matrix, hub_ix, stops, demands, capacity):
+        """
+        Merges routes by their savings and returns the routes as lists of stops.
+        """
+        stops = sorted(set(stops) - {hub_ix})
+        hub_row = matrix[hub_ix]
+        savings = []
+        for a, i in enumerate(stops):
+            row = matrix[i]
+            for j in stops[a + 1:]:
+                savings.append((row[j] - hub_row[i] - hub_row[j], i, j))
+        heapq.heapify(savings) #a min heap of negative savings pops the largest saving first
+        routes = _Routes(stops, demands)
+        num_routes = len(stops)
+        while savings and num_routes > 1:
+            negative_saving, i, j = heapq.heappop(savings)
+            if capacity is not None and negative_saving >= 0:
+                break
+            root_i = routes.find(i)
+            root_j = routes.find(j)
+            if root_i == root_j:
+                continue
+            route_i = routes.route[root_i]
+            route_j = routes.route[root_j]
+            if i not in (route_i[0], route_i[-1]) or j not in (route_j[0], route_j[-1]):
+                continue
+            if capacity is not None and routes.load[root_i] + routes.load[root_j] > capacity:
+                continue
+            routes.join(i, j)
+            num_routes -= 1
+        plans = [list(route) for route in routes.route.values()]
+        plans.sort(key=min)
+        return plans
+
+    #O(k^2 log k)
+    def solve(self, graph, hub_ix, stops):
+        """
+        Orders the stops of one route.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        """
+        routes = self._merge(graph.matrix, hub_ix, stops, {}, None)
+        tour = routes[0] if routes else []
+        return tour, tour_length(graph.matrix, hub_ix, tour)
+
+    #O(k^2 log k)
+    def plan(self, graph, hub_ix, stops, demands=None):
+        """
+        Splits the stops into routes from the hub that fit the capacity and orders each route.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+        demands : dict[int, int]
+            The demand of each stop, e.g. its number of packages (default = None, 1 per stop)
+
+        Returns
+        ----------
+        list[(list[int], float)]
+            For each route, the stops in the order they are visited and the distance of the
+            tour including the return to the hub
+        """
+        routes = self._merge(graph.matrix, hub_ix, stops, demands or {}, self.capacity)
+        return [(route, tour_length(graph.matrix, hub_ix, route)) for route in routes]
+
+
+#O(k)
+#Where k = the number of stops
+def tour_lateness(matrix, hub_ix, tour, deadlines, start, seconds_per_mile):
+    """
+    Finds how late each stop of a tour is reached.
+
+    Parameters
+    ----------
+    matrix : list[list[float]]
+        An adjacency matrix to represent distances of nodes
+    hub_ix : int
+        The node index of the hub
+    tour : list[int]
+        The node indexes of the stops in the order they are visited
+    deadlines : dict[int, int]
+        The deadline of each stop in seconds after midnight (stops without a deadline are left out)
+    start : int
+        The time the truck leaves the hub in seconds after midnight
+    seconds_per_mile : float
+        The number of seconds a truck takes to travel one mile
+
+    Returns
+    ----------
+    dict[int, float]
+        The number of seconds each late stop is reached after its deadline
+    float
+        The total number of seconds that stops are late
+    """
+    late = {}
+    total = 0
+    clock = start
+    curr_ix = hub_ix
+    for next_ix in tour:
+        clock += matrix[curr_ix][next_ix] * seconds_per_mile
+        curr_ix = next_ix
+        deadline = deadlines.get(next_ix)
+        if deadline is not None and clock > deadline:
+            late[next_ix] = clock - deadline
+            total += clock - deadline
+    return late, total
+
+
+class DeadlineSolver:
+    """
+    This class orders stops by distance and by how urgent their deadlines are.
+
+    Each step picks the stop with the smallest urgency-weighted distance, where the
+    distance to a stop with a deadline is shrunk as its slack (the time left before its
+    deadline when the truck would arrive) falls below the horizon:
+
+        distance * (1 - urgency * (1 - slack / horizon))
+
+    Late stops are then repaired by moving them earlier in the tour, or by moving stops
+    before them later, while that reduces the total lateness, preferring the move that adds
+    the fewest miles. Some deadlines cannot be met from the time the truck leaves, so
+    solve_timed returns the stops that are still late and late_routes counts those routes.
+
+    Attributes
+    ----------
+    speed : float
+        The speed of the truck in miles per hour
+    urgency : float
+        How strongly deadlines steer the order of stops, from 0 (ignored) to below 1
+    horizon : int
+        The slack in seconds below which a deadline starts to steer the order of stops
+    max_repairs : int
+        The maximum number of moves used to repair late stops
+    late_routes : int
+        The number of routes solve_timed returned with stops that are still late
+
+    Methods
+    -------
+    solve(graph, hub_ix, stops)
+        Orders the stops of one route without deadlines
+
+    solve_timed(graph, hub_ix, stops, deadlines, start)
+        Orders the stops of one route so that their deadlines are met
+    """
+
+    #O(1)
+    def __init__(self, speed=18, urgency=0.9, horizon=7200, max_repairs=100):
+        """
+        Parameters
+        ----------
+        speed : float
+            The speed of the truck in miles per hour (default = 18)
+        urgency : float
+            How strongly deadlines steer the order of stops (default = 0.9)
+        horizon : int
+            The slack in seconds below which a deadline steers the order of stops (default = 7200)
+        max_repairs : int
+            The maximum number of moves used to repair late stops (default = 100)
+        """
+        self.speed = speed
+        self.urgency = urgency
+        self.horizon = horizon
+        self.max_repairs = max_repairs
+        self._late_routes = 0
+
+    #O(1)
+    @property
+    def late_routes(self):
+        """
+        The number of routes solve_timed returned with stops that are still late.
+        """
+        return self._late_routes
+
+    #O(k^2)
+    #Where k = the number of stops
+    def solve(self, graph, hub_ix, stops):
+        """
+        Orders the stops of one route without deadlines, like the nearest neighbor algorithm.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        """
+        tour, miles, late = self.solve_timed(graph, hub_ix, stops, {}, 0)
+        return tour, miles
+
+    #O(k^2)
+    def _construct(self, matrix, hub_ix, stops, deadlines, start, seconds_per_mile):
+        """
+        Builds a tour by picking the stop with the smallest urgency-weighted distance at each step.
+        """
+        remaining = sorted(set(stops) - {hub_ix})
+        tour = []
+        clock = start
+        curr_ix = hub_ix
+        while remaining:
+            row = matrix[curr_ix]
+            best_pos = None
+            best_score = float('inf')
+            for pos, ix in enumerate(remaining):
+                dist = row[ix]
+                score = dist
+                deadline = deadlines.get(ix)
+                if deadline is not None:
+                    slack = deadline - (clock + dist * seconds_per_mile)
+                    pressure = min(1, max(0, 1 - slack / self.horizon))
+                    score = dist * (1 - self.urgency * pressure)
+                if score < best_score:
+                    best_score = score
+                    best_pos = pos
+            next_ix = remaining.pop(best_pos)
+            clock += row[next_ix] * seconds_per_mile
+            tour.append(next_ix)
+            curr_ix = next_ix
+        return tour
+
+    #O(k^2)
+    #Where k = the number of stops
+    def _moves(self, pos, k):
+        """
+        Yields the moves where the late stop at pos is moved earlier, or a stop before it is
+        moved after it, as the position of the stop that moves and its position after the move.
+        """
+        for new_pos in range(pos):
+            yield pos, new_pos
+        for old_pos in range(pos):
+            for new_pos in range(pos, k):
+                yield old_pos, new_pos
+
+    #O(k)
+    def _prefixes(self, matrix, hub_ix, tour, deadlines, start, seconds_per_mile):
+        """
+        Finds the arrival time at each position of a tour (the last entry is the start), and
+        the lateness and number of late stops before each position.
+        """
+        arrivals = [0] * len(tour) + [start]
+        prefix = [0] * (len(tour) + 1)
+        counts = [0] * (len(tour) + 1)
+        clock = start
+        curr_ix = hub_ix
+        for pos, next_ix in enumerate(tour):
+            clock += matrix[curr_ix][next_ix] * seconds_per_mile
+            curr_ix = next_ix
+            arrivals[pos] = clock
+            deadline = deadlines.get(next_ix)
+            prefix[pos + 1] = prefix[pos]
+            counts[pos + 1] = counts[pos]
+            if deadline is not None and clock > deadline:
+                prefix[pos + 1] += clock - deadline
+                counts[pos + 1] += 1
+        return arrivals, prefix, counts
+
+    #O(1) for a move that is cut, O(k) otherwise
+    def _moved_lateness(self, matrix, hub_ix, tour, move, arrivals, prefix, counts, deadlines,
+                        limit, seconds_per_mile):
+        """
+        Finds the total lateness of a tour after a move, or None if it is not below limit.
+
+        The stops between the two moved positions, and the stops after them, keep their order
+        and are each reached by the same number of seconds earlier or later. So their lateness
+        is at least the lateness they had, less the shift for each late stop when they are
+        reached earlier, and a move whose bound is not below limit is cut without visiting
+        them. Otherwise the tour is visited again from the first moved position, starting
+        from the arrival time and lateness before it taken from arrivals and prefix.
+        """
+        old_pos, new_pos = move
+        first = min(old_pos, new_pos)
+        last = max(old_pos, new_pos)
+        before = tour[first - 1] if first else hub_ix
+        stop = tour[old_pos]
+        after = tour[last + 1] if last + 1 < len(tour) else hub_ix
+        row = matrix[stop]
+        if old_pos < new_pos:
+            #the stops from old_pos + 1 to new_pos are reached shift seconds earlier or later
+            shift = (matrix[before][tour[old_pos + 1]] - matrix[before][stop]
+                     - row[tour[old_pos + 1]]) * seconds_per_mile
+            between = (old_pos + 1, new_pos + 1)
+            arrival = arrivals[new_pos] + shift + matrix[tour[new_pos]][stop] * seconds_per_mile
+            after_shift = (shift + (matrix[tour[new_pos]][stop] + row[after]
+                                    - matrix[tour[new_pos]][after]) * seconds_per_mile)
+        else:
+            arrival = arrivals[new_pos - 1] + matrix[before][stop] * seconds_per_mile
+            shift = (matrix[before][stop] + row[tour[new_pos]]
+                     - matrix[before][tour[new_pos]]) * seconds_per_mile
+            between = (new_pos, old_pos)
+            after_shift = (shift + (matrix[tour[old_pos - 1]][after] - matrix[tour[old_pos - 1]][stop]
+                                    - row[after]) * seconds_per_mile)
+        bound = prefix[first]
+        deadline = deadlines.get(stop)
+        if deadline is not None and arrival > deadline:
+            bound += arrival - deadline
+        for (lo, hi), moved_by in ((between, shift), ((last + 1, len(tour)), after_shift)):
+            lateness = prefix[hi] - prefix[lo]
+            if moved_by < 0:
+                lateness = max(0, lateness + moved_by * (counts[hi] - counts[lo]))
+            bound += lateness
+        if bound >= limit + EPSILON:
+            return None
+
+        if old_pos < new_pos:
+            moved = tour[old_pos + 1:new_pos + 1] + [stop]
+        else:
+            moved = [stop] + tour[new_pos:old_pos]
+        total = prefix[first]
+        clock = arrivals[first - 1]
+        curr_ix = before
+        for next_ix in chain(moved, islice(tour, last + 1, None)):
+            clock += matrix[curr_ix][next_ix] * seconds_per_mile
+            curr_ix = next_ix
+            deadline = deadlines.get(next_ix)
+            if deadline is not None and clock > deadline:
+                total += clock - deadline
+                if total >= limit:
+                    return None
+        return total
+
+    #O(r * l * k^2) with moves cut in O(1), O(r * l * k^3) in the worst case
+    #Where r = the number of repairs and l = the number of late stops
+    def _repair(self, matrix, hub_ix, tour, deadlines, start, seconds_per_mile):
+        """
+        Moves stops to reduce the total lateness of the late stops.
+        """
+        late, total = tour_lateness(matrix, hub_ix, tour, deadlines, start, seconds_per_mile)
+        for repair in range(self.max_repairs):
+            if not late:
+                break
+            arrivals, prefix, counts = self._prefixes(matrix, hub_ix, tour, deadlines, start,
+                                                      seconds_per_mile)
+            positions = {ix: pos for pos, ix in enumerate(tour)}
+            best = None
+            for ix in sorted(late, key=positions.get):
+                for move in self._moves(positions[ix], len(tour)):  # O(k^2)
+                    candidate_total = self._moved_lateness(matrix, hub_ix, tour, move, arrivals, prefix,
+                                                           counts, deadlines, total - EPSILON,
+                                                           seconds_per_mile)
+                    if candidate_total is None:
+                        continue
+                    old_pos, new_pos = move
+                    candidate = tour[:old_pos] + tour[old_pos + 1:]
+                    candidate.insert(new_pos, tour[old_pos])
+                    key = (candidate_total, tour_length(matrix, hub_ix, candidate))
+                    if best is None or key < best[0]:
+                        best = (key, candidate)
+                if best is not None:
+                    break
+            if best is None:
+                break
+            (total, miles), tour = best
+            late, total = tour_lateness(matrix, hub_ix, tour, deadlines, start, seconds_per_mile)
+        return tour, late
+
+    #O(k^2 + r * l * k^2)
+    def solve_timed(self, graph, hub_ix, stops, deadlines, start):
+        """
+        Orders the stops of one route so that their deadlines are met where possible.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+        deadlines : dict[int, int]
+            The deadline of each stop in seconds after midnight (stops without a deadline are left out)
+        start : int
+            The time the truck leaves the hub in seconds after midnight
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        dict[int, float]
+            The number of seconds each stop that is still late is reached after its deadline.
+            Routes with late stops are counted in late_routes
+        """
+        matrix = graph.matrix
+        seconds_per_mile = 3600 / self.speed
+        tour = self._construct(matrix, hub_ix, stops, deadlines, start, seconds_per_mile)
+        late = {}
+        if deadlines:
+            tour, late = self._repair(matrix, hub_ix, tour, deadlines, start, seconds_per_mile)
+        if late:
+            self._late_routes += 1
+        return tour, tour_length(matrix, hub_ix, tour), late
+
+
+class ExactSolver:
+    """
+    This class finds the shortest tour of a route when the route has few stops.
+
+    Routes with up to max_dp stops are solved with the Held-Karp bitmask dynamic program,
+    which costs O(2^k * k^2) time and stores its table in compact arrays (about 2 seconds
+    for 16 stops). When max_bnb is larger than max_dp, routes with up to max_bnb stops are
+    solved with a depth-first branch and bound search that starts from a nearest neighbor
+    tour improved by local search; the search stops after max_nodes nodes, so its cost
+    stays predictable but the tour it returns may not be the shortest. Larger routes are
+    given to the fallback solver. solve_exact tells whether a tour is proven to be the
+    shortest, and unproven counts the routes solve returned without that proof.
+
+    Attributes
+    ----------
+    max_dp : int
+        The largest number of stops solved with dynamic programming
+    max_bnb : int
+        The largest number of stops solved with branch and bound
+    max_nodes : int
+        The largest number of search nodes branch and bound may visit
+    fallback : object
+        The solver used for routes with more than max_bnb stops
+    unproven : int
+        The number of routes solve returned without proving the tour is the shortest
+
+    Methods
+    -------
+    solve(graph, hub_ix, stops)
+        Orders the stops of one route
+
+    solve_exact(graph, hub_ix, stops)
+        Orders the stops of one route and tells whether the tour is proven to be the shortest
+    """
+
+    #O(1)
+    def __init__(self, max_dp=16, max_bnb=20, max_nodes=100000, fallback=None):
+        """
+        Parameters
+        ----------
+        max_dp : int
+            The largest number of stops solved with dynamic programming (default = 16)
+        max_bnb : int
+            The largest number of stops solved with branch and bound (default = 20)
+        max_nodes : int
+            The largest number of search nodes branch and bound may visit (default = 100000)
+        fallback : object
+            The solver used for larger routes (default = None, nearest neighbor)
+        """
+        self.max_dp = max_dp
+        self.max_bnb = max_bnb
+        self.max_nodes = max_nodes
+        self.fallback = fallback or NearestNeighborSolver()
+        self._unproven = 0
+
+    #O(1)
+    @property
+    def unproven(self):
+        """
+        The number of routes solve returned without proving the tour is the shortest.
+        """
+        return self._unproven
+
+    #O(2^k * k^2)
+    #Where k = the number of stops
+    def _held_karp(self, matrix, hub_ix, nodes):
+        """
+        Finds the shortest tour with the Held-Karp dynamic program.
+
+        The table has an entry for every set of visited stops (a bitmask) and last stop;
+        entry mask * k + j is the length of the shortest path from the hub through the
+        stops of mask that ends at stop j.
+        """
+        k = len(nodes)
+        full = 1 << k
+        inf = float('inf')
+        dist = [[matrix[a][b] for b in nodes] for a in nodes]
+        cost = array('d', [inf]) * (full * k)
+        parent = array('b', [-1]) * (full * k)
+        for j in range(k):
+            cost[(1 << j) * k + j] = matrix[hub_ix][nodes[j]]
+        for mask in range(1, full):
+            base = mask * k
+            for j in range(k):
+                length = cost[base + j]
+                if length == inf:
+                    continue
+                row = dist[j]
+                for next_j in range(k):
+                    if mask >> next_j & 1:
+                        continue
+                    ix = (mask | 1 << next_j) * k + next_j
+                    candidate = length + row[next_j]
+                    if candidate < cost[ix]:
+                        cost[ix] = candidate
+                        parent[ix] = j
+        base = (full - 1) * k
+        last = min(range(k), key=lambda j: (cost[base + j] + matrix[nodes[j]][hub_ix], j))
+        tour = []
+        mask = full - 1
+        while last != -1:
+            tour.append(nodes[last])
+            previous = parent[mask * k + last]
+            mask ^= 1 << last
+            last = previous
+        tour.reverse()
+        return tour
+
+    #O(b * k^2)
+    #Where b = the number of search nodes visited
+    def _branch_and_bound(self, graph, hub_ix, nodes):
+        """
+        Finds the shortest tour with a depth-first branch and bound search.
+
+        A path is cut when its length plus a lower bound of the rest of the tour is not
+        shorter than the best tour found so far. The bound is the larger of two bounds:
+        every unvisited stop, and the hub, still needs one edge into it from the current
+        stop or another unvisited stop, so one adds the shortest such edge of each; the
+        other is the weight of a minimum spanning tree of the current stop, the unvisited
+        stops and the hub.
+
+        Returns
+        ----------
+        list[int]
+            The shortest tour found
+        bool
+            Whether the search finished, which proves the tour is the shortest
+        """
+        matrix = graph.matrix
+        tour, _ = graph.nearest_neighbor_tour(hub_ix, nodes)
+        best_tour, best_length = improve_tour(matrix, hub_ix, tour)
+        best = [best_length - EPSILON, best_tour]
+        budget = [self.max_nodes]
+        path = []
+        remaining = set(nodes)
+
+        def lower_bound(curr_ix):
+            bound = min(matrix[ix][hub_ix] for ix in remaining)
+            for ix in remaining:
+                shortest = matrix[curr_ix][ix]
+                for other in remaining:
+                    if other != ix and matrix[other][ix] < shortest:
+                        shortest = matrix[other][ix]
+                bound += shortest
+            #the rest of the tour is a path from the current stop through every unvisited
+            #stop to the hub, so it is at least as long as a minimum spanning tree of them
+            tree = 0
+            near = {ix: matrix[curr_ix][ix] for ix in remaining}
+            near[hub_ix] = matrix[curr_ix][hub_ix]
+            while near:
+                ix = min(near, key=near.get)
+                tree += near.pop(ix)
+                row = matrix[ix]
+                for other in near:
+                    if row[other] < near[other]:
+                        near[other] = row[other]
+            return max(bound, tree)
+
+        def search(curr_ix, length):
+            budget[0] -= 1
+            if budget[0] < 0:
+                return
+            if not remaining:
+                total = length + matrix[curr_ix][hub_ix]
+                if total < best[0]:
+                    best[0] = total - EPSILON
+                    best[1] = list(path)
+                return
+            if length + lower_bound(curr_ix) >= best[0]:
+                return
+            row = matrix[curr_ix]
+            for next_ix in sorted(remaining, key=lambda ix: (row[ix], ix)):
+                next_length = length + row[next_ix]
+                if next_length >= best[0]:
+                    continue
+                remaining.remove(next_ix)
+                path.append(next_ix)
+                search(next_ix, next_length)
+                path.pop()
+                remaining.add(next_ix)
+
+        search(hub_ix, 0)
+        return best[1], budget[0] >= 0
+
+    #O(2^k * k^2) up to max_dp stops, O(max_nodes * k) up to max_bnb stops
+    def solve_exact(self, graph, hub_ix, stops):
+        """
+        Orders the stops of one route and tells whether the tour is proven to be the shortest.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        bool
+            Whether the tour is proven to be the shortest
+        """
+        nodes = sorted(set(stops) - {hub_ix})
+        if len(nodes) <= 2:
+            tour, proven = nodes, True
+        elif len(nodes) <= self.max_dp:
+            tour, proven = self._held_karp(graph.matrix, hub_ix, nodes), True
+        elif len(nodes) <= self.max_bnb:
+            tour, proven = self._branch_and_bound(graph, hub_ix, nodes)
+        else:
+            tour, miles = self.fallback.solve(graph, hub_ix, nodes)
+            return tour, miles, False
+        return tour, tour_length(graph.matrix, hub_ix, tour), proven
+
+    #O(2^k * k^2) up to max_dp stops, O(max_nodes * k) up to max_bnb stops
+    def solve(self, graph, hub_ix, stops):
+        """
+        Orders the stops of one route, with the shortest tour when the route is small enough.
+        Routes whose tour is not proven to be the shortest are counted in unproven.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hub_ix : int
+            The node index of the hub
+        stops : list[int]
+            The node indexes to visit
+
+        Returns
+        ----------
+        list[int]
+            The node indexes of the stops in the order they are visited
+        float
+            The distance of the tour including the return to the hub
+        """
+        tour, miles, proven = self.solve_exact(graph, hub_ix, stops)
+        if not proven:
+            self._unproven += 1
+        return tour, miles
@@ -0,0 +1,565 @@
+"""
+simulation
+
+This python file contains a discrete event simulation of trucks delivering packages.
+
+Instead of each truck converting miles into a datetime at every stop, every change in the
+day is an event in a priority queue ordered by time:
+
+        * UPDATE - package data changes, e.g. a corrected address
+        * ARRIVE - a truck arrives at a stop and delivers its packages there
+        * RETURN - a truck arrives back at the hub
+        * WAIT - a truck starts waiting at the hub until its next trip may leave
+        * DEPART - a truck loads its next trip and leaves the hub
+
+Times are whole seconds after midnight, so no datetime objects are created while the
+simulation runs. Each event costs O(log e) for e queued events, so hundreds of trucks
+and thousands of events are simulated in one pass.
+
+Every status change of a package and every move of a truck is also recorded in a
+timestamped log. After the whole day has been simulated once, the status at any time is
+found with a binary search of the log, without simulating the day again.
+"""
+
+import heapq
+from bisect import bisect_right
+from collections import deque
+from enum import IntEnum
+
+from package import PackageStatus, format_status, time_to_seconds, seconds_to_time
+from route_solvers import NearestNeighborSolver
+
+
+class EventType(IntEnum):
+    """
+    This class enumerates the events of a simulation.
+
+    Events at the same time are handled in this order, so package updates are seen by
+    trucks leaving at that time and trucks that return at a time can leave again at it.
+    """
+    UPDATE = 0
+    ARRIVE = 1
+    RETURN = 2
+    WAIT = 3
+    DEPART = 4
+
+
+#O(1)
+def to_seconds(clock_time):
+    """
+    Converts a datetime.time (or seconds) into seconds after midnight.
+
+    Parameters
+    ----------
+    clock_time : datetime.time or int
+        A time of day, or a number of seconds after midnight
+
+    Returns
+    ----------
+    int
+        The number of seconds after midnight
+    """
+    if clock_time is None or isinstance(clock_time, int):
+        return clock_time
+    return time_to_seconds(clock_time)
+
+
+class SimTruck:
+    """
+    This class stores the state of one truck in a simulation.
+
+    Attributes
+    ----------
+    number : int
+        The id of the truck
+    time : int
+        The time the truck is free at the hub in seconds after midnight
+    node : int
+        The node index the truck was last at
+    target : int
+        The node index the truck is driving to (None at the hub)
+    mi_traveled : float
+        The total miles traveled
+    trips : deque[(list[int], int)]
+        The package ids and earliest departure time of each trip that has not left yet
+    route : deque[int]
+        The node indexes the truck still has to visit on its current trip
+    cargo : dict[int, list[int]]
+        The package ids on the truck by the node index of their destination
+    visited : list[list[str]]
+        A list containing the paths that the truck took per trip
+    at_hub : bool
+        Indicates if the truck is currently at the hub
+    waiting : bool
+        Indicates if the truck is at the hub waiting until its next trip may leave
+    """
+    __slots__ = ('number', 'time', 'node', 'target', 'mi_traveled', 'trips', 'route', 'cargo',
+                 'visited', 'at_hub', 'waiting')
+
+    #O(1)
+    def __init__(self, number, start, hub_ix):
+        """
+        Parameters
+        ----------
+        number : int
+            The id of the truck
+        start : int
+            The time the truck may first leave the hub in seconds after midnight
+        hub_ix : int
+            The node index of the hub
+        """
+        self.number = number
+        self.time = start
+        self.node = hub_ix
+        self.target = None
+        self.mi_traveled = 0
+        self.trips = deque()
+        self.route = deque()
+        self.cargo = {}
+        self.visited = []
+        self.at_hub = True
+        self.waiting = False
+
+
+class Simulation:
+    """
+    This class simulates a day of deliveries as a sequence of timed events.
+
+    Attributes
+    ----------
+    graph : Graph
+        The graph storing data about all addresses
+    hash_table : ChainHashTable
+        The hash table storing all package information
+    solver : object
+        The routing engine from route_solvers used to order each trip's stops
+    hub_ix : int
+        The node index of the hub
+    seconds_per_mile : float
+        The number of seconds a truck takes to travel one mile
+    trucks : dict[int, SimTruck]
+        The trucks of the simulation by their ids
+    now : int
+        The time of the last handled event in seconds after midnight
+    events : list[tuple]
+        The priority queue of events that have not been handled
+    package_log : dict[int, (list[int], list[(PackageStatus, int, datetime.time)])]
+        For each package id, the times of its status changes and the status, truck and
+        datetime.time the package left the hub after each change
+    truck_log : dict[int, (list[int], list[(int, float, bool, bool)])]
+        For each truck id, the times it left or reached a place or started waiting and the
+        node index, miles traveled, whether it was at the hub and whether it was waiting after each move
+
+    Methods
+    -------
+    add_truck(number, start)
+        Adds a truck that may leave the hub at the given time
+
+    add_trip(number, package_ids, not_before)
+        Queues a trip of packages for a truck
+
+    add_update(at, package_id, **changes)
+        Schedules a change to a package's data
+
+    run(until)
+        Handles events in time order
+
+    package_status_at(package_id, at)
+        Finds the status of a package at a time from the log
+
+    status_text_at(package_id, at)
+        Builds the human-readable status of a package at a time
+
+    truck_state_at(number, at)
+        Finds where a truck was at a time from the log
+    """
+
+    #O(1)
+    def __init__(self, graph, hash_table, solver=None, hub='4001 South 700 East', speed=18):
+        """
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hash_table : ChainHashTable
+            The hash table storing all package information
+        solver : object
+            The routing engine used to order each trip's stops (default = None, nearest neighbor)
+        hub : str
+            The address of the hub (default = '4001 South 700 East')
+        speed : float
+            The speed of every truck in miles per hour (default = 18)
+        """
+        self.graph = graph
+        self.hash_table = hash_table
+        self.solver = solver or NearestNeighborSolver()
+        self.hub_ix = graph.index_of(hub)
+        self.seconds_per_mile = 3600 / speed
+        self.trucks = {}
+        self.now = 0
+        self.events = []
+        self.package_log = {}
+        self.truck_log = {}
+        self._seq = 0
+
+    #O(1)
+    def _log_package(self, package, code, truck_num):
+        """
+        Records a package's status change at the current time.
+        """
+        times, entries = self.package_log.setdefault(package.id, ([], []))
+        times.append(self.now)
+        entries.append((code, truck_num, package.time_left))
+
+    #O(1)
+    def _log_truck(self, truck):
+        """
+        Records a truck's place, miles and whether it is at the hub or waiting at the current time.
+        """
+        times, entries = self.truck_log.setdefault(truck.number, ([], []))
+        times.append(self.now)
+        entries.append((truck.node, truck.mi_traveled, truck.at_hub, truck.waiting))
+
+    #O(log e)
+    #Where e = the number of queued events
+    def _push(self, at, kind, *data):
+        """
+        Queues an event. The sequence number keeps events at the same time in the order they were queued.
+        """
+        self._seq += 1
+        heapq.heappush(self.events, (at, kind, self._seq, data))
+
+    #O(1)
+    def add_truck(self, number, start):
+        """
+        Adds a truck that may leave the hub at the given time.
+
+        Parameters
+        ----------
+        number : int
+            The id of the truck
+        start : datetime.time or int
+            The time the truck may first leave the hub
+
+        Returns
+        ----------
+        SimTruck
+            The state of the new truck
+        """
+        truck = SimTruck(number, to_seconds(start), self.hub_ix)
+        self.trucks[number] = truck
+        self.truck_log[number] = ([truck.time], [(truck.node, 0, True, False)])
+        return truck
+
+    #O(log e)
+    def add_trip(self, number, package_ids, not_before=None):
+        """
+        Queues a trip of packages for a truck. Trips leave in the order they are added.
+
+        Parameters
+        ----------
+        number : int
+            The id of the truck
+        package_ids : list[int]
+            The package ids to deliver on the trip
+        not_before : datetime.time or int
+            The earliest time the trip may leave the hub (default = None)
+        """
+        truck = self.trucks[number]
+        truck.trips.append((list(package_ids), to_seconds(not_before) or 0))
+        if truck.at_hub and len(truck.trips) == 1:
+            self._schedule_trip(truck)
+
+    #O(log e)
+    def add_update(self, at, package_id, **changes):
+        """
+        Schedules a change to a package's data, e.g. add_update(time(10, 20), 9, address='410 S State St').
+
+        Parameters
+        ----------
+        at : datetime.time or int
+            The time the change becomes known
+        package_id : int
+            The unique ID of the package
+        changes : dict
+            The package attributes to change
+
+        Raises
+        ----------
+        ValueError
+            If a changed address is not a node of the graph
+        """
+        if 'address' in changes and changes['address'] not in self.graph.index:
+            raise ValueError('package ' + str(package_id) + ' has an unknown address: '
+                             + repr(changes['address']))
+        self._push(to_seconds(at), EventType.UPDATE, package_id, changes)
+
+    #O(log e)
+    def _schedule_trip(self, truck):
+        """
+        Schedules the departure of a truck's next trip, waiting at the hub if it may not leave yet.
+        A trip added after the simulation has run to a time never leaves before that time.
+        """
+        if not truck.trips:
+            return
+        package_ids, not_before = truck.trips[0]
+        free = max(truck.time, self.now)
+        if not_before > free:
+            self._push(free, EventType.WAIT, truck.number)
+        self._push(max(free, not_before), EventType.DEPART, truck.number)
+
+    #O(log e)
+    def _schedule_leg(self, truck):
+        """
+        Schedules the truck's arrival at its next stop, or back at the hub.
+        """
+        row = self.graph.matrix[truck.node]
+        if truck.route:
+            next_ix = truck.route.popleft()
+            kind = EventType.ARRIVE
+        else:
+            next_ix = self.hub_ix
+            kind = EventType.RETURN
+        miles = row[next_ix]
+        truck.target = next_ix
+        self._push(self.now + round(miles * self.seconds_per_mile), kind, truck.number, next_ix, miles)
+
+    #O(1)
+    def _wait(self, truck):
+        """
+        Records that a truck is waiting at the hub until its next trip may leave.
+        """
+        truck.waiting = True
+        self._log_truck(truck)
+
+    #O(m + k^2)
+    #Where m = the number of packages and k = the number of stops on the trip
+    def _depart(self, truck):
+        """
+        Loads a truck's next trip, orders its stops and sends it to the first stop.
+        """
+        package_ids, not_before = truck.trips.popleft()
+        left_hub = seconds_to_time(self.now)
+        deadlines = {}
+        for package in self.hash_table.search_many(package_ids):
+            if package is None:
+                continue
+            node = package.address_id
+            if node is None:
+                node = self.graph.index_of(package.address)
+            package.time_left = left_hub
+            package.mark_en_route(truck.number)
+            self._log_package(package, PackageStatus.EN_ROUTE, truck.number)
+            truck.cargo.setdefault(node, []).append(package.id)
+            if package.due is not None and package.due * 60 < deadlines.get(node, package.due * 60 + 1):
+                deadlines[node] = package.due * 60
+        if hasattr(self.solver, 'solve_timed'):
+            tour, _, _ = self.solver.solve_timed(self.graph, self.hub_ix, list(truck.cargo),
+                                                 deadlines, self.now)
+        else:
+            tour, _ = self.solver.solve(self.graph, self.hub_ix, list(truck.cargo))
+        truck.route = deque(tour)
+        truck.at_hub = False
+        truck.waiting = False
+        truck.visited.append([self.graph.places[self.hub_ix]])
+        self._log_truck(truck)
+        self._schedule_leg(truck)
+
+    #O(d + log e)
+    #Where d = the number of packages delivered at the stop
+    def _arrive(self, truck, node, miles):
+        """
+        Moves a truck to a stop and delivers the packages for that stop.
+        """
+        truck.node = node
+        truck.mi_traveled += miles
+        truck.visited[-1].append(self.graph.places[node])
+        for package in self.hash_table.search_many(truck.cargo.pop(node, [])):
+            package.mark_delivered(self.now, truck.number)
+            self._log_package(package, PackageStatus.DELIVERED, truck.number)
+        self._log_truck(truck)
+        self._schedule_leg(truck)
+
+    #O(log e)
+    def _return(self, truck, node, miles):
+        """
+        Moves a truck back to the hub and schedules its next trip.
+        """
+        truck.node = node
+        truck.mi_traveled += miles
+        truck.visited[-1].append(self.graph.places[node])
+        truck.target = None
+        truck.at_hub = True
+        truck.time = self.now
+        self._log_truck(truck)
+        self._schedule_trip(truck)
+
+    #O(k)
+    #Where k = the number of stops left on the truck's trip
+    def _reroute(self, truck, package_id, old_node, new_node):
+        """
+        Moves a package on a truck to a new stop. The new stop is inserted into the rest of
+        the trip where it adds the fewest miles, and an emptied stop is dropped from the trip.
+        """
+        if package_id in truck.cargo.get(old_node, ()):
+            truck.cargo[old_node].remove(package_id)
+            if not truck.cargo[old_node]:
+                del truck.cargo[old_node]
+                if old_node in truck.route:
+                    truck.route.remove(old_node)
+        truck.cargo.setdefault(new_node, []).append(package_id)
+        if new_node == truck.target or new_node in truck.route:
+            return
+        matrix = self.graph.matrix
+        path = [truck.target] + list(truck.route) + [self.hub_ix]
+        best_pos = 0
+        best_cost = float('inf')
+        for pos in range(len(path) - 1):
+            prev_ix = path[pos]
+            next_ix = path[pos + 1]
+            cost = matrix[prev_ix][new_node] + matrix[new_node][next_ix] - matrix[prev_ix][next_ix]
+            if cost < best_cost:
+                best_cost = cost
+                best_pos = pos
+        truck.route.insert(best_pos, new_node)
+
+    #O(c + k)
+    #Where c = the number of changes
+    def _update(self, package_id, changes):
+        """
+        Applies changes to a package's data. A changed address also changes the package's
+        address_id, and a package already on a truck is re-routed to its new address.
+        """
+        package = self.hash_table.search(package_id)
+        if package is None:
+            return
+        old_node = package.address_id
+        if old_node is None:
+            old_node = self.graph.index.get(package.address)
+        for name, value in changes.items():
+            setattr(package, name, value)
+        if 'address' in changes and 'address_id' not in changes:
+            package.address_id = self.graph.index.get(package.address)
+        truck = self.trucks.get(package.status_truck)
+        if (package.status_code == PackageStatus.EN_ROUTE and truck is not None
+                and truck.target is not None and package.address_id != old_node):
+            self._reroute(truck, package.id, old_node, package.address_id)
+
+    #O(e log e)
+    #Where e = the number of events
+    def run(self, until=None):
+        """
+        Handles events in time order.
+
+        Parameters
+        ----------
+        until : datetime.time or int
+            If given, events after this time are left in the queue, so the state of
+            the trucks and packages is their state at this time (default = None)
+
+        Returns
+        ----------
+        int
+            The time of the last handled event in seconds after midnight
+        """
+        until = to_seconds(until)
+        while self.events and (until is None or self.events[0][0] <= until):
+            at, kind, seq, data = heapq.heappop(self.events)
+            self.now = at
+            if kind == EventType.UPDATE:
+                self._update(*data)
+                continue
+            truck = self.trucks[data[0]]
+            if kind == EventType.WAIT:
+                self._wait(truck)
+            elif kind == EventType.DEPART:
+                self._depart(truck)
+            elif kind == EventType.ARRIVE:
+                self._arrive(truck, *data[1:])
+            elif kind == EventType.RETURN:
+                self._return(truck, *data[1:])
+        if until is not None:
+            self.now = until
+        return self.now
+
+    #O(log c)
+    #Where c = the number of status changes of the package
+    def package_status_at(self, package_id, at):
+        """
+        Finds the status of a package at a time from the log.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        at : datetime.time or int
+            The time of the status
+
+        Returns
+        ----------
+        PackageStatus
+            The status of the package at the time
+        int
+            The time of the last status change in seconds after midnight (None if at the hub)
+        int
+            The truck carrying or that delivered the package (None if at the hub)
+        datetime.time
+            The time the package left the hub (None if at the hub)
+        """
+        times, entries = self.package_log.get(package_id, ((), ()))
+        ix = bisect_right(times, to_seconds(at)) - 1
+        if ix < 0:
+            return PackageStatus.AT_HUB, None, None, None
+        code, truck_num, left_hub = entries[ix]
+        return code, times[ix], truck_num, left_hub
+
+    #O(log c)
+    def status_text_at(self, package_id, at):
+        """
+        Builds the human-readable status of a package at a time.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        at : datetime.time or int
+            The time of the status
+
+        Returns
+        ----------
+        str
+            The status, e.g. 'en route (Truck 1)'
+        """
+        code, changed, truck_num, left_hub = self.package_status_at(package_id, at)
+        return format_status(code, changed, truck_num)
+
+    #O(log m)
+    #Where m = the number of moves of the truck
+    def truck_state_at(self, number, at):
+        """
+        Finds where a truck was at a time from the log.
+
+        Parameters
+        ----------
+        number : int
+            The id of the truck
+        at : datetime.time or int
+            The time of the state
+
+        Returns
+        ----------
+        str
+            The place the truck last left or reached (None before the truck starts)
+        float
+            The miles traveled by that time
+        bool
+            Whether the truck was at the hub
+        bool
+            Whether the truck was waiting at the hub until its next trip may leave
+        """
+        times, entries = self.truck_log[number]
+        ix = bisect_right(times, to_seconds(at)) - 1
+        if ix < 0:
+            return None, 0, True, False
+        node, miles, at_hub, waiting = entries[ix]
+        return self.graph.places[node], miles, at_hub, waiting
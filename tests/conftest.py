@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def repo_dir(monkeypatch):
+    """
+    Runs every test from the repository root, where the csv files are.
+    """
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from batch import DEFAULT_SCENARIO, _load_context, parse_clock, run_batch, run_scenario, simulate_scenario
+from test_truck import PACKAGES_NEEDED, run_day
+
+
+def test_defaults_match_main():
+    assert DEFAULT_SCENARIO['packages_needed'] == PACKAGES_NEEDED
+    result = run_scenario({}, _load_context('adjacencyMtrx.csv'))
+    truck1, truck2, _ = run_day(False)
+    assert result['total_miles'] == round(truck1.mi_traveled + truck2.mi_traveled, 2)
+    assert [truck['miles'] for truck in result['trucks']] == [round(truck1.mi_traveled, 2),
+                                                             round(truck2.mi_traveled, 2)]
+    assert [truck['returned'] for truck in result['trucks']] == [str(truck1.time), str(truck2.time)]
+    assert result['late'] == {}
+
+
+def test_compiled_constraints_are_checked_on_every_trip():
+    context = _load_context('adjacencyMtrx.csv')
+    simulation, hash_table, loads = simulate_scenario({'packages_needed': None}, context)
+    assert 9 in loads[2] and hash_table.search(9).status.startswith('delivered')
+    #package 9 is held until its address is corrected
+    with pytest.raises(ValueError, match='load 2'):
+        simulate_scenario({'packages_needed': None, 'updates': []}, context)
+    #packages 3, 18, 36 and 38 may only leave on truck 2
+    trips = [{'truck': 2, 'load': 0}, {'truck': 1, 'load': 1}, {'truck': 1, 'load': 2, 'not_before': '10:20'}]
+    with pytest.raises(ValueError, match='load 1 on truck 1'):
+        simulate_scenario({'packages_needed': None, 'trips': trips}, context)
+
+
+def test_parse_clock():
+    assert parse_clock('9:05') == 32700
+    assert parse_clock('13:30:15') == 48615
+    assert parse_clock(0) == 0
+    for clock_time in ('9', '25:00', '24:00', '9:60', '9:05:60', '-1:30'):
+        with pytest.raises(ValueError):
+            parse_clock(clock_time)
+
+
+def test_run_batch_reports_bad_lines():
+    scenarios = io.StringIO('{"id": "a"}\n\nnot json\n{"id": "b", "solver": "clarke_wright"}\n')
+    out = io.StringIO()
+    assert run_batch(scenarios, out, workers=0) == 3
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result['id'] for result in results] == ['a', 3, 'b']
+    assert 'error' in results[1]
+    assert results[2]['total_miles'] > 0
@@ -0,0 +1,36 @@
+import json
+
+from benchmark import HUB, benchmark_hash_tables, compare_results, make_graph, make_packages, save_results
+
+
+def test_make_graph_is_metric():
+    places, matrix = make_graph(12, seed=1)
+    assert places[0] == HUB and len(matrix) == 12
+    for i in range(12):
+        assert matrix[i][i] == 0
+        for j in range(12):
+            assert matrix[i][j] == matrix[j][i]
+            assert all(matrix[i][j] <= matrix[i][k] + matrix[k][j] + 1e-9 for k in range(12))
+
+
+def test_make_packages_uses_places():
+    places, _ = make_graph(12, seed=1)
+    packages = make_packages(30, seed=1, places=places)
+    assert [package.id for package in packages] == list(range(1, 31))
+    assert all(places[package.address_id] == package.address and package.address_id > 0
+               for package in packages)
+
+
+def test_results_are_saved_and_compared(tmp_path):
+    results = benchmark_hash_tables((40,))
+    assert all(result['benchmark'] == 'hash_table' and result['size'] == 40 for result in results)
+    json_file = tmp_path / 'results.json'
+    save_results(results, str(json_file))
+    assert json.loads(json_file.read_text())['results'] == results
+
+    old = [{'benchmark': 'b', 'name': 'n', 'size': 1, 'run_s': 0.01, 'tiny_s': 0.0001}]
+    new = [{'benchmark': 'b', 'name': 'n', 'size': 1, 'run_s': 0.02, 'tiny_s': 0.001},
+           {'benchmark': 'b', 'name': 'other', 'size': 1, 'run_s': 1.0}]
+    regressions = compare_results(old, new)
+    assert [(row['timing'], row['ratio']) for row in regressions] == [('run_s', 2.0)]
+    assert compare_results(old, new, threshold=3) == []
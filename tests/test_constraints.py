@@ -0,0 +1,85 @@
+from datetime import time
+
+import pytest
+
+from constraints import CoDeliveryGroups, compile_constraints
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from main import insert_all_packages
+from read_data import create_address_registry, create_graph_and_places, read_package_data
+from truck import Truck
+
+
+def row(package_id, note):
+    return [str(package_id), '1 Main St', 'Salt Lake City', 'UT', '84101', 'EOD', '1', note]
+
+
+def test_compile_wgu_notes():
+    constraints = compile_constraints(read_package_data('clean_packages.csv'))
+    assert constraints.trucks == {3: 2, 18: 2, 36: 2, 38: 2}
+    assert constraints.release == {6: 32700, 25: 32700, 28: 32700, 32: 32700}
+    assert constraints.held == {9}
+    assert constraints.groups.groups() == [[13, 14, 15, 16, 19, 20]]
+    assert constraints.unparsed == {}
+    assert constraints.needed_loads(16) == [[13, 14, 15, 16, 19, 20],
+                                            [3, 6, 18, 25, 28, 32, 36, 38], [9]]
+
+
+def test_compile_note_variants():
+    constraints = compile_constraints([
+        row(1, 'can only be on TRUCK 3'),
+        row(2, 'Delayed on flight---will not arrive to depot until 10:15 a.m.'),
+        row(3, 'Must be delivered with 4, 5'),
+        row(6, 'Must be delivered with 5'),
+        row(7, 'Fragile'),
+        row(8, ''),
+        row(9, 'Delayed until 9:05am'),
+    ])
+    assert constraints.trucks == {1: 3}
+    assert constraints.release == {2: 36900, 9: 32700}
+    assert constraints.groups.members(6) == [3, 4, 5, 6]
+    assert constraints.groups.members(8) == [8]
+    assert constraints.unparsed == {7: 'Fragile'}
+
+
+def test_union_find_joins_groups():
+    groups = CoDeliveryGroups()
+    groups.union(1, 2)
+    groups.union(3, 4)
+    groups.union(2, 4)
+    groups.union(5, 6)
+    assert groups.find(1) == groups.find(3)
+    assert groups.groups() == [[1, 2, 3, 4], [5, 6]]
+    assert groups.size[groups.find(4)] == 4
+
+
+def test_check_load_and_holds():
+    constraints = compile_constraints(read_package_data('clean_packages.csv'))
+    assert constraints.check_load([13, 14, 15, 16, 19, 20, 1], 1, 28800) == []
+    assert constraints.check_load([13, 14, 15, 1], 1, 28800) == [13, 14, 15]
+    assert constraints.check_load([3, 6], 1, 28800) == [3, 6]
+    assert constraints.check_load([3, 6], 2, 32700) == []
+    assert not constraints.allowed(9)
+    constraints.release_hold(9, 37200)
+    assert not constraints.allowed(9, depart=36000)
+    assert constraints.allowed(9, depart=37200)
+
+
+def test_needed_loads_respect_capacity_and_trucks():
+    constraints = compile_constraints([row(i, 'Can only be on truck ' + str(1 + i % 2)) for i in range(1, 7)])
+    loads = constraints.needed_loads(2)
+    assert sorted(package_id for load in loads for package_id in load) == list(range(1, 7))
+    for load in loads:
+        assert len(load) <= 2
+        assert len({constraints.trucks[package_id] for package_id in load}) == 1
+
+
+def test_truck_rejects_a_load_that_breaks_constraints():
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    table = ChainHashTable()
+    insert_all_packages(rows, table, create_address_registry(places, rows))
+    constraints = compile_constraints(rows)
+    truck = Truck(1, time(8), indexed=True)
+    with pytest.raises(ValueError, match='packages \\[3\\]'):
+        truck.load_and_deliver([1, 3], table, Graph(places, matrix), constraints=constraints)
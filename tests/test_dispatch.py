@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from dispatch import DispatchService, _check_loopback
+
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode() if body is not None else b''
+    writer.write((method + ' ' + path + ' HTTP/1.1\r\nHost: localhost\r\nContent-Length: '
+                  + str(len(data)) + '\r\n\r\n').encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ')[1])
+    if b'Transfer-Encoding: chunked' in head:
+        lines = []
+        while body:
+            size, _, rest = body.partition(b'\r\n')
+            size = int(size, 16)
+            lines.append(rest[:size])
+            body = rest[size + 2:]
+        return status, [json.loads(line) for line in b''.join(lines).splitlines()]
+    return status, json.loads(body)
+
+
+def run_with_service(test):
+    """
+    Runs a test coroutine against a service that plans on a thread and listens on a free port.
+    """
+    async def main():
+        service = DispatchService(workers=0)
+        server = await service.serve(port=0)
+        try:
+            await test(service, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    asyncio.run(main())
+
+
+def test_status_before_and_after_plan():
+    async def test(service, port):
+        status, body = await request(port, 'GET', '/packages/1?at=9:00')
+        assert status == 200 and body['status'] == 'at the hub'
+        assert (await request(port, 'GET', '/trucks'))[0] == 409
+
+        status, plan = await request(port, 'POST', '/plan', {})
+        assert status == 200
+        assert plan['version'] == 1
+        assert plan['total_miles'] == 118.9 and plan['late'] == {}
+
+        status, body = await request(port, 'GET', '/packages?ids=1,9&at=12:00')
+        assert body['packages']['1']['status'].startswith('delivered')
+        status, body = await request(port, 'GET', '/packages/1?at=0:00')
+        assert body['time'] == '00:00:00'
+        assert body['status'] == 'at the hub'
+        status, body = await request(port, 'GET', '/trucks?at=9:00')
+        assert status == 200 and body['trucks']['2']['at_hub']
+        status, body = await request(port, 'GET', '/trucks?at=10:00')
+        assert body['trucks']['1']['at_hub'] and body['trucks']['1']['waiting']
+        assert not body['trucks']['2']['waiting']
+    run_with_service(test)
+
+
+def test_progress_stream():
+    async def test(service, port):
+        await request(port, 'POST', '/plan', {})
+        status, moves = await request(port, 'GET', '/trucks/progress?from=0:00&until=9:00')
+        assert status == 200
+        assert moves[0]['time'] == '08:00:00'
+        assert all(move['time'] <= '09:00:00' for move in moves)
+        assert [move['time'] for move in moves] == sorted(move['time'] for move in moves)
+        status, moves = await request(port, 'GET', '/trucks/progress?from=0:00&until=0:00')
+        assert moves == []
+    run_with_service(test)
+
+
+def test_added_packages_are_delivered():
+    async def test(service, port):
+        items = [{'address': '410 S State St', 'deadline': 'EOD', 'weight': 1} for i in range(20)]
+        status, body = await request(port, 'POST', '/packages', items)
+        assert status == 201 and body['ids'] == list(range(41, 61))
+        status, plan = await request(port, 'POST', '/plan', {})
+        assert status == 200
+        assert all(lateness is not None for lateness in plan['late'].values())
+        assert sorted(id for load in plan['loads'] for id in load) == list(range(1, 61))
+        status, body = await request(port, 'GET', '/packages/60')
+        assert body['status'].startswith('delivered')
+    run_with_service(test)
+
+
+def test_added_package_deadline_without_a_space():
+    async def test(service, port):
+        items = [{'address': '410 S State St', 'deadline': '9:00am', 'weight': 1}]
+        status, body = await request(port, 'POST', '/packages', items)
+        assert status == 201 and body['ids'] == [41]
+    run_with_service(test)
+
+
+def test_bad_requests():
+    async def test(service, port):
+        assert (await request(port, 'POST', '/packages', {'address': 'nowhere'}))[0] == 400
+        assert (await request(port, 'POST', '/packages', {'id': 1, 'address': '410 S State St'}))[0] == 409
+        assert (await request(port, 'POST', '/plan', {'solver': 'bogus'}))[0] == 400
+        assert (await request(port, 'POST', '/plan', {'num_loads': 1, 'packages_needed': []}))[0] == 400
+        updates = [{'at': '10:20', 'package': 9, 'address': 'nowhere'}]
+        assert (await request(port, 'POST', '/plan', {'updates': updates}))[0] == 400
+        assert (await request(port, 'GET', '/packages/99'))[0] == 404
+        assert (await request(port, 'GET', '/packages?at=25'))[0] == 400
+        assert (await request(port, 'GET', '/packages/3?at=25:00'))[0] == 400
+        assert (await request(port, 'GET', '/trucks/progress?until=9:75'))[0] == 400
+        assert (await request(port, 'DELETE', '/plan'))[0] == 405
+        assert (await request(port, 'GET', '/nowhere'))[0] == 404
+    run_with_service(test)
+
+
+def test_only_loopback_hosts():
+    _check_loopback('127.0.0.1')
+    _check_loopback('::1')
+    _check_loopback('localhost')
+    with pytest.raises(ValueError):
+        _check_loopback('0.0.0.0')
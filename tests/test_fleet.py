@@ -0,0 +1,93 @@
+import random
+from datetime import time
+
+import pytest
+
+from benchmark import HUB, make_graph
+from fleet import deliver_fleet, load_deadlines, load_stops, plan_routes
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from main import create_all_loads, insert_all_packages
+from read_data import create_address_registry, create_graph_and_places, read_package_data
+from package import time_to_seconds
+from route_cache import CachedSolver
+from route_solvers import ClarkeWrightSolver, DeadlineSolver, ExactSolver
+from test_truck import PACKAGES_NEEDED, run_day
+from truck import Truck
+
+
+@pytest.mark.parametrize('solver', [None, ClarkeWrightSolver()])
+def test_parallel_plans_match_serial_plans(solver):
+    places, matrix = make_graph(120, seed=2)
+    graph = Graph(places, matrix)
+    rand = random.Random(2)
+    stop_sets = [rand.sample(range(1, 120), 12) for i in range(6)]
+    serial = plan_routes(graph, HUB, stop_sets, workers=0, solver=solver)
+    parallel = plan_routes(graph, HUB, stop_sets, workers=2, solver=solver)
+    assert parallel == serial
+    for stops, (tour, miles) in zip(stop_sets, serial):
+        assert sorted(tour) == sorted(stops)
+
+
+def test_deliver_fleet_matches_trucks():
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    table = ChainHashTable()
+    insert_all_packages(rows, table, create_address_registry(places, rows))
+    graph = Graph(places, matrix)
+    loads = create_all_loads(3, list(range(1, 41)), PACKAGES_NEEDED, table)
+    truck1 = Truck(1, time(8), indexed=True)
+    truck2 = Truck(2, time(9, 5), indexed=True)
+    assert load_stops(loads[0], table, graph) == sorted({table.search(i).address_id for i in loads[0]})
+    plans = deliver_fleet([(truck1, loads[0]), (truck2, loads[1])], table, graph, workers=2)
+    legacy1, legacy2, _ = run_day(False)
+    assert truck1.visited[0] == legacy1.visited[0]
+    assert truck2.visited == legacy2.visited
+    assert truck2.mi_traveled == pytest.approx(legacy2.mi_traveled)
+    assert [miles for tour, miles in plans][1] == pytest.approx(truck2.mi_traveled)
+
+
+def test_parallel_counters_match_serial_counters():
+    places, matrix = make_graph(120, seed=3)
+    graph = Graph(places, matrix)
+    rand = random.Random(3)
+    stop_sets = [rand.sample(range(1, 120), 17) for i in range(4)]
+    serial = ExactSolver(max_nodes=50)
+    parallel = CachedSolver(ExactSolver(max_nodes=50))
+    serial_plans = plan_routes(graph, HUB, stop_sets, workers=0, solver=serial)
+    assert plan_routes(graph, HUB, stop_sets, workers=2, solver=parallel) == serial_plans
+    assert serial.unproven == parallel.solver.unproven == 4
+
+
+def deliver_wgu_day(workers):
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    table = ChainHashTable()
+    insert_all_packages(rows, table, create_address_registry(places, rows))
+    graph = Graph(places, matrix)
+    loads = create_all_loads(3, list(range(1, 41)), PACKAGES_NEEDED, table)
+    truck1 = Truck(1, time(8), indexed=True)
+    truck2 = Truck(2, time(9, 5), indexed=True)
+    solver = DeadlineSolver()
+    assignments = [(truck1, loads[0]), (truck2, loads[1]), (truck1, loads[2])]
+    deadlines = [load_deadlines(load, table, graph) for load in loads]
+    plans = deliver_fleet(assignments, table, graph, workers=workers, solver=solver)
+    return graph, table, loads, deadlines, plans, solver, truck1
+
+
+def test_deliver_fleet_plans_with_deadlines():
+    graph, table, loads, deadlines, plans, solver, truck1 = deliver_wgu_day(0)
+    _, _, _, _, parallel_plans, parallel_solver, _ = deliver_wgu_day(2)
+    assert parallel_plans == plans
+    assert parallel_solver.late_routes == solver.late_routes
+    assert deadlines[0][table.search(13).address_id] == 10 * 3600 + 30 * 60
+    hub_ix = graph.index_of(truck1.hub)
+    expected = DeadlineSolver().solve_timed(graph, hub_ix, load_stops(loads[0], table, graph),
+                                            deadlines[0], time_to_seconds(time(8)))
+    assert plans[0] == expected
+    #truck 1's second load is planned from the time its first route is delivered
+    left = table.search(loads[2][0]).time_left
+    assert left > time(9, 5)
+    expected = DeadlineSolver().solve_timed(graph, hub_ix, load_stops(loads[2], table, graph),
+                                            deadlines[2], time_to_seconds(left))
+    assert plans[2] == expected
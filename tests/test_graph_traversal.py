@@ -0,0 +1,50 @@
+import pytest
+
+from graph_traversal import Graph, np
+
+PLACES = ['a', 'b', 'c', 'd']
+MATRIX = [
+    [0, 1, 4, 6],
+    [1, 0, 2, 5],
+    [4, 2, 0, 3],
+    [6, 5, 3, 0],
+]
+
+needs_numpy = pytest.mark.skipif(np is None, reason='numpy is not installed')
+
+
+@pytest.mark.parametrize('use_numpy', [False, pytest.param(True, marks=needs_numpy)])
+def test_find_nearest_neighbor(use_numpy):
+    graph = Graph(PLACES, MATRIX, use_numpy=use_numpy)
+    assert graph.find_nearest_neighbor('a') == ('b', 1)
+    assert graph.find_nearest_neighbor('d') == ('c', 3)
+
+
+@pytest.mark.parametrize('use_numpy', [False, pytest.param(True, marks=needs_numpy)])
+def test_partial_graph_inplace(use_numpy):
+    graph = Graph(PLACES, [list(row) for row in MATRIX], use_numpy=use_numpy)
+    graph.create_partial_graph(['a', 'c', 'd'], inplace=True)
+    assert graph.matrix == [[0, 4, 6], [4, 0, 3], [6, 3, 0]]
+    assert graph.find_nearest_neighbor('c') == ('d', 3)
+    assert graph.find_nearest_neighbor('a') == ('c', 4)
+
+
+def test_neighbors_match_full_scan():
+    graph = Graph(PLACES, MATRIX)
+    full_tour = graph.nearest_neighbor_tour(0, [1, 2, 3])
+    graph.build_neighbors(2)
+    assert graph.neighbors[0] == [1, 2]
+    assert graph.nearest_neighbor_tour(0, [1, 2, 3]) == full_tour
+
+
+def test_partial_graph_inplace_rebuilds_neighbors():
+    graph = Graph(PLACES, [list(row) for row in MATRIX], num_neighbors=2)
+    graph.create_partial_graph(['a', 'c', 'd'], inplace=True)
+    assert graph.neighbors == [[1, 2], [2, 0], [1, 0]]
+    assert graph.nearest_neighbor_tour(0, [1, 2]) == ([1, 2], 7)
+
+
+def test_partial_graph_follows_place_order():
+    graph = Graph(PLACES, MATRIX)
+    sub_matrix = graph.create_partial_graph(['d', 'a', 'c'])
+    assert sub_matrix == [[0, 6, 3], [6, 0, 4], [3, 4, 0]]
@@ -0,0 +1,80 @@
+from datetime import time
+
+import pytest
+
+from hash_table import ChainHashTable, OpenAddressHashTable
+from package import Package
+
+TABLES = [ChainHashTable, OpenAddressHashTable]
+
+
+def make_package(package_id):
+    return Package(package_id, str(package_id) + ' Main St', 'EOD', 'Salt Lake City', '84101', 1)
+
+
+@pytest.mark.parametrize('table_class', TABLES)
+def test_resize_keeps_every_key(table_class):
+    table = table_class()
+    packages = [make_package(i) for i in range(1, 501)]
+    for package in packages:
+        table.insert(package.id, package)
+    assert table.count == 500
+    assert all(table.search(package.id) is package for package in packages)
+    assert table.search(501) is None
+
+
+@pytest.mark.parametrize('table_class', TABLES)
+def test_insert_many_and_remove(table_class):
+    table = table_class()
+    packages = [make_package(i) for i in range(1, 201)]
+    table.insert_many(packages)
+    for package_id in range(1, 201, 2):
+        table.remove(package_id)
+    found = table.search_many(range(1, 201))
+    assert [package.id for package in found if package] == list(range(2, 201, 2))
+    assert table.count == 100
+
+
+def test_open_address_reuses_deleted_slots():
+    table = OpenAddressHashTable(capacity=8)
+    for round in range(50):
+        table.insert(round, make_package(round))
+        table.remove(round)
+    assert table.capacity == 8
+    assert table.count == 0
+
+
+@pytest.mark.parametrize('load_factor', [0, 1, 1.5, -0.5])
+def test_open_address_rejects_bad_load_factor(load_factor):
+    with pytest.raises(ValueError):
+        OpenAddressHashTable(load_factor=load_factor)
+
+
+@pytest.mark.parametrize('load_factor', [0, -0.5])
+def test_chain_rejects_bad_load_factor(load_factor):
+    with pytest.raises(ValueError):
+        ChainHashTable(load_factor=load_factor)
+
+
+def test_chain_without_load_factor_never_grows():
+    table = ChainHashTable(buckets=4, load_factor=None)
+    table.insert_many([make_package(i) for i in range(1, 21)])
+    table.insert(21, make_package(21))
+    assert table.buckets == 4 and table.count == 21
+    assert table.search(21).id == 21
+    table = ChainHashTable(buckets=4, load_factor=2.5)
+    table.insert_many([make_package(i) for i in range(1, 21)])
+    assert table.buckets == 8
+
+
+@pytest.mark.parametrize('table_class', TABLES)
+def test_bulk_search_and_deliver(table_class):
+    table = table_class()
+    table.insert_many([make_package(i) for i in range(1, 41)])
+    assert [package.id for package in table.search_many([5, 1, 40])] == [5, 1, 40]
+    assert table.search_many([3, 99])[1] is None
+    table.deliver_many([1, 2, 99], time(9, 30), 2)
+    table.deliver(3, time(10), 1)
+    statuses = [package.status for package in table.search_many([1, 2, 3, 4])]
+    assert statuses == ['delivered at 09:30:00 (Truck 2)', 'delivered at 09:30:00 (Truck 2)',
+                        'delivered at 10:00:00 (Truck 1)', 'at the hub']
@@ -0,0 +1,39 @@
+import io
+
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from instrumentation import Instrumentation, profile_call
+from test_truck import run_day
+
+
+def test_instrumentation_counts_calls_and_restores_methods():
+    original = Graph.find_nearest_neighbor
+    with Instrumentation() as stats:
+        assert Graph.find_nearest_neighbor is not original
+        truck1, truck2, _ = run_day(False)
+    assert Graph.find_nearest_neighbor is original
+    assert ChainHashTable.search_many.__name__ == 'search_many'
+    calls = {row['name']: row['calls'] for row in stats.summary()}
+    stops = sum(len(trip) - 2 for truck in (truck1, truck2) for trip in truck.visited)
+    assert calls['Graph.find_nearest_neighbor'] == stops
+    assert calls['Graph.create_partial_graph'] > 0
+    out = io.StringIO()
+    stats.write_collapsed(out)
+    assert any(line.startswith('Graph.find_nearest_neighbor ') for line in out.getvalue().splitlines())
+    stats.reset()
+    assert stats.summary() == []
+
+
+def test_instrumentation_records_nested_stacks():
+    with Instrumentation(['ChainHashTable.search_many', 'Truck.update_cargo']) as stats:
+        run_day(False)
+    assert 'Truck.update_cargo;ChainHashTable.search_many' in stats.stacks
+    assert any(stack.startswith('Truck.update_cargo') for stack in stats.stacks)
+
+
+def test_profile_call_returns_the_result(tmp_path):
+    dump_file = tmp_path / 'profile.out'
+    result, profile = profile_call(sorted, [3, 1, 2], dump_file=str(dump_file))
+    assert result == [1, 2, 3]
+    assert dump_file.exists()
+    assert profile.total_calls > 0
@@ -0,0 +1,72 @@
+from math import ceil
+
+import pytest
+
+from benchmark import HUB, make_graph, make_packages
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from load_builder import create_clustered_loads, create_savings_loads, group_by_stop
+from local_search import tour_length
+
+
+def make_day(num_packages, num_places=60, seed=0):
+    places, matrix = make_graph(num_places, seed)
+    table = ChainHashTable()
+    table.insert_many(make_packages(num_packages, seed, places))
+    return Graph(places, matrix), table, list(range(1, num_packages + 1))
+
+
+@pytest.mark.parametrize('num_packages', [10, 40, 150])
+def test_clustered_loads_fit_every_package_once(num_packages):
+    graph, table, ids = make_day(num_packages)
+    loads = create_clustered_loads(ids, table, graph, HUB)
+    assert sorted(package_id for load in loads for package_id in load) == ids
+    assert all(len(load) <= 16 for load in loads)
+    assert len(loads) == ceil(num_packages / 16)
+
+
+def test_clustered_loads_keep_packages_together():
+    graph, table, ids = make_day(60)
+    together = [[3, 17, 42], [8, 9]]
+    loads = create_clustered_loads(ids, table, graph, HUB, packages_need_lst=together)
+    assert loads[0][:3] == [3, 17, 42] and loads[1][:2] == [8, 9]
+    assert sorted(package_id for load in loads for package_id in load) == ids
+
+
+def test_clustered_loads_are_compact():
+    graph, table, ids = make_day(64, num_places=200, seed=4)
+    loads = create_clustered_loads(ids, table, graph, HUB)
+    naive = [ids[i:i + 16] for i in range(0, 64, 16)]
+
+    def stops_miles(load):
+        stops = list(group_by_stop(load, table, graph))
+        tour, miles = graph.nearest_neighbor_tour(0, stops)
+        return miles
+    assert sum(map(stops_miles, loads)) < sum(map(stops_miles, naive))
+
+
+def test_savings_loads_plan_their_routes():
+    graph, table, ids = make_day(80)
+    loads, plans = create_savings_loads(ids, table, graph, HUB)
+    assert sorted(package_id for load in loads for package_id in load) == ids
+    for load, (route, miles) in zip(loads, plans):
+        assert len(load) <= 16
+        assert sorted(route) == sorted(group_by_stop(load, table, graph))
+        assert miles == pytest.approx(tour_length(graph.matrix, 0, route))
+
+
+@pytest.mark.parametrize('capacity, num_at_hub', [(16, 3), (4, 4)])
+def test_savings_loads_deliver_packages_at_the_hub(capacity, num_at_hub):
+    graph, table, ids = make_day(32)
+    hub_ix = graph.index_of(HUB)
+    for package in table.search_many(ids[:num_at_hub]):
+        package.address = HUB
+        package.address_id = hub_ix
+    loads, plans = create_savings_loads(ids, table, graph, HUB, capacity)
+    assert sorted(package_id for load in loads for package_id in load) == ids
+    routes = [route for route, miles in plans if hub_ix in route]
+    assert len(routes) == 1 and routes[0][0] == hub_ix
+    for load, (route, miles) in zip(loads, plans):
+        assert len(load) <= capacity
+        assert sorted(route) == sorted(group_by_stop(load, table, graph))
+        assert miles == pytest.approx(tour_length(graph.matrix, hub_ix, route))
@@ -0,0 +1,64 @@
+import random
+from itertools import permutations
+
+from benchmark import make_graph
+from graph_traversal import Graph
+from local_search import tour_length, build_neighbor_lists, improve_tour
+
+
+def test_improve_tour_never_lengthens_a_tour():
+    places, matrix = make_graph(30, seed=3)
+    graph = Graph(places, matrix)
+    tour, _ = graph.nearest_neighbor_tour(0, range(1, 30))
+    improved, miles = improve_tour(matrix, 0, tour)
+    assert sorted(improved) == list(range(1, 30))
+    assert miles == tour_length(matrix, 0, improved)
+    assert miles <= tour_length(matrix, 0, tour) + 1e-9
+
+
+def test_improve_tour_is_optimal_on_tiny_tours():
+    places, matrix = make_graph(7, seed=5)
+    best = min(tour_length(matrix, 0, list(order)) for order in permutations(range(1, 7)))
+    _, miles = improve_tour(matrix, 0, [1, 2, 3, 4, 5, 6])
+    assert miles <= best * 1.05
+
+
+def test_neighbor_lists_for_some_sources():
+    matrix = [[0, 1, 2], [1, 0, 3], [2, 3, 0]]
+    assert build_neighbor_lists(matrix, [0, 1, 2], 1) == {0: [1], 1: [0], 2: [0]}
+    assert build_neighbor_lists(matrix, [0, 1, 2], 2, [2]) == {2: [0, 1]}
+
+
+def test_graph_neighbors_are_never_worse_than_route_lists():
+    places, matrix = make_graph(500, seed=1)
+    graph = Graph(places, matrix, num_neighbors=8)
+    rand = random.Random(7)
+    for trial in range(5):
+        stops = rand.sample(range(1, 500), 60)
+        tour, _ = graph.nearest_neighbor_tour(0, stops)
+        _, without = improve_tour(matrix, 0, tour)
+        _, with_graph = improve_tour(matrix, 0, tour, neighbors=graph.neighbors)
+        assert with_graph <= without + 1e-9
+
+
+def test_two_opt_uncrosses_a_tour():
+    points = [(0, 0), (0, 1), (1, 1), (1, 0)]
+    matrix = [[abs(a[0] - b[0]) + abs(a[1] - b[1]) for b in points] for a in points]
+    improved, miles = improve_tour(matrix, 0, [2, 1, 3])
+    assert miles == 4
+    assert improved in ([1, 2, 3], [3, 2, 1])
+
+
+def test_or_opt_moves_a_stop_between_its_neighbors():
+    matrix = [[abs(a - b) for b in range(8)] for a in range(8)]
+    improved, miles = improve_tour(matrix, 0, [1, 2, 6, 3, 4, 5, 7])
+    assert miles == 14
+    assert miles == tour_length(matrix, 0, improved)
+
+
+def test_zero_time_budget_keeps_the_tour():
+    places, matrix = make_graph(30, seed=3)
+    tour = list(range(1, 30))
+    improved, miles = improve_tour(matrix, 0, tour, time_budget=0)
+    assert sorted(improved) == tour
+    assert miles <= tour_length(matrix, 0, tour) + 1e-9
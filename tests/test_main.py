@@ -0,0 +1,61 @@
+from hash_table import ChainHashTable
+from main import PackagePool, create_all_loads, create_load, create_location_index, insert_all_packages
+from read_data import create_address_registry, create_graph_and_places, read_package_data
+from test_truck import PACKAGES_NEEDED
+
+
+def make_table():
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    table = ChainHashTable()
+    insert_all_packages(rows, table, create_address_registry(places, rows))
+    return table
+
+
+def test_location_index_groups_packages():
+    table = make_table()
+    index = create_location_index(range(1, 41), table)
+    assert index['address']['410 S State St'] == [5, 37, 38]
+    assert sum(len(ids) for ids in index['zipcode'].values()) == 40
+    assert set(index) == {'address', 'zipcode', 'city'}
+
+
+def test_create_load_takes_packages_at_the_same_address():
+    table = make_table()
+    ids = list(range(1, 41))
+    pool = PackagePool(ids, create_location_index(ids, table))
+    load = create_load([37], pool, table)
+    assert load[0] == 37 and 38 in load
+    assert len(load) <= 16
+    assert sorted(load + pool.rest(40)) == ids
+
+
+def test_package_pool_takes_each_package_once_in_order():
+    table = make_table()
+    ids = list(range(1, 41))
+    pool = PackagePool(ids, create_location_index(ids, table))
+    assert pool.nearby('address', ['410 S State St'], 2) == [5, 37]
+    assert pool.first() == 1
+    assert pool.nearby('address', ['410 S State St'], 2) == [38]
+    assert 38 not in pool and len(pool) == 36
+    assert pool.rest(3) == [2, 3, 4]
+    rest = pool.rest(40)
+    assert rest == [i for i in range(6, 41) if i not in (37, 38)]
+    assert len(pool) == 0 and pool.first() is None
+
+
+def test_create_all_loads_places_every_package_once():
+    table = make_table()
+    loads = create_all_loads(3, list(range(1, 41)), PACKAGES_NEEDED, table)
+    assert len(loads) == 3
+    assert sorted(package_id for load in loads for package_id in load) == list(range(1, 41))
+    assert all(len(load) <= 16 for load in loads)
+    for load, needed in zip(loads, PACKAGES_NEEDED):
+        assert load[:len(needed)] == needed
+
+
+def test_create_all_loads_spills_into_loads_with_room():
+    table = make_table()
+    loads = create_all_loads(3, list(range(1, 41)), [], table, max_load_size=14)
+    assert sorted(package_id for load in loads for package_id in load) == list(range(1, 41))
+    assert all(len(load) <= 14 for load in loads)
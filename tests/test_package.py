@@ -0,0 +1,51 @@
+from datetime import time
+
+import pytest
+
+from package import (Package, PackageStatus, PackageStore, deadline_minutes, format_status,
+                     seconds_to_time, time_to_seconds)
+
+
+def make_package(package_id=1, address='410 S State St', deadline='10:30 AM'):
+    return Package(package_id, address, deadline, 'Salt Lake City', '84111', 2)
+
+
+@pytest.mark.parametrize('deadline, minutes', [('10:30 AM', 630), ('12:00 PM', 720), ('12:15 AM', 15),
+                                               ('1:05 pm', 785), ('9:05am', 545), ('9:00AM', 540),
+                                               ('EOD', None), ('', None)])
+def test_deadline_minutes(deadline, minutes):
+    assert deadline_minutes(deadline) == minutes
+
+
+def test_time_conversions():
+    assert time_to_seconds(time(9, 5, 30)) == 32730
+    assert seconds_to_time(32730) == time(9, 5, 30)
+    assert format_status(PackageStatus.EN_ROUTE, None, 2) == 'en route (Truck 2)'
+
+
+def test_package_status_and_lateness():
+    package = make_package()
+    assert not hasattr(package, '__dict__')
+    assert package.status == 'at the hub' and package.lateness() is None
+    package.mark_en_route(1)
+    assert package.status == 'en route (Truck 1)'
+    package.mark_delivered(630 * 60 + 90, 1)
+    assert package.status == 'delivered at 10:31:30 (Truck 1)'
+    assert package.lateness() == 90
+    package.deadline = 'EOD'
+    assert package.due is None and package.lateness() == 0
+
+
+def test_package_store_matches_packages():
+    packages = [make_package(1), make_package(2, '1060 Dalton Ave S', 'EOD'), make_package(3)]
+    store = PackageStore({'1060 Dalton Ave S': 0})
+    store.append_many(packages)
+    assert len(store) == 3
+    assert list(store.address_ix) == [1, 0, 1]
+    assert store.addresses == ['1060 Dalton Ave S', '410 S State St']
+    assert list(store.deadline) == [630, -1, 630]
+    store.mark_en_route(2, 1)
+    store.mark_delivered(3, 36000, 2)
+    packages[1].mark_en_route(1)
+    packages[2].mark_delivered(36000, 2)
+    assert [store.status(package.id) for package in packages] == [package.status for package in packages]
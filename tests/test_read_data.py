@@ -0,0 +1,92 @@
+import io
+import os
+import pickle
+
+import pytest
+
+from graph_traversal import Graph
+from read_data import (CACHE_SUFFIX, clean_matrix, clean_places, create_address_registry,
+                       create_graph_and_places, load_adjacency_matrix, load_matrix_cache,
+                       read_adjacency_matrix, read_package_data, np)
+
+needs_numpy = pytest.mark.skipif(np is None, reason='numpy is not installed')
+
+
+def test_registry_ids_are_graph_indexes():
+    places, _ = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    registry = create_address_registry(places, rows)
+    assert len(registry) == len(places)
+    assert all(registry.id_of(row[1]) == places.index(row[1]) for row in rows)
+
+
+def test_registry_rejects_unknown_addresses():
+    places, _ = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    rows.append(['41', '1 Nowhere Ln', 'Salt Lake City', 'UT', '84101', 'EOD', '1', ''])
+    with pytest.raises(ValueError, match='package 41'):
+        create_address_registry(places, rows)
+
+
+SMALL_CSV = ('"Hub\n1 Hub St, ","A Place\n 2 A St","B Place\n 3 B St"\n'
+             '0,1.5,2\n1.5,0,3.25\n2,3.25,0\n')
+
+
+def write_small_csv(tmp_path, text=SMALL_CSV):
+    csv_file = tmp_path / 'matrix.csv'
+    csv_file.write_text(text, newline='')
+    return str(csv_file)
+
+
+def test_load_adjacency_matrix_matches_csv_parse():
+    places, matrix = load_adjacency_matrix('adjacencyMtrx.csv')
+    old_places, old_matrix = read_adjacency_matrix('adjacencyMtrx.csv')
+    assert places == clean_places(old_places)
+    assert [list(row) for row in matrix] == clean_matrix(old_matrix)
+
+
+@pytest.mark.parametrize('use_numpy', [False, pytest.param(True, marks=needs_numpy)])
+def test_load_adjacency_matrix_from_a_file_object(use_numpy):
+    places, matrix = load_adjacency_matrix(io.StringIO(SMALL_CSV), use_numpy=use_numpy)
+    assert places == ['1 Hub St', '2 A St', '3 B St']
+    assert [list(row) for row in matrix] == [[0, 1.5, 2], [1.5, 0, 3.25], [2, 3.25, 0]]
+
+
+@pytest.mark.parametrize('text', [SMALL_CSV + '1,2,3\n', SMALL_CSV.replace('1.5,0,3.25\n', '1.5,0\n'),
+                                  SMALL_CSV.replace('2,3.25,0\n', '')])
+def test_load_adjacency_matrix_rejects_bad_shapes(text):
+    with pytest.raises(ValueError):
+        load_adjacency_matrix(io.StringIO(text))
+
+
+def test_matrix_cache_round_trip(tmp_path):
+    csv_file = write_small_csv(tmp_path)
+    places, matrix = create_graph_and_places(csv_file)
+    assert os.path.exists(csv_file + CACHE_SUFFIX)
+    cached_places, cached_matrix = load_matrix_cache(csv_file)
+    assert cached_places == places
+    assert [list(row) for row in cached_matrix] == [list(row) for row in matrix]
+    assert create_graph_and_places(csv_file)[0] == places
+
+
+def test_graph_rows_are_lists_unless_zero_copy(tmp_path):
+    csv_file = write_small_csv(tmp_path)
+    create_graph_and_places(csv_file)
+    places, matrix = create_graph_and_places(csv_file)
+    assert all(type(row) is list for row in matrix)
+    matrix[0][1] = 9.5
+    graph = pickle.loads(pickle.dumps(Graph(places, matrix)))
+    assert graph.matrix[0][1] == 9.5
+    _, view = create_graph_and_places(csv_file, zero_copy=True)
+    assert isinstance(view[0], memoryview) and view[0].readonly
+    assert [list(row) for row in view] != matrix
+
+
+def test_matrix_cache_is_stale_after_a_change(tmp_path):
+    csv_file = write_small_csv(tmp_path)
+    create_graph_and_places(csv_file)
+    write_small_csv(tmp_path, SMALL_CSV.replace('3.25', '4.755'))
+    assert load_matrix_cache(csv_file) == (None, None)
+    places, matrix = create_graph_and_places(csv_file)
+    assert matrix[1][2] == 4.755
+    assert load_matrix_cache(csv_file)[1][2][1] == 4.755
@@ -0,0 +1,99 @@
+from graph_traversal import Graph
+from route_cache import RouteCache, CachedSolver, solver_key
+from route_solvers import NearestNeighborSolver
+
+PLACES = ['hub', 'a', 'b', 'c', 'd']
+MATRIX = [
+    [0, 2, 4, 6, 3],
+    [2, 0, 3, 5, 4],
+    [4, 3, 0, 2, 6],
+    [6, 5, 2, 0, 7],
+    [3, 4, 6, 7, 0],
+]
+
+
+class CountingSolver(NearestNeighborSolver):
+    """
+    Counts its solves in a class attribute, so the count is not one of its settings.
+    """
+    calls = 0
+
+    def __init__(self):
+        super().__init__()
+        CountingSolver.calls = 0
+
+    def solve(self, graph, hub_ix, stops):
+        CountingSolver.calls += 1
+        return super().solve(graph, hub_ix, stops)
+
+
+def make_graph():
+    return Graph(list(PLACES), [list(row) for row in MATRIX])
+
+
+def test_same_stops_in_any_order_hit():
+    graph = make_graph()
+    solver = CountingSolver()
+    cached = CachedSolver(solver)
+    first = cached.solve(graph, 0, [3, 1, 2])
+    second = cached.solve(graph, 0, [2, 3, 1, 0])
+    assert first == second == NearestNeighborSolver().solve(graph, 0, [1, 2, 3])
+    assert solver.calls == 1
+    assert cached.cache.stats()['hits'] == 1
+    assert cached.cache.stats()['misses'] == 1
+
+
+def test_least_recently_used_route_is_dropped():
+    graph = make_graph()
+    solver = CountingSolver()
+    cache = RouteCache(max_size=2)
+    cache.solve(solver, graph, 0, [1])
+    cache.solve(solver, graph, 0, [2])
+    cache.solve(solver, graph, 0, [1])
+    cache.solve(solver, graph, 0, [3])
+    assert len(cache) == 2
+    cache.solve(solver, graph, 0, [1])
+    assert solver.calls == 3
+    cache.solve(solver, graph, 0, [2])
+    assert solver.calls == 4
+
+
+def test_solver_settings_are_part_of_the_key():
+    assert solver_key(NearestNeighborSolver()) != solver_key(NearestNeighborSolver(improve_time=1))
+
+
+def test_changed_matrix_misses():
+    graph = make_graph()
+    solver = CountingSolver()
+    cache = RouteCache()
+    cache.solve(solver, graph, 0, [1, 2, 3])
+    graph.create_partial_graph(['hub', 'a', 'c', 'd'], inplace=True)
+    tour, miles = cache.solve(solver, graph, 0, [1, 2, 3])
+    assert solver.calls == 2
+    assert miles == NearestNeighborSolver().solve(graph, 0, [1, 2, 3])[1]
+
+
+def test_changed_distance_misses_once_version_is_cleared():
+    graph = make_graph()
+    solver = CountingSolver()
+    cache = RouteCache()
+    cache.solve(solver, graph, 0, [1, 2])
+    graph.matrix[0][2] = graph.matrix[2][0] = 1
+    graph.version = None
+    cache.solve(solver, graph, 0, [1, 2])
+    assert solver.calls == 2
+
+
+def test_save_and_load(tmp_path):
+    graph = make_graph()
+    cache = RouteCache()
+    route = cache.solve(CountingSolver(), graph, 0, [1, 2, 3])
+    json_file = str(tmp_path / 'routes.json')
+    cache.save(json_file)
+
+    loaded = RouteCache()
+    assert loaded.load(json_file) == 1
+    solver = CountingSolver()
+    assert loaded.solve(solver, graph, 0, [3, 2, 1]) == route
+    assert solver.calls == 0
+    assert RouteCache().load(str(tmp_path / 'missing.json')) == 0
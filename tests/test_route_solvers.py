@@ -0,0 +1,153 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from benchmark import make_graph
+from graph_traversal import Graph
+from local_search import tour_length
+from route_cache import solver_key
+from route_solvers import NearestNeighborSolver, ClarkeWrightSolver, DeadlineSolver, ExactSolver, tour_lateness
+
+
+def brute_force(matrix, hub_ix, stops):
+    return min(tour_length(matrix, hub_ix, list(order)) for order in permutations(stops))
+
+
+def random_route(num_stops, seed, num_places=40):
+    places, matrix = make_graph(num_places, seed)
+    stops = random.Random(seed).sample(range(1, num_places), num_stops)
+    return Graph(places, matrix), stops
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_exact_solver_matches_brute_force(seed):
+    graph, stops = random_route(3 + seed % 5, seed)
+    tour, miles, proven = ExactSolver().solve_exact(graph, 0, stops)
+    assert proven
+    assert sorted(tour) == sorted(stops)
+    assert miles == pytest.approx(brute_force(graph.matrix, 0, stops))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_branch_and_bound_matches_brute_force(seed):
+    graph, stops = random_route(7, seed)
+    tour, miles, proven = ExactSolver(max_dp=0, max_bnb=10).solve_exact(graph, 0, stops)
+    assert proven
+    assert miles == pytest.approx(brute_force(graph.matrix, 0, stops))
+
+
+def test_branch_and_bound_matches_held_karp():
+    graph, stops = random_route(11, 3)
+    _, dp_miles, _ = ExactSolver().solve_exact(graph, 0, stops)
+    tour, bnb_miles, proven = ExactSolver(max_dp=0, max_bnb=11).solve_exact(graph, 0, stops)
+    assert bnb_miles >= dp_miles - 1e-9
+    if proven:
+        assert bnb_miles == pytest.approx(dp_miles)
+
+
+def test_default_solver_uses_branch_and_bound_above_max_dp(monkeypatch):
+    graph, stops = random_route(17, 5)
+    solver = ExactSolver(max_nodes=200)
+    calls = []
+    branch_and_bound = solver._branch_and_bound
+    monkeypatch.setattr(solver, '_branch_and_bound', lambda *args: calls.append(args) or branch_and_bound(*args))
+    tour, miles, proven = solver.solve_exact(graph, 0, stops)
+    assert len(calls) == 1 and not proven
+    assert sorted(tour) == sorted(stops)
+    assert miles <= NearestNeighborSolver().solve(graph, 0, stops)[1] + 1e-9
+    graph, stops = random_route(21, 5)
+    solver.solve_exact(graph, 0, stops)
+    assert len(calls) == 1
+
+
+def test_unproven_routes_are_counted():
+    graph, stops = random_route(12, 1)
+    solver = ExactSolver(max_dp=0, max_bnb=12, max_nodes=10)
+    tour, miles, proven = solver.solve_exact(graph, 0, stops)
+    assert not proven
+    assert solver.unproven == 0
+    solver.solve(graph, 0, stops)
+    assert solver.unproven == 1
+    ExactSolver(max_dp=3, max_bnb=3).solve(graph, 0, stops)
+    assert solver_key(solver) == solver_key(ExactSolver(max_dp=0, max_bnb=12, max_nodes=10))
+
+
+def test_exact_solver_on_wgu_stops():
+    from read_data import create_graph_and_places
+    places, matrix = create_graph_and_places()
+    graph = Graph(places, matrix)
+    stops = list(range(1, 9))
+    _, miles = ExactSolver().solve(graph, 0, stops)
+    assert miles == pytest.approx(brute_force(matrix, 0, stops))
+    _, nn_miles = NearestNeighborSolver().solve(graph, 0, stops)
+    assert miles <= nn_miles + 1e-9
+
+
+@pytest.mark.parametrize('solver', [NearestNeighborSolver(), NearestNeighborSolver(improve_time=1),
+                                    ClarkeWrightSolver(), DeadlineSolver(), ExactSolver()])
+def test_solvers_visit_every_stop_once(solver):
+    graph, stops = random_route(10, 11)
+    tour, miles = solver.solve(graph, 0, stops + [0])
+    assert sorted(tour) == sorted(stops)
+    assert miles == pytest.approx(tour_length(graph.matrix, 0, tour))
+
+
+def manhattan_graph(points):
+    matrix = [[abs(a[0] - b[0]) + abs(a[1] - b[1]) for b in points] for a in points]
+    return Graph([str(i) for i in range(len(points))], matrix)
+
+
+def test_deadline_repair_moves_earlier_stops_later():
+    graph = manhattan_graph([(3, 6), (1, 3), (3, 3), (4, 6), (6, 2)])
+    deadlines = {1: 2200, 4: 2200}
+    solver = DeadlineSolver()
+    tour, miles, late = solver.solve_timed(graph, 0, [1, 2, 3, 4], deadlines, 0)
+    assert late == {}
+    assert tour_lateness(graph.matrix, 0, tour, deadlines, 0, 200) == ({}, 0)
+    assert solver.late_routes == 0
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_deadline_moves_are_evaluated_incrementally(seed):
+    graph, stops = random_route(12, seed)
+    rand = random.Random(seed)
+    deadlines = {ix: rand.randrange(600, 3000) for ix in stops if rand.random() < 0.7}
+    solver = DeadlineSolver()
+    spm = 3600 / solver.speed
+    late, total = tour_lateness(graph.matrix, 0, stops, deadlines, 0, spm)
+    arrivals, prefix, counts = solver._prefixes(graph.matrix, 0, stops, deadlines, 0, spm)
+    assert total > 0 and prefix[-1] == total
+    for pos in range(len(stops)):
+        for old_pos, new_pos in solver._moves(pos, len(stops)):
+            moved = stops[:old_pos] + stops[old_pos + 1:]
+            moved.insert(new_pos, stops[old_pos])
+            _, expected = tour_lateness(graph.matrix, 0, moved, deadlines, 0, spm)
+            args = (graph.matrix, 0, stops, (old_pos, new_pos), arrivals, prefix, counts, deadlines)
+            assert solver._moved_lateness(*args, float('inf'), spm) == expected
+            cut = solver._moved_lateness(*args, total, spm)
+            assert (cut is None) == (expected >= total)
+
+
+def test_deadline_solver_counts_late_routes():
+    graph = manhattan_graph([(0, 0), (5, 0), (0, 1)])
+    solver = DeadlineSolver()
+    tour, miles, late = solver.solve_timed(graph, 0, [1, 2], {1: 600}, 0)
+    assert tour[0] == 1 and late == {1: 400}
+    assert solver.late_routes == 1
+    solver.solve_timed(graph, 0, [1, 2], {1: 1000}, 0)
+    solver.solve(graph, 0, [1, 2])
+    assert solver.late_routes == 1
+    assert solver_key(solver) == solver_key(DeadlineSolver())
+
+
+def test_clarke_wright_plan_respects_capacity():
+    graph, stops = random_route(30, 5, num_places=60)
+    demands = {stop: 1 + stop % 4 for stop in stops}
+    routes = ClarkeWrightSolver(capacity=16).plan(graph, 0, stops, demands)
+    assert sorted(stop for route, miles in routes for stop in route) == sorted(stops)
+    for route, miles in routes:
+        assert sum(demands[stop] for stop in route) <= 16
+        assert miles == pytest.approx(tour_length(graph.matrix, 0, route))
+    separate = sum(2 * graph.matrix[0][stop] for stop in stops)
+    assert sum(miles for route, miles in routes) < separate
@@ -0,0 +1,109 @@
+from datetime import time
+
+import pytest
+
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from main import create_all_loads, insert_all_packages
+from read_data import create_address_registry, create_graph_and_places, read_package_data
+from simulation import Simulation
+from test_truck import PACKAGES_NEEDED
+
+
+def make_simulation():
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    table = ChainHashTable()
+    insert_all_packages(rows, table, create_address_registry(places, rows))
+    return Simulation(Graph(places, matrix), table), table
+
+
+def test_update_rejects_unknown_address():
+    simulation, _ = make_simulation()
+    with pytest.raises(ValueError, match='package 9'):
+        simulation.add_update(time(10, 20), 9, address='1 Nowhere Ln')
+
+
+def test_update_changes_address_id():
+    simulation, table = make_simulation()
+    simulation.add_update(time(10, 20), 9, address='410 S State St')
+    simulation.run()
+    assert table.search(9).address_id == simulation.graph.index_of('410 S State St')
+
+
+def test_wait_is_logged():
+    simulation, table = make_simulation()
+    simulation.add_truck(1, time(8))
+    simulation.add_trip(1, [1, 2])
+    simulation.add_trip(1, [9], not_before=time(13))
+    simulation.run()
+    times, entries = simulation.truck_log[1]
+    waits = [at for at, entry in zip(times, entries) if entry[3]]
+    assert len(waits) == 1 and waits[0] < 13 * 3600
+    assert simulation.truck_state_at(1, times[1])[2:] == (False, False)
+    assert simulation.truck_state_at(1, waits[0])[2:] == (True, True)
+    assert simulation.truck_state_at(1, time(12, 59))[2:] == (True, True)
+    assert simulation.truck_state_at(1, time(13))[2:] == (False, False)
+    assert table.search(9).status_time is not None
+
+
+def test_waits_before_first_trip():
+    simulation, _ = make_simulation()
+    simulation.add_truck(1, time(8))
+    simulation.add_trip(1, [1], not_before=time(9, 5))
+    simulation.run()
+    place, miles, at_hub, waiting = simulation.truck_state_at(1, time(9))
+    assert place == '4001 South 700 East' and miles == 0 and at_hub and waiting
+    assert not simulation.truck_state_at(1, time(9, 5))[3]
+
+
+def wgu_simulation():
+    simulation, table = make_simulation()
+    simulation.add_truck(1, time(8))
+    simulation.add_truck(2, time(9, 5))
+    loads = create_all_loads(3, list(range(1, 41)), PACKAGES_NEEDED, table)
+    simulation.add_trip(1, loads[0])
+    simulation.add_trip(2, loads[1])
+    simulation.add_trip(1, loads[2], not_before=time(10, 20))
+    simulation.add_update(time(10, 20), 9, address='410 S State St')
+    return simulation, table
+
+
+@pytest.mark.parametrize('at', [time(7), time(8, 45), time(9, 5), time(10, 20), time(11, 30), time(17)])
+def test_snapshots_match_a_simulation_stopped_at_the_time(at):
+    full, _ = wgu_simulation()
+    full.run()
+    stopped, table = wgu_simulation()
+    stopped.run(until=at)
+    for package in table.search_many(range(1, 41)):
+        assert full.status_text_at(package.id, at) == package.status
+    for number, truck in stopped.trucks.items():
+        place, miles, at_hub, waiting = full.truck_state_at(number, at)
+        assert miles == pytest.approx(truck.mi_traveled)
+        assert at_hub == truck.at_hub and waiting == truck.waiting
+
+
+def test_trip_added_after_a_partial_run_leaves_later():
+    simulation, table = make_simulation()
+    simulation.add_truck(1, time(8))
+    simulation.run(until=time(10))
+    simulation.add_trip(1, [1, 2])
+    simulation.run()
+    times, entries = simulation.truck_log[1]
+    assert times == sorted(times)
+    assert times[1] == 36000
+    assert simulation.status_text_at(1, time(9)) == 'at the hub'
+    assert table.search(1).status_time > 36000
+
+
+def test_address_change_reroutes_a_package_on_a_truck():
+    simulation, table = wgu_simulation()
+    simulation.add_update(time(9, 10), 3, address='410 S State St')
+    simulation.run()
+    package = table.search(3)
+    times, entries = simulation.package_log[3]
+    assert package.status_truck == 2 and package.address_id == simulation.graph.index_of('410 S State St')
+    trip = simulation.trucks[2].visited[0]
+    assert '410 S State St' in trip
+    at_stop = simulation.truck_state_at(2, times[-1])
+    assert at_stop[0] == '410 S State St'
@@ -0,0 +1,137 @@
+from datetime import time
+
+import pytest
+
+from graph_traversal import Graph
+from hash_table import ChainHashTable
+from main import create_address_registry, create_all_loads, create_graph_and_places, insert_all_packages
+from read_data import read_package_data
+from truck import Truck
+
+PACKAGES_NEEDED = [
+    [13, 14, 15, 16, 19, 20, 29, 30, 31, 37, 40],
+    [25, 3, 6, 18, 28, 32, 36, 38],
+    [9],
+]
+
+
+def run_day(indexed):
+    """
+    Runs main.py's WGU day and returns the trucks and the package hash table.
+    """
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    registry = create_address_registry(places, rows)
+    table = ChainHashTable()
+    insert_all_packages(rows, table, registry)
+    graph = Graph(places, matrix)
+    truck1 = Truck(1, time(8), indexed=indexed)
+    truck2 = Truck(2, time(9, 5), indexed=indexed)
+    loads = create_all_loads(3, list(range(1, 41)), PACKAGES_NEEDED, table)
+    truck1.load_and_deliver(loads[0], table, graph)
+    truck2.load_and_deliver(loads[1], table, graph)
+    truck1.time = time(10, 20)
+    package9 = table.search(9)
+    package9.address = '410 S State St'
+    package9.address_id = registry.intern(package9.address)
+    truck1.load_and_deliver(loads[2], table, graph)
+    return truck1, truck2, table
+
+
+def test_indexed_routing_matches_legacy():
+    legacy = run_day(False)
+    indexed = run_day(True)
+    for old, new in zip(legacy[:2], indexed[:2]):
+        assert old.mi_traveled == pytest.approx(new.mi_traveled)
+        assert old.visited == new.visited
+    total = legacy[0].mi_traveled + legacy[1].mi_traveled
+    assert round(total, 1) == 118.9
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_wgu_day_delivers_on_time(indexed):
+    table = run_day(indexed)[2]
+    packages = table.search_many(range(1, 41))
+    assert all(package.status_time is not None for package in packages)
+    assert [package.id for package in packages if package.lateness()] == []
+
+
+def start_stopped_route(to_time=time(8, 30)):
+    """
+    Sends an indexed truck out with main.py's first load and stops it at a status update time.
+    """
+    places, matrix = create_graph_and_places()
+    rows = read_package_data('clean_packages.csv')
+    table = ChainHashTable()
+    insert_all_packages(rows, table, create_address_registry(places, rows))
+    graph = Graph(places, matrix)
+    truck = Truck(1, time(8), indexed=True)
+    truck.to_time = to_time
+    truck.load_and_deliver(PACKAGES_NEEDED[0], table, graph)
+    assert not truck.at_hub and truck.destinations
+    return truck, table, graph
+
+
+def remaining_miles(truck, graph):
+    path = [truck.position] + truck.destinations + [graph.index_of(truck.hub)]
+    return sum(graph.matrix[a][b] for a, b in zip(path, path[1:]))
+
+
+def test_insert_package_mid_route():
+    truck, table, graph = start_stopped_route()
+    before = remaining_miles(truck, graph)
+    added = truck.insert_package(2, table, graph)
+    assert table.search(2).address_id in truck.destinations
+    assert remaining_miles(truck, graph) == pytest.approx(before + added)
+    truck.resume_route(graph, table)
+    assert truck.at_hub
+    assert table.search(2).status_time is not None
+
+
+def test_remove_and_change_address_mid_route():
+    truck, table, graph = start_stopped_route()
+    package_id = next(package_id for node in truck.destinations for package_id in truck.cargo[node]
+                      if len(truck.cargo[node]) == 1)
+    node = table.search(package_id).address_id
+    before = remaining_miles(truck, graph)
+    removed = truck.remove_package(package_id, table, graph)
+    assert node not in truck.destinations and removed <= 0
+    assert remaining_miles(truck, graph) == pytest.approx(before + removed)
+
+    other = truck.cargo[truck.destinations[-1]][0]
+    before = remaining_miles(truck, graph)
+    changed = truck.change_address(other, '410 S State St', table, graph)
+    assert remaining_miles(truck, graph) == pytest.approx(before + changed)
+    truck.resume_route(graph, table)
+    delivered = table.search(other)
+    assert delivered.address_id == graph.index_of('410 S State St')
+    assert delivered.status_time is not None
+    assert table.search(package_id).status_time is None
+
+
+def test_removed_package_is_back_at_the_hub_when_the_truck_returns():
+    truck, table, graph = start_stopped_route()
+    package_id = truck.cargo[truck.destinations[-1]][0]
+    truck.remove_package(package_id, table, graph)
+    assert table.search(package_id).status == 'en route (Truck 1)'
+    truck.resume_route(graph, table, time(8, 31))
+    assert not truck.at_hub and table.search(package_id).status == 'en route (Truck 1)'
+    truck.resume_route(graph, table)
+    assert truck.at_hub and truck.unloading == []
+    assert table.search(package_id).status == 'at the hub'
+
+
+def test_reroute_rejects_bad_changes():
+    truck, table, graph = start_stopped_route()
+    delivered = next(package.id for package in table.search_many(PACKAGES_NEEDED[0])
+                     if package.status_time is not None)
+    with pytest.raises(ValueError):
+        truck.remove_package(delivered, table, graph)
+    with pytest.raises(ValueError):
+        truck.insert_package(PACKAGES_NEEDED[0][-1], table, graph)
+    truck.resume_route(graph, table)
+    with pytest.raises(ValueError):
+        truck.insert_package(2, table, graph)
+    legacy = Truck(2, time(8))
+    with pytest.raises(ValueError):
+        legacy.insert_package(2, table, graph)
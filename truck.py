@@ -1,5 +1,9 @@
 from datetime import timedelta, time, date, datetime
 from graph_traversal import Graph
+from package import PackageStatus, time_to_seconds
+from route_solvers import NearestNeighborSolver
+
+MAX_LOAD_SIZE = 16 #The maximum number of packages a truck can hold at once
 
 class Truck:
     """
@@ -15,22 +19,39 @@ class Truck:
         The time that the truck will give a status update
     mi_traveled : float
         The total miles traveled
-    cargo : list[(int, str)]
-        A list of package_ids with their destination for packages loaded on the truck
+    cargo : dict[str or int, list[int]]
+        The package_ids of packages loaded on the truck, grouped by their destination
     hub : str
         The Hub that the truck is operating from
-    destinations : list[str]
-        A list of destinations the truck must travel to
+    destinations : list[str or int]
+        A list of destinations the truck must travel to. When routing is indexed,
+        destinations are node indexes of the graph instead of addresses
     visited : list[list[str]]
         A list containing the paths that the truck took per trip
     trip_num : int
         The number of trips the truck took in a day minus 1
     at_hub : bool
         Indicated if the truck is currently at its hub
+    indexed : bool
+        If True, routes are planned on the full graph with integer node indexes
+        instead of rebuilding a partial graph at every destination
+    improve_time : float
+        The number of seconds indexed routing may spend improving each nearest neighbor
+        tour with 2-opt and Or-opt moves (None skips the improvement)
+    solver : object
+        The routing engine used by indexed routing, e.g. a ClarkeWrightSolver from route_solvers
+        (None uses the nearest neighbor algorithm)
+    position : int
+        The node index of the last place an indexed route reached (None before the first route)
+    position_time : datetime.time
+        The time the truck reached position
+    unloading : list[int]
+        The package ids taken off the current route, which are unloaded when the truck
+        returns to the hub
 
     Methods
     -------
-    load_truck(package_ids, hash_table)
+    load_truck(package_ids, hash_table, graph)
         Loads a number of packages onto the truck
 
     update_time(miles)
@@ -42,14 +63,32 @@ class Truck:
     deliver_cargo(graph, hash_table)
         Delivers loaded cargo to its relative address
 
-    load_and_deliver(package_ids, hash_table, graph)
+    deliver_route(graph, hash_table, tour)
+        Delivers loaded cargo by routing over the full graph with node indexes
+
+    stop_deadlines(hash_table)
+        Finds the earliest deadline of the packages going to each destination
+
+    resume_route(graph, hash_table, to_time)
+        Continues an indexed route that stopped at a status update time
+
+    insert_package(package_id, hash_table, graph)
+        Adds a package to the remaining route at its cheapest position
+
+    remove_package(package_id, hash_table, graph)
+        Takes an undelivered package off the remaining route
+
+    change_address(package_id, address, hash_table, graph)
+        Moves an undelivered package to a new address on the remaining route
+
+    load_and_deliver(package_ids, hash_table, graph, tour)
         Loads the truck with given packages and delivers them to their destinations
 
     display()
         Displays information about the truck object
     """
 
-    def __init__(self, number, start_time):
+    def __init__(self, number, start_time, indexed=False, improve_time=None, solver=None):
         """
         Parameters
         ----------
@@ -57,21 +96,34 @@ class Truck:
             The id of the truck
         start_time : datetime.time
             The time the truck will leave the hub
+        indexed : bool
+            If True, routes are planned with integer node indexes on the full graph (default = False)
+        improve_time : float
+            The time budget in seconds for improving indexed routes with local search (default = None)
+        solver : object
+            The routing engine to order stops with. Setting a solver turns on indexed routing
+            (default = None)
         """
 
         self.number = number
         self.time = start_time
         self.to_time = None
         self.mi_traveled = 0
-        self.cargo = []
+        self.cargo = {}
         self.hub = '4001 South 700 East'
         self.destinations = []
         self.visited = []
         self.trip_num = -1
         self.at_hub = True
+        self.indexed = indexed or solver is not None
+        self.improve_time = improve_time
+        self.solver = solver
+        self.position = None
+        self.position_time = None
+        self.unloading = []
 
-    #O(n^2)
-    def load_truck(self, package_ids, hash_table):
+    #O(n)
+    def load_truck(self, package_ids, hash_table, graph=None):
         """
         Loads a number of packages onto the truck.
 
@@ -81,17 +133,27 @@ class Truck:
             A list of package ids of packages to load on the truck
         hash_table : ChainHAshTable
             The hash table storing all package information
+        graph : Graph
+            The graph used to find node indexes of packages without an address_id
+            when routing is indexed (default = None)
         """
         self.trip_num += 1
         self.visited.append([])
-        for id in package_ids:
-            package = hash_table.search(id)  # O(n)
+        seen = set(self.destinations)
+        for package in hash_table.search_many(package_ids):  # O(n)
+            if self.indexed:
+                node = package.address_id
+                if node is None:
+                    node = graph.index_of(package.address)
+            else:
+                node = package.address
             if package and (self.to_time != self.time):
                 package.time_left = self.time
-                package.status = "en route (Truck " + str(self.number) + ')'
-                self.cargo.append((id, package.address))
-            if package.address not in self.destinations:
-                self.destinations.append(package.address)
+                package.mark_en_route(self.number)
+                self.cargo.setdefault(node, []).append(package.id)
+            if node not in seen:
+                seen.add(node)
+                self.destinations.append(node)
 
     #O(1)
     def update_time(self, miles):
@@ -117,8 +179,8 @@ class Truck:
         self.time = time_date.time()
         return False
 
-    #O(n^2)
-    #Where n = the amount of packages in cargo
+    #O(m)
+    #Where m = the amount of packages delivered at the node
     def update_cargo(self, hash_table, node):
         """
         Updates the cargo of the truck while delivering packages.
@@ -127,15 +189,11 @@ class Truck:
         ----------
         hash_table : ChainHashTable
             The hash table storing all package information
-        node : str
-            The address that the truck is currently at
+        node : str or int
+            The address (or node index when routing is indexed) that the truck is currently at
         """
-        temp_cargo = self.cargo.copy()
-        for i in range(len(temp_cargo)):
-            package = temp_cargo[i]
-            if package[1] == node:
-                self.cargo.remove(package)
-                hash_table.deliver(package[0], self.time, self.number) #O(n)
+        delivered = self.cargo.pop(node, [])
+        hash_table.deliver_many(delivered, self.time, self.number) #O(m)
 
     #O(n^3)
     #Where n = the number of destinations that one truck must visit
@@ -183,8 +241,298 @@ class Truck:
         self.visited[self.trip_num].append(self.hub)
         self.at_hub = True
 
+    #O(k^2)
+    #Where k = the number of destinations that one truck must visit
+    def deliver_route(self, graph, hash_table, tour=None):
+        """
+        Delivers loaded cargo to its relative address using node indexes.
+
+        The full distance matrix of the graph is kept fixed; the nearest neighbor
+        tour is built from row lookups so no partial graph is created during the route.
+        If improve_time is set, the tour is then improved with 2-opt and Or-opt moves
+        before the truck leaves, and delivery times follow the improved order.
+        If the truck has a solver, the solver orders the stops instead. A solver with a
+        solve_timed method, such as DeadlineSolver, is also given the deadline of each stop.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hash_table : ChainHashTable
+            The hash table storing all package information
+        tour : list[int]
+            A planned order of the destinations' node indexes, e.g. from fleet.plan_routes.
+            If None, the tour is planned here (default = None)
+
+        Returns
+        ----------
+        Null
+        """
+        hub_ix = graph.index_of(self.hub)
+        if tour is None:
+            solver = self.solver or NearestNeighborSolver(self.improve_time)
+            if hasattr(solver, 'solve_timed'):
+                deadlines = self.stop_deadlines(hash_table)
+                tour, _, _ = solver.solve_timed(graph, hub_ix, self.destinations, deadlines,
+                                                time_to_seconds(self.time))
+            else:
+                tour, _ = solver.solve(graph, hub_ix, self.destinations)  # O(k^2) for nearest neighbor
+        else:
+            tour = [ix for ix in tour if ix != hub_ix]
+        #Truck starts path at the hub
+        self.position = hub_ix
+        self.position_time = self.time
+        self.visited[self.trip_num].append(self.hub)
+        self.at_hub = False
+        self.destinations = tour
+        self._drive(graph, hash_table, hub_ix)
+
+    #O(m)
+    #Where m = the number of packages on the truck
+    def stop_deadlines(self, hash_table):
+        """
+        Finds the earliest deadline of the packages going to each destination.
+
+        Parameters
+        ----------
+        hash_table : ChainHashTable
+            The hash table storing all package information
+
+        Returns
+        ----------
+        dict[str or int, int]
+            The earliest deadline in seconds after midnight of each destination with a deadline
+        """
+        deadlines = {}
+        for node, package_ids in self.cargo.items():
+            for package in hash_table.search_many(package_ids):
+                if package is not None and package.due is not None:
+                    due = package.due * 60
+                    if due < deadlines.get(node, due + 1):
+                        deadlines[node] = due
+        return deadlines
+
+    #O(k)
+    def _drive(self, graph, hash_table, hub_ix):
+        """
+        Drives from the truck's position through its remaining destinations and back to the hub,
+        stopping if the status update time is reached.
+        """
+        for i, next_ix in enumerate(self.destinations):
+            miles = graph.matrix[self.position][next_ix]
+            if self.update_time(miles):
+                self.destinations = self.destinations[i:]
+                return
+            self.position = next_ix
+            self.position_time = self.time
+            self.visited[self.trip_num].append(graph.places[next_ix])
+            self.mi_traveled += miles
+            self.update_cargo(hash_table, next_ix)
+        self.destinations = []
+        #The Truck travels back to the hub from its last destination
+        hub_miles = graph.matrix[self.position][hub_ix]
+        self.update_time(hub_miles)
+        self.mi_traveled += hub_miles
+        self.visited[self.trip_num].append(self.hub)
+        self.position = hub_ix
+        self.position_time = self.time
+        self.at_hub = True
+        for package in hash_table.search_many(self.unloading):
+            package.mark_at_hub()
+        self.unloading = []
+
+    #O(k)
+    def resume_route(self, graph, hash_table, to_time=None):
+        """
+        Continues an indexed route that stopped at a status update time.
+
+        The truck restarts from the last place it reached at the time it reached it, so the
+        leg that was cut off by the status update is driven in full.
+
+        Parameters
+        ----------
+        graph : Graph
+            The graph storing data about all addresses
+        hash_table : ChainHashTable
+            The hash table storing all package information
+        to_time : datetime.time
+            The next time to stop for a status update (default = None, finish the route)
+        """
+        self.to_time = to_time
+        if self.at_hub or self.position is None:
+            return
+        self.time = self.position_time
+        self._drive(graph, hash_table, graph.index_of(self.hub))
+
+    #O(1)
+    def _check_reroute(self):
+        """
+        Raises a ValueError unless the truck is on an indexed route that can be changed.
+        """
+        if not self.indexed:
+            raise ValueError('only indexed routes can be changed incrementally')
+        if self.at_hub:
+            raise ValueError('truck ' + str(self.number) + ' is not on a route')
+
+    #O(k)
+    #Where k = the number of remaining destinations
+    def _insert_stop(self, graph, node):
+        """
+        Inserts a node into the remaining destinations where it adds the fewest miles.
+
+        Returns
+        ----------
+        float
+            The miles added to the route
+        """
+        if node in self.destinations:
+            return 0
+        matrix = graph.matrix
+        hub_ix = graph.index_of(self.hub)
+        path = [self.position] + self.destinations + [hub_ix]
+        best_pos = 0
+        best_cost = float('inf')
+        for pos in range(len(path) - 1):
+            prev_ix = path[pos]
+            next_ix = path[pos + 1]
+            cost = matrix[prev_ix][node] + matrix[node][next_ix] - matrix[prev_ix][next_ix]
+            if cost < best_cost:
+                best_cost = cost
+                best_pos = pos
+        self.destinations.insert(best_pos, node)
+        return best_cost
+
+    #O(k)
+    def _remove_stop(self, graph, node):
+        """
+        Removes a node from the remaining destinations once no packages are left for it.
+
+        Returns
+        ----------
+        float
+            The miles added to the route (zero or negative)
+        """
+        if self.cargo.get(node) or node not in self.destinations:
+            return 0
+        self.cargo.pop(node, None)
+        pos = self.destinations.index(node)
+        path = [self.position] + self.destinations + [graph.index_of(self.hub)]
+        prev_ix = path[pos]
+        next_ix = path[pos + 2]
+        matrix = graph.matrix
+        del self.destinations[pos]
+        return matrix[prev_ix][next_ix] - matrix[prev_ix][node] - matrix[node][next_ix]
+
+    #O(k)
+    def _take_off(self, package):
+        """
+        Takes an undelivered package out of the cargo and returns the node it was going to.
+        """
+        if package is None:
+            raise ValueError('package not found')
+        if package.status_code == PackageStatus.DELIVERED:
+            raise ValueError('package ' + str(package.id) + ' has already been delivered')
+        for node, package_ids in self.cargo.items():
+            if package.id in package_ids:
+                package_ids.remove(package.id)
+                return node
+        raise ValueError('package ' + str(package.id) + ' is not on truck ' + str(self.number))
+
+    #O(k)
+    def insert_package(self, package_id, hash_table, graph):
+        """
+        Adds a package to the remaining route of the truck at its cheapest position.
+
+        The rest of the route keeps its order and no partial graph is built.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        hash_table : ChainHashTable
+            The hash table storing all package information
+        graph : Graph
+            The graph storing data about all addresses
+
+        Returns
+        ----------
+        float
+            The miles added to the remaining route
+        """
+        self._check_reroute()
+        package = hash_table.search(package_id)
+        if package is None:
+            raise ValueError('package ' + str(package_id) + ' not found')
+        if package.status_code != PackageStatus.AT_HUB:
+            raise ValueError('package ' + str(package_id) + ' is not at the hub')
+        node = package.address_id
+        if node is None:
+            node = graph.index_of(package.address)
+        package.time_left = self.time
+        package.mark_en_route(self.number)
+        self.cargo.setdefault(node, []).append(package.id)
+        return self._insert_stop(graph, node)
+
+    #O(k)
+    def remove_package(self, package_id, hash_table, graph):
+        """
+        Takes an undelivered package off the remaining route of the truck, e.g. when it is cancelled.
+
+        The package's stop is only removed when no other packages are going there. The
+        package stays en route on the truck until the truck returns to the hub, where it is
+        unloaded and is at the hub again.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        hash_table : ChainHashTable
+            The hash table storing all package information
+        graph : Graph
+            The graph storing data about all addresses
+
+        Returns
+        ----------
+        float
+            The miles added to the remaining route (zero or negative)
+        """
+        self._check_reroute()
+        node = self._take_off(hash_table.search(package_id))
+        self.unloading.append(package_id)
+        return self._remove_stop(graph, node)
+
+    #O(k)
+    def change_address(self, package_id, address, hash_table, graph):
+        """
+        Moves an undelivered package on the truck to a new address, e.g. a corrected address.
+
+        Parameters
+        ----------
+        package_id : int
+            The unique ID of the package
+        address : str
+            The new address of the package, which must be a place of the graph
+        hash_table : ChainHashTable
+            The hash table storing all package information
+        graph : Graph
+            The graph storing data about all addresses
+
+        Returns
+        ----------
+        float
+            The miles added to the remaining route
+        """
+        self._check_reroute()
+        package = hash_table.search(package_id)
+        new_node = graph.index_of(address)
+        old_node = self._take_off(package)
+        package.address = address
+        package.address_id = new_node
+        self.cargo.setdefault(new_node, []).append(package.id)
+        return self._remove_stop(graph, old_node) + self._insert_stop(graph, new_node)
+
     #O(n^3)
-    def load_and_deliver(self, package_ids, hash_table, graph):
+    def load_and_deliver(self, package_ids, hash_table, graph, tour=None, constraints=None):
         """
         Loads the truck with given packages and delivers them to their destinations.
 
@@ -196,6 +544,12 @@ class Truck:
             The hash table storing all package information
         graph : Graph
             The graph storing data about addresses
+        tour : list[int]
+            A planned order of the destinations' node indexes. Only indexed routing can
+            deliver a planned tour (default = None)
+        constraints : PackageConstraints
+            If given, the load is checked against the constraints compiled from the
+            packages' special notes before it is loaded (default = None)
 
         Returns
         ----------
@@ -203,10 +557,23 @@ class Truck:
         """
         if self.to_time and (self.time > self.to_time):
             return
+        if tour is not None and not self.indexed:
+            raise ValueError('a planned tour can only be delivered with indexed routing')
+        if constraints is not None:
+            violations = constraints.check_load(package_ids, self.number, time_to_seconds(self.time))
+            if violations:
+                raise ValueError('packages ' + str(violations) + ' may not leave on truck '
+                                 + str(self.number) + ' at ' + str(self.time))
         self.destinations = []
-        self.load_truck(package_ids, hash_table)  # O(n^2)
-        sub_matrix = graph.create_partial_graph(self.destinations + [self.hub])  # O(n^2)
-        sub_graph = Graph(self.destinations + [self.hub], sub_matrix)
+        self.load_truck(package_ids, hash_table, graph)  # O(n)
+        if self.indexed:
+            self.deliver_route(graph, hash_table, tour)  # O(k^2)
+            return
+        #Keeps the graph's order so ties are broken the same way as indexed routing
+        self.destinations.sort(key=graph.index_of)  # O(n log n)
+        sub_places = sorted(self.destinations + [self.hub], key=graph.index_of)
+        sub_matrix = graph.create_partial_graph(sub_places)  # O(n^2)
+        sub_graph = Graph(sub_places, sub_matrix)
         self.deliver_cargo(sub_graph, hash_table)  # O(n^3)
 
     #O(n)